@@ -0,0 +1,113 @@
+"""
+Incremental stepping for life-like fields
+The field is split into square tiles and only tiles that changed last generation, plus the tiles
+around them, are evaluated, so still lifes and empty space cost nothing once they have settled
+"""
+import numpy as np
+import kernels
+
+
+def any_per_tile(mask, tile):
+    """
+    Returns which tile x tile tiles of 2d boolean mask hold any True cell
+    """
+    for axis in (0, 1):
+        cells = np.moveaxis(mask, axis, 0)
+        full = len(cells) - len(cells) % tile
+        # Whole tiles reduce through a reshape, a cut short last tile on its own
+        parts = [cells[:full].reshape((full // tile, tile) + cells.shape[1:]).any(axis=1)]
+        if full < len(cells):
+            parts.append(cells[full:].any(axis=0, keepdims=True))
+        mask = np.moveaxis(np.concatenate(parts), 0, axis)
+    return mask
+
+
+class ActiveTiles:
+    #####################################################################
+    # Steps only tiles that changed last generation and their neighbors #
+    #####################################################################
+
+    def __init__(self, size, tile=32, dense=.25):
+        self.size = size  # (rows, columns) of the field
+        self.tile = tile  # tiles are tile x tile cells, the last row / column of tiles may be cut short
+        # Above this share of active tiles the whole field is stepped at once, gathering tiles
+        # costs a few times more per cell than stepping the whole field
+        self.dense = dense
+        self.shape = (-(-size[0] // tile), -(-size[1] // tile))
+        self.offsets = np.arange(-1, tile + 1)  # cells of a tile with one cell halo on each side
+
+        self.changed = np.ones(self.shape, dtype=bool)  # tiles that changed last generation
+        self.field = None  # array stepped last time, any other array is evaluated in full
+        self.active_tiles = 0  # tiles evaluated last generation
+        self.active_cells = 0  # cells evaluated last generation
+
+    def invalidate(self, x=None, y=None):
+        """
+        Marks tile of cell (x, y), or every tile, for evaluation after the field was edited
+        """
+        if x is None:
+            self.changed[:] = True
+        else:
+            self.changed[x // self.tile, y // self.tile] = True
+
+    def active(self):
+        """
+        Returns tiles that changed last generation grown by one tile (edges are stitched)
+        """
+        grown = self.changed | np.roll(self.changed, 1, axis=0) | np.roll(self.changed, -1, axis=0)
+        return grown | np.roll(grown, 1, axis=1) | np.roll(grown, -1, axis=1)
+
+    def step(self, field, table):
+        """
+        Advances C contiguous field by one generation of rule table (see kernels.rule_table) in place
+        """
+        if field is not self.field:
+            self.invalidate()
+            self.field = field
+        rows, columns = self.size
+        t = self.tile
+        active = self.active()
+        tx, ty = np.nonzero(active)
+        self.active_tiles = len(tx)
+        if not len(tx):  # nothing can change any more
+            self.active_cells = 0
+            return
+
+        if len(tx) > self.dense * active.size:
+            # Most of the field is busy, gathering tiles would cost more than stepping everything
+            new = kernels.totalistic_step(field, table)
+            self.changed = any_per_tile(new != field, t)
+            field[...] = new
+            self.active_cells = rows * columns
+            return
+
+        # Flat index of every cell of every active tile and its halo, wrapped around the edges of the
+        # field (cut short tiles wrap onto the first tiles, those cells get the same value from both)
+        xs = (tx[:, None] * t + self.offsets) % rows
+        ys = (ty[:, None] * t + self.offsets) % columns
+        index = xs[:, :, None] * columns + ys[:, None, :]
+        cells = field.reshape(-1)
+        state = kernels.rule_states(cells.take(index), len(table))
+
+        # Neighbors of the inner cells from shifted slices, the halo is never written back
+        alive = (state == 1).view(np.uint8)
+        vertical = alive[:, :-2] + alive[:, 1:-1] + alive[:, 2:]
+        neighbors = vertical[:, :, :-2] + vertical[:, :, 1:-1] + vertical[:, :, 2:]
+        neighbors -= alive[:, 1:-1, 1:-1]
+        inner, index = state[:, 1:-1, 1:-1], index[:, 1:-1, 1:-1]
+        new = kernels.apply_rule(inner, neighbors, table)
+
+        # Only tiles that changed are marked and written back, a cut short tile may have changed
+        # cells of the first tiles it wraps onto so those are marked as well
+        changed = (new != inner).reshape(len(tx), -1).any(axis=1)
+        cx, cy = tx[changed], ty[changed]
+        self.changed = np.zeros(self.shape, dtype=bool)
+        self.changed[cx, cy] = True
+        if rows % t:
+            self.changed[0, cy[cx == self.shape[0] - 1]] = True
+        if columns % t:
+            self.changed[cx[cy == self.shape[1] - 1], 0] = True
+            if rows % t:
+                self.changed[0, 0] |= bool(((cx == self.shape[0] - 1) & (cy == self.shape[1] - 1)).any())
+        cells[index[changed]] = new[changed]
+        self.active_cells = len(tx) * t * t
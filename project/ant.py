@@ -0,0 +1,207 @@
+"""
+Compute only stepping loop for Langton's ant and Turmites
+Directions are ints (index into DIRECTIONS, turning right adds 1) and cell states are bytes:
+state s holds curr_array value s - 1, so empty cells (-1) are 0
+"""
+import numpy as np
+
+DIRECTIONS = "NESW"
+RED = (255, 0, 0)
+
+
+def turn_table(rules, numColors):
+    """
+    Precompiles rule string into lookup tables indexed by cell state
+    Returns (next state of cell, turn of ant on leaving it) where turn is 1 for R and 3 for L
+    """
+    # Empty cells become first color, color n becomes color n + 1 (back to 0 after the last one)
+    next_state = [s % numColors + 1 for s in range(numColors + 1)]
+    # Ant rotates based on rule of the cell's new color
+    turns = {"R": 1, "L": 3}
+    turn = [turns.get(rules[s - 1], 0) if s else 0 for s in range(numColors + 1)]
+    return bytes(next_state), bytes(turn)
+
+
+def run(cells, rows, columns, x, y, direction, table, steps):
+    """
+    Steps ant on flat field of states (cell (x, y) at x * columns + y), edges are stitched
+    Returns ant's (x, y, direction) afterwards
+    """
+    next_state, turn = table
+    for _ in range(steps):
+        i = x * columns + y
+        s = next_state[cells[i]]
+        cells[i] = s
+        direction = (direction + turn[s]) & 3
+        if direction == 0:  # N
+            y = y - 1 if y else columns - 1
+        elif direction == 1:  # E
+            x = x + 1 if x < rows - 1 else 0
+        elif direction == 2:  # S
+            y = y + 1 if y < columns - 1 else 0
+        else:  # W
+            x = x - 1 if x else rows - 1
+    return x, y, direction
+
+
+def trace(cells, rows, columns, x, y, direction, table, steps, path):
+    """
+    Same as run, also appends the direction of every move to bytearray path (see highway)
+    """
+    next_state, turn = table
+    for _ in range(steps):
+        i = x * columns + y
+        s = next_state[cells[i]]
+        cells[i] = s
+        direction = (direction + turn[s]) & 3
+        path.append(direction)
+        if direction == 0:  # N
+            y = y - 1 if y else columns - 1
+        elif direction == 1:  # E
+            x = x + 1 if x < rows - 1 else 0
+        elif direction == 2:  # S
+            y = y + 1 if y < columns - 1 else 0
+        else:  # W
+            x = x - 1 if x else rows - 1
+    return x, y, direction
+
+
+def highway(path, max_period=500, repeats=10, min_steps=2000):
+    """
+    Finds the first highway in an ant's moves (directions as traced): a stretch of at least repeats
+    periods and min_steps steps in which the ant repeats the same moves and drifts away, e.g. after
+    ~10000 steps of RL
+    Returns (step the highway starts at, its period) or (-1, 0) if there is none
+    """
+    moves = np.frombuffer(bytes(path), dtype=np.uint8)
+    for period in range(1, min(max_period, len(moves) // (repeats + 1)) + 1):
+        # Runs of steps that repeat the move period steps later
+        same = (moves[period:] == moves[:-period]).view(np.int8)
+        edges = np.diff(same, prepend=0, append=0)
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        for start in starts[ends - starts >= max((repeats - 1) * period, min_steps - period)]:
+            counts = np.bincount(moves[start:start + period], minlength=4)
+            if counts[1] != counts[3] or counts[0] != counts[2]:  # moves away, not in a loop
+                return int(start), period
+    return -1, 0
+
+
+def fast_forward(automaton, steps, surface=None):
+    """
+    Advances Langton / Turmite ant steps times without drawing, then draws only cells that changed
+    """
+    rows, columns = automaton.rows, automaton.columns
+    before = automaton.curr_array
+    cells = bytearray((before + 1).astype(np.uint8).tobytes())
+    table = turn_table(automaton.rules, len(automaton.colors))
+
+    x, y = automaton.ant[0] % rows, automaton.ant[1] % columns
+    previous = (x, y)
+    x, y, direction = run(cells, rows, columns, x, y, DIRECTIONS.index(automaton.direction), table, steps)
+
+    automaton.curr_array = np.frombuffer(cells, dtype=np.uint8).reshape(rows, columns) - before.dtype.type(1)
+    automaton.ant, automaton.direction = (x, y), DIRECTIONS[direction]
+    if surface is not None:
+        draw_changes(automaton, before, previous, surface)
+
+
+def draw_changes(automaton, before, previous, surface):
+    """
+    Redraws cells that differ from before and the cell the ant left, then the ant
+    """
+    field, scale, border = automaton.curr_array, automaton.scale, automaton.border
+    cell = scale - border
+    xs, ys = np.nonzero(field != before)
+    for x, y in zip(xs.tolist() + [previous[0]], ys.tolist() + [previous[1]]):
+        value = int(field[x, y])
+        color = (255, 255, 255) if value == -1 else automaton.colors[value]
+        surface.fill(color, (x * scale, y * scale, cell, cell))
+    surface.fill(RED, (automaton.ant[0] * scale, automaton.ant[1] * scale, cell, cell))
+
+
+class Colony:
+    ##############################################################
+    # Many ants on one field, stepped together with array lookups #
+    ##############################################################
+
+    # Ants landing on the same cell act in ant index order: each one advances the cell's color
+    # once and turns by the color it leaves behind, so the result does not depend on anything
+    # but the ants' order (the same as stepping them one after another)
+    DX = np.array([0, 1, 0, -1])  # move per direction (N, E, S, W)
+    DY = np.array([-1, 0, 1, 0])
+
+    def __init__(self):
+        self.x = np.zeros(0, dtype=np.int64)
+        self.y = np.zeros(0, dtype=np.int64)
+        self.direction = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, x, y, direction):
+        """
+        Adds ants at arrays (or single values) x, y facing direction ("N", "E", "S", "W" or 0-3)
+        """
+        x, y = np.atleast_1d(x).astype(np.int64), np.atleast_1d(y).astype(np.int64)
+        if isinstance(direction, str):
+            direction = DIRECTIONS.index(direction)
+        direction = np.broadcast_to(np.asarray(direction, dtype=np.int64), x.shape)
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, y])
+        self.direction = np.concatenate([self.direction, direction])
+
+    def clear(self):
+        self.__init__()
+
+    def run(self, cells, table, steps):
+        """
+        Steps every ant steps times on 2d uint8 field of states (see turn_table), edges are stitched
+        """
+        rows, columns = cells.shape
+        flat = cells.reshape(-1)
+        next_state = np.frombuffer(table[0], dtype=np.uint8)
+        turn = np.frombuffer(table[1], dtype=np.uint8).astype(np.int64)
+        numColors = len(next_state) - 1
+        count = len(self)
+        if count == 0:
+            return
+        ants = np.arange(count)
+        x, y, direction = self.x, self.y, self.direction
+        for _ in range(steps):
+            index = x * columns + y
+            # Group ants by cell, keeping ant index order within a cell
+            order = np.argsort(index, kind="stable")
+            cell = index[order]
+            first = np.ones(count, dtype=bool)
+            first[1:] = cell[1:] != cell[:-1]
+            if first.all():  # every ant on its own cell
+                state = next_state[flat[cell]]
+            else:
+                # rank of ant among ants on the same cell, it sees the color after rank + 1 advances
+                rank = ants - np.maximum.accumulate(np.where(first, ants, 0))
+                color = flat[cell].astype(np.int64) - 1  # -1 for empty cells
+                state = ((color + rank + 1) % numColors + 1).astype(np.uint8)
+            # Last ant on a cell leaves the cell's final color
+            last = np.ones(count, dtype=bool)
+            last[:-1] = first[1:]
+            flat[cell[last]] = state[last]
+
+            direction[order] = (direction[order] + turn[state]) & 3
+            x = (x + self.DX[direction]) % rows
+            y = (y + self.DY[direction]) % columns
+        self.x, self.y = x, y
+
+
+def draw_colony(automaton, before, previous, surface):
+    """
+    Redraws cells that differ from before and cells the ants left, then the ants
+    """
+    field, scale = automaton.curr_array, automaton.scale
+    cell = scale - automaton.border
+    xs, ys = np.nonzero(field != before)
+    for x, y in zip(xs.tolist() + previous[0].tolist(), ys.tolist() + previous[1].tolist()):
+        value = int(field[x, y])
+        color = (255, 255, 255) if value == -1 else automaton.colors[value]
+        surface.fill(color, (x * scale, y * scale, cell, cell))
+    for x, y in zip(automaton.colony.x.tolist(), automaton.colony.y.tolist()):
+        surface.fill(RED, (x * scale, y * scale, cell, cell))
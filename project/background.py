@@ -0,0 +1,142 @@
+"""
+Background simulation, steps an automaton in a worker thread while the window draws
+The worker copies every finished batch of generations into one of three int8 buffers: the one
+shown last (front), the one the window may still be drawing, and a free one it writes to, so
+neither side ever waits on the other. Edits such as clicks are queued and applied by the worker
+between generations. NumPy kernels release the GIL, so stepping and drawing overlap on multi-core machines.
+"""
+import queue, threading
+import numpy as np
+import scheduler
+
+
+class BackgroundSimulation:
+    ###########################################################
+    # Steps automaton in a thread and hands out finished ones #
+    ###########################################################
+
+    def __init__(self, automaton, step=None, generations=1, pacing=None):
+        self.automaton = automaton
+        self.step = step or automaton.transition  # advances automaton, called by the worker only
+        self.generations = generations  # generations one call of step advances
+        # Steps per batch, a batch is copied out once it is done
+        self.pacing = pacing or scheduler.FrameScheduler(1)
+        self.generation = 0  # owned by the worker, see latest for the window's view
+
+        self.buffers = [np.zeros(automaton.size, dtype=np.int8) for _ in range(3)]
+        self.swap = threading.Lock()  # only held while buffers change hands, never while copying
+        self.front = (self.buffers[0], 0)  # (last finished field, its generation)
+        self.reading = None  # buffer handed to the window last
+
+        self.edits = queue.SimpleQueue()  # (function, args, generation) applied between generations
+        self.running = threading.Event()  # steps continuously while set
+        self.wake = threading.Event()  # set when there is work for an idle worker
+        self.stopped = threading.Event()
+        self.error = None  # exception that stopped the worker
+        self.thread = None
+
+    def start(self):
+        """
+        Publishes current field and starts the worker
+        """
+        self.publish()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self, running):
+        """
+        Starts or pauses continuous stepping, e.g. while space is held
+        """
+        if running != self.running.is_set():
+            if running:
+                self.running.set()
+            else:
+                self.running.clear()
+            self.wake.set()
+
+    def edit(self, function, *args, generation=None):
+        """
+        Queues function(*args) to change the automaton between generations, e.g. edit(conway.click, pos)
+        generation, if given, restarts the generation count afterwards (resets)
+        """
+        self.edits.put((function, args, generation))
+        self.wake.set()
+
+    def advance(self, count=1):
+        """
+        Queues count calls of step, e.g. stepping once on right click while paused
+        """
+        self.edit(self.steps, count)
+
+    def steps(self, count):
+        """
+        Calls step count times, run by the worker
+        """
+        for _ in range(count):
+            self.step()
+        self.generation += count * self.generations
+
+    def latest(self):
+        """
+        Returns (field, generation) of last finished batch, field stays untouched until the next call
+        """
+        if self.error is not None:
+            raise RuntimeError("Background simulation stopped") from self.error
+        with self.swap:
+            self.reading = self.front[0]
+            return self.front
+
+    def publish(self):
+        """
+        Copies automaton's field into the free buffer and makes it the front buffer
+        """
+        with self.swap:
+            busy = (self.front[0], self.reading)
+            back = next(buffer for buffer in self.buffers if not any(buffer is other for other in busy))
+        np.copyto(back, self.automaton.curr_array, casting="unsafe")
+        with self.swap:
+            self.front = (back, self.generation)
+
+    def work(self):
+        """
+        Worker loop: applies queued edits, steps a batch while running, publishes, sleeps when idle
+        """
+        try:
+            while not self.stopped.is_set():
+                self.wake.clear()
+                changed = False
+                while True:
+                    try:
+                        function, args, generation = self.edits.get_nowait()
+                    except queue.Empty:
+                        break
+                    function(*args)
+                    if generation is not None:
+                        self.generation = generation
+                    changed = True
+                if self.running.is_set():
+                    self.generation += self.pacing.run(self.step) * self.generations
+                    changed = True
+                if changed:
+                    self.publish()
+                else:
+                    self.wake.wait(.1)
+        except Exception as error:  # surfaces in the window's next call to latest
+            self.error = error
+
+    def close(self):
+        """
+        Stops the worker after its current batch
+        """
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,540 @@
+"""
+Benchmarks for the step engines of each automaton
+Run from the project directory using:
+    python benchmark.py [conway] [lifelike] [active] [rps] [tiled] [setup] [ensemble] [suite]
+The suite times every automaton and backend and can keep its results to compare later runs against:
+
+    python benchmark.py suite --json baseline.json
+    python benchmark.py suite --json today.json --compare baseline.json
+"""
+import sys, time, json, platform, argparse, tracemalloc
+import multiprocessing as mp
+import numpy as np
+import grid, bitlife, hashlife, sparse, tiled, ensemble, kernels
+
+try:
+    import pygame, render
+except ImportError:  # render times are left out without pygame
+    pygame = render = None
+
+# Field sizes (rows, columns) to time each engine on
+SIZES = [(32, 18), (64, 36), (128, 72), (192, 108)]
+# Sizes too large for the loop engine, only timed for vectorized engines
+LARGE_SIZES = [(640, 360), (1920, 1080), (3840, 2160)]
+
+
+def conway_field(size, engine, seed=0, percentRandom=.4):
+    """
+    Creates Conway field of given (rows, columns) filled with the same random cells for each seed
+    """
+    field = grid.Conway(size[0], size[1], 1, 0, percentRandom, engine="loop")
+    field.random_field(seed)
+    if engine == "packed":
+        conway = bitlife.PackedConway(size[0], size[1], 1, 0, percentRandom)
+    else:
+        conway = grid.Conway(size[0], size[1], 1, 0, percentRandom, engine=engine)
+    conway.curr_array = field.curr_array
+    return conway
+
+
+def time_transitions(automaton, generations):
+    """
+    Returns average seconds per generation of automaton.transition()
+    """
+    start = time.perf_counter()
+    for _ in range(generations):
+        automaton.transition()
+    return (time.perf_counter() - start) / generations
+
+
+def check_conway(size, generations=10, seed=0):
+    """
+    Makes sure every engine yields the same field as the cell by cell loop
+    """
+    reference = conway_field(size, "loop", seed)
+    for _ in range(generations):
+        reference.transition()
+    for engine in grid.Conway.ENGINES + ("packed",):
+        conway = conway_field(size, engine, seed)
+        for _ in range(generations):
+            conway.transition()
+        if not np.array_equal(conway.curr_array, reference.curr_array):
+            raise AssertionError("Conway engine " + repr(engine) + " differs from loop at size " + str(size))
+
+
+def bench_conway(sizes=SIZES, generations=5):
+    """
+    Prints time per generation of each Conway engine and speedup over the loop
+    """
+    print("Conway's Game of Life")
+    print("%12s  %12s  %12s  %12s  %10s" % ("size", "loop (ms)", "numpy (ms)", "packed (ms)", "speedup"))
+    for size in sizes:
+        check_conway(size)
+        loop = time_transitions(conway_field(size, "loop"), generations)
+        vectorized = time_transitions(conway_field(size, "numpy"), generations * 20)
+        packed = time_transitions(conway_field(size, "packed"), generations * 20)
+        print("%12s  %12.3f  %12.3f  %12.3f  %9.0fx" % ("%dx%d" % size, loop * 1e3, vectorized * 1e3,
+                                                     packed * 1e3, loop / min(vectorized, packed)))
+    for size in LARGE_SIZES:
+        vectorized = time_transitions(conway_field(size, "numpy"), generations * 4)
+        packed = time_transitions(conway_field(size, "packed"), generations * 4)
+        print("%12s  %12s  %12.3f  %12.3f  %10s" % ("%dx%d" % size, "-", vectorized * 1e3, packed * 1e3, "-"))
+
+
+# HighLife, Seeds, Day & Night and Brian's Brain (a Generations rule)
+RULES = ["B36/S23", "B2/S", "B3678/S34678", "B2/S/C3"]
+
+
+def lifelike_field(size, rule, engine, seed=0):
+    """
+    Creates life-like field of given (rows, columns) with random states of rule for each seed
+    """
+    lifelike = grid.LifeLike(size[0], size[1], 1, 0, .4, rule, engine=engine)
+    lifelike.curr_array = np.random.default_rng(seed).integers(0, lifelike.states, size).astype(float)
+    return lifelike
+
+
+def check_lifelike(size, rule, generations=10, seed=0):
+    """
+    Makes sure the numpy engine yields the same field as the cell by cell loop
+    """
+    reference, lifelike = lifelike_field(size, rule, "loop", seed), lifelike_field(size, rule, "numpy", seed)
+    for _ in range(generations):
+        reference.transition()
+        lifelike.transition()
+    if not np.array_equal(lifelike.curr_array, reference.curr_array):
+        raise AssertionError("Rule " + rule + " differs from loop at size " + str(size))
+
+
+def bench_lifelike(size=(1920, 1080), generations=20):
+    """
+    Prints time per generation of the numpy engine for other life-like rules
+    """
+    print("Life-like rules at %dx%d" % size)
+    print("%14s  %12s" % ("rule", "numpy (ms)"))
+    for rule in [grid.Conway.RULE] + RULES:
+        check_lifelike(SIZES[0], rule)
+        print("%14s  %12.3f" % (rule, time_transitions(lifelike_field(size, rule, "numpy"), generations) * 1e3))
+
+
+def bench_active(size=(1920, 1080), generations=50):
+    """
+    Prints time per generation of the active engine against numpy, from a busy random field
+    and from a few gliders crossing an empty field
+    """
+    print("Active tiles at %dx%d" % size)
+    print("%10s  %12s  %12s  %14s" % ("field", "numpy (ms)", "active (ms)", "active cells"))
+    random_field = (np.random.default_rng(0).random(size) < .4).astype(float)
+    gliders = np.zeros(size)
+    for x in range(8, size[0] - 8, size[0] // 5):
+        gliders[x + 1, 8] = gliders[x + 2, 9] = 1
+        gliders[x:x + 3, 10] = 1
+    for name, field in (("random", random_field), ("gliders", gliders)):
+        times, cells = [], 0
+        for engine in ("numpy", "active"):
+            conway = grid.Conway(size[0], size[1], 1, 0, .4, engine=engine)
+            conway.curr_array = field.copy()
+            times.append(time_transitions(conway, generations))
+            cells = conway.active_cells
+        print("%10s  %12.3f  %12.3f  %14d" % (name, times[0] * 1e3, times[1] * 1e3, cells))
+
+
+def rps_field(size, numColors, engine, seed=0):
+    """
+    Creates ternary/quinary field of given (rows, columns) filled with the same random cells for each seed
+    """
+    rps = grid.RPS(size[0], size[1], 1, 0, numColors, engine=engine)
+    rps.random_field(seed)
+    return rps
+
+
+def check_rps(size, numColors, generations=10, seed=0):
+    """
+    Makes sure the vectorized engine yields the same field as the cell by cell loop
+    """
+    reference = rps_field(size, numColors, "loop", seed)
+    rps = rps_field(size, numColors, "numpy", seed)
+    for generation in range(generations):
+        reference.transition()
+        rps.transition()
+        if not np.array_equal(rps.curr_array, reference.curr_array):
+            raise AssertionError("RPS engine differs from loop at size " + str(size) +
+                                 ", generation " + str(generation + 1))
+
+
+def bench_rps(sizes=SIZES, generations=5):
+    """
+    Prints time per generation of each RPS engine and speedup over the loop
+    """
+    for numColors in (3, 5):
+        print("Rock Paper Scissors - " + ("Ternary" if numColors == 3 else "Quinary"))
+        print("%12s  %12s  %12s  %10s" % ("size", "loop (ms)", "numpy (ms)", "speedup"))
+        for size in sizes:
+            check_rps(size, numColors)
+            loop = time_transitions(rps_field(size, numColors, "loop"), generations)
+            vectorized = time_transitions(rps_field(size, numColors, "numpy"), generations * 20)
+            print("%12s  %12.3f  %12.3f  %9.0fx" % ("%dx%d" % size, loop * 1e3, vectorized * 1e3, loop / vectorized))
+        for size in LARGE_SIZES:
+            vectorized = time_transitions(rps_field(size, numColors, "numpy"), generations * 4)
+            print("%12s  %12s  %12.3f  %10s" % ("%dx%d" % size, "-", vectorized * 1e3, "-"))
+
+
+def bench_tiled(size=(4096, 4096), generations=20):
+    """
+    Prints generations/sec of the multiprocess engine against number of workers
+    """
+    print("Tiled Conway's Game of Life - %dx%d" % size)
+    print("%12s  %14s  %10s" % ("workers", "generations/s", "scaling"))
+    workers, base = 1, None
+    while workers <= mp.cpu_count():
+        field = np.random.default_rng(0).random(size) < .4
+        with tiled.TiledEngine(field, workers=workers) as engine:
+            engine.step(1)  # workers warm up
+            start = time.perf_counter()
+            engine.step(generations)
+            rate = generations / (time.perf_counter() - start)
+        base = base or rate
+        print("%12d  %14.2f  %9.2fx" % (workers, rate, rate / base))
+        workers *= 2
+
+
+def time_call(function, repeats=5):
+    """
+    Returns fastest seconds of repeats calls to function
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_setup(sizes=LARGE_SIZES):
+    """
+    Prints time to randomize and reset fields, what startup and Ctrl + T / Ctrl + R cost
+    """
+    print("Field setup")
+    print("%12s  %14s  %14s  %14s  %14s" % ("size", "conway random", "conway reset", "rps random", "langton reset"))
+    for size in sizes:
+        conway = grid.Conway(size[0], size[1], 1, 0, .4, seed=0)
+        rps = grid.RPS(size[0], size[1], 1, 0, 5, seed=0)
+        langton = grid.Langton(size[0], size[1], 1, 0, [(255, 255, 255), (0, 0, 0)], "RL")
+        times = (time_call(conway.random_field), time_call(conway.reset), time_call(rps.random_field),
+                 time_call(langton.reset))
+        print("%12s  %11.3f ms  %11.3f ms  %11.3f ms  %11.3f ms" % (("%dx%d" % size,) + tuple(t * 1e3 for t in times)))
+
+
+def ensemble_objects(stack):
+    """
+    Returns one grid.LifeLike / grid.RPS per field of ensemble stack, holding the same fields
+    """
+    objects = []
+    for field in stack.fields:
+        if isinstance(stack, ensemble.RPSEnsemble):
+            automaton = grid.RPS(stack.rows, stack.columns, 1, 0, stack.numColors)
+        else:
+            automaton = grid.LifeLike(stack.rows, stack.columns, 1, 0, stack.percentRandom, stack.rule)
+        automaton.curr_array = field.astype(float)
+        objects.append(automaton)
+    return objects
+
+
+def check_ensemble(count=50, size=(24, 16), generations=10):
+    """
+    Makes sure every field of an ensemble steps and counts the same as its own grid.LifeLike / grid.RPS
+    """
+    stacks = [ensemble.ConwayEnsemble(count, size[0], size[1], seed=0),
+              ensemble.LifeLikeEnsemble(count, size[0], size[1], rule="B2/S/C3", seed=0),
+              ensemble.RPSEnsemble(count, size[0], size[1], 3, seed=0),
+              ensemble.RPSEnsemble(count, size[0], size[1], 5, seed=0)]
+    for stack in stacks:
+        stack.random_field()
+        objects = ensemble_objects(stack)
+        for generation in range(generations):
+            stack.transition()
+            for automaton in objects:
+                automaton.transition()
+        fields = np.array([automaton.curr_array for automaton in objects])
+        states = kernels.RPS_STATES if isinstance(stack, ensemble.RPSEnsemble) else range(stack.states)
+        counts = np.array([[np.count_nonzero(field == state) for state in states] for field in fields])
+        if not np.array_equal(stack.fields, fields) or not np.array_equal(stack.state_counts(), counts):
+            raise AssertionError("Ensemble differs from single fields of " + type(stack).__name__)
+
+
+def bench_ensemble(counts=(100, 1000, 10000), size=(64, 64), repeats=3):
+    """
+    Prints generations/sec of many small fields stepped one object at a time against one ensemble
+    """
+    check_ensemble()
+    for name, make in (("Conway's Game of Life", lambda count: ensemble.ConwayEnsemble(count, *size, seed=0)),
+                       ("Rock Paper Scissors - Quinary", lambda count: ensemble.RPSEnsemble(count, *size, 5, seed=0))):
+        print("Ensembles of %dx%d fields - %s" % (size + (name,)))
+        print("%12s  %16s  %16s  %10s" % ("fields", "objects (gen/s)", "ensemble (gen/s)", "speedup"))
+        for count in counts:
+            stack = make(count)
+            stack.random_field()
+            whole = time_call(stack.transition, repeats)
+            if count > 1000:  # too slow one object at a time
+                print("%12d  %16s  %16.2f  %10s" % (count, "-", 1 / whole, "-"))
+                continue
+            objects = ensemble_objects(stack)
+            single = time_call(lambda: [automaton.transition() for automaton in objects], repeats)
+            print("%12d  %16.2f  %16.2f  %9.1fx" % (count, 1 / single, 1 / whole, single / whole))
+
+
+# Field sizes of the suite, the loop engines and HashLife only run the first one
+SUITE_SIZES = [(128, 72), (640, 360), (1920, 1080)]
+DIRTY_CELLS = 640 * 360  # largest field dirty rendering is timed on, it fills changed cells span by span
+ANT_STEPS = 10000  # ant steps per call of fast_forward
+ANTS = 1000  # ants of the Turmite colony
+ENSEMBLE_FIELDS = 1000  # fields of each ensemble case, ENSEMBLE_SIZE cells each
+ENSEMBLE_SIZE = (64, 64)
+COLORS = [(255, 255, 255), (0, 0, 0), (228, 26, 28), (31, 120, 180), (255, 127, 0)]
+
+
+def make_lifelike(size, engine, rule=grid.Conway.RULE):
+    """
+    Returns (automaton, step, generations per step, cells per generation) of a random life-like field
+    """
+    if engine == "packed":
+        automaton = bitlife.PackedConway(size[0], size[1], 1, 0, .4, seed=0)
+    elif engine == "hashlife":
+        automaton = hashlife.HashLifeConway(size[0], size[1], 1, 0, .4, seed=0)
+    elif rule == grid.Conway.RULE:
+        automaton = grid.Conway(size[0], size[1], 1, 0, .4, engine=engine, seed=0)
+    else:
+        automaton = grid.LifeLike(size[0], size[1], 1, 0, .4, rule, engine=engine, seed=0)
+    automaton.reset()
+    automaton.random_field()
+    return automaton, automaton.transition, 1, size[0] * size[1]
+
+
+def make_rps(size, engine, numColors):
+    """
+    Returns (automaton, step, generations per step, cells per generation) of a random ternary/quinary field
+    """
+    automaton = grid.RPS(size[0], size[1], 1, 0, numColors, engine=engine, seed=0)
+    automaton.random_field()
+    return automaton, automaton.transition, 1, size[0] * size[1]
+
+
+def make_tiled(size, numColors=None):
+    """
+    Returns (automaton, step, generations per step, cells per generation) of a random field stepped by
+    one worker process per CPU, run_case closes it again
+    """
+    automaton = tiled.TiledAutomaton(size[0], size[1], numColors=numColors, seed=0)
+    automaton.random_field()
+    return automaton, automaton.transition, 1, size[0] * size[1]
+
+
+def make_ensemble(size, count, numColors=None):
+    """
+    Returns (ensemble, step, generations per step, cells per generation) of count random Conway or RPS fields
+    """
+    if numColors is None:
+        stack = ensemble.ConwayEnsemble(count, size[0], size[1], seed=0)
+    else:
+        stack = ensemble.RPSEnsemble(count, size[0], size[1], numColors, seed=0)
+    stack.random_field()
+    return stack, stack.transition, 1, count * size[0] * size[1]
+
+
+def make_ant(size, engine, mode):
+    """
+    Returns (automaton, step, steps per step, cells per step) of an ant on an empty field
+    A colony steps ANTS ants at once, so every step of it visits ANTS cells
+    """
+    if engine == "sparse":
+        automaton = sparse.SparseLangton(size[0], size[1], 1, 0, COLORS[:2], "RL", wrap=True)
+    elif mode == "langton":
+        automaton = grid.Langton(size[0], size[1], 1, 0, COLORS[:3], "RRL")
+    else:
+        automaton = grid.Turmite(size[0], size[1], 1, 0, COLORS[:3], "RRL", seed=0)
+    automaton.reset()
+    automaton.ant = (size[0] // 2, size[1] // 2)
+    if engine == "loop":
+        return automaton, automaton.transition, 1, 1
+    if engine == "colony":
+        automaton.random_ants(ANTS)
+        return automaton, lambda: automaton.step_ants(100), 100, ANTS
+    return automaton, lambda: automaton.fast_forward(ANT_STEPS), ANT_STEPS, 1
+
+
+def suite_cases(sizes=SUITE_SIZES):
+    """
+    Returns [(automaton, engine, rule, size, make), ...] for every automaton and backend, where
+    make() builds the same seeded field every time (see make_lifelike)
+    """
+    cases = []
+    for size in sizes:
+        first = size == sizes[0]
+        for engine in grid.Conway.ENGINES + ("packed", "hashlife"):
+            if first or engine not in ("loop", "hashlife"):
+                cases.append(("conway", engine, grid.Conway.RULE, size, lambda s=size, e=engine: make_lifelike(s, e)))
+        cases.append(("conway", "tiled", grid.Conway.RULE, size, lambda s=size: make_tiled(s)))
+        for rule in RULES:
+            cases.append(("lifelike", "numpy", rule, size, lambda s=size, r=rule: make_lifelike(s, "numpy", r)))
+        for numColors in (3, 5):
+            for engine in grid.RPS.ENGINES:
+                if first or engine != "loop":
+                    cases.append(("rps", engine, "%d colors" % numColors, size,
+                                  lambda s=size, e=engine, n=numColors: make_rps(s, e, n)))
+            cases.append(("rps", "tiled", "%d colors" % numColors, size, lambda s=size, n=numColors: make_tiled(s, n)))
+        for engine in ("loop", "fast_forward", "sparse"):
+            cases.append(("langton", engine, "RL" if engine == "sparse" else "RRL", size,
+                          lambda s=size, e=engine: make_ant(s, e, "langton")))
+        for engine in ("fast_forward", "colony"):
+            cases.append(("turmite", engine, "RRL", size, lambda s=size, e=engine: make_ant(s, e, "turmite")))
+    # Many small fields in one array, the same whatever sizes are timed
+    cases.append(("conway", "ensemble", grid.Conway.RULE, ENSEMBLE_SIZE,
+                  lambda: make_ensemble(ENSEMBLE_SIZE, ENSEMBLE_FIELDS)))
+    cases.append(("rps", "ensemble", "5 colors", ENSEMBLE_SIZE,
+                  lambda: make_ensemble(ENSEMBLE_SIZE, ENSEMBLE_FIELDS, 5)))
+    return cases
+
+
+def palette(automaton):
+    """
+    Returns render palette of automaton
+    """
+    if hasattr(automaton, "numColors"):  # grid.RPS and tiled RPS fields
+        return render.rps_palette(*COLORS)
+    if hasattr(automaton, "colors"):
+        return render.ant_palette(automaton.colors)
+    return render.lifelike_palette(COLORS[0], COLORS[1], automaton.states)
+
+
+def time_render(automaton, step, frames=5):
+    """
+    Returns {renderer: milliseconds per frame} drawing automaton onto an offscreen surface after every step
+    """
+    # The sparse plane has no fixed field, an ensemble has many
+    if render is None or isinstance(automaton, (sparse.SparseLangton, ensemble.LifeLikeEnsemble, ensemble.RPSEnsemble)):
+        return None
+    times = {}
+    for name, renderer_class in (("blit", render.BlitRenderer), ("dirty", render.DirtyRenderer)):
+        if name == "dirty" and automaton.rows * automaton.columns > DIRTY_CELLS:
+            continue
+        renderer = renderer_class(automaton, palette(automaton))
+        surface = pygame.Surface((automaton.rows, automaton.columns))
+        renderer.draw(surface)  # first frame draws every cell
+        total = 0
+        for _ in range(frames):
+            step()
+            start = time.perf_counter()
+            renderer.draw(surface)
+            total += time.perf_counter() - start
+        times[name] = round(total / frames * 1e3, 4)
+    return times
+
+
+def run_case(make, min_time=.25):
+    """
+    Returns generations/sec, cells/sec, peak traced memory (bytes) and render ms per frame of one case
+    """
+    # Memory is traced on a separate automaton, tracing slows down allocations
+    tracemalloc.start()
+    automaton, step, generations, cells = make()
+    step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if isinstance(automaton, tiled.TiledAutomaton):  # stops its workers
+        automaton.close()
+
+    automaton, step, generations, cells = make()
+    step()  # warm up, e.g. tables built on first use
+    calls, start = 0, time.perf_counter()
+    while True:
+        step()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    rate = calls * generations / elapsed
+    result = {"generations_per_sec": round(rate, 3), "cells_per_sec": round(rate * cells),
+              "peak_memory_bytes": peak, "render_ms": time_render(automaton, step)}
+    if isinstance(automaton, tiled.TiledAutomaton):
+        automaton.close()
+    return result
+
+
+def bench_suite(sizes=SUITE_SIZES, min_time=.25):
+    """
+    Prints and returns generations/sec, cells/sec, peak memory and render time of every automaton and backend
+    Ant steps count as generations
+    """
+    print("Suite")
+    print("%10s  %12s  %14s  %10s  %14s  %14s  %10s  %10s  %10s" % (
+        "automaton", "engine", "rule", "size", "generations/s", "cells/s", "peak (MB)", "blit (ms)", "dirty (ms)"))
+    results = []
+    for name, engine, rule, size, make in suite_cases(sizes):
+        result = {"automaton": name, "engine": engine, "rule": rule, "size": list(size)}
+        result.update(run_case(make, min_time))
+        results.append(result)
+        render_ms = result["render_ms"] or {}
+        print("%10s  %12s  %14s  %10s  %14.1f  %14.3g  %10.2f  %10s  %10s" % (
+            name, engine, rule, "%dx%d" % size, result["generations_per_sec"], result["cells_per_sec"],
+            result["peak_memory_bytes"] / 2 ** 20, "%.3f" % render_ms["blit"] if "blit" in render_ms else "-",
+            "%.3f" % render_ms["dirty"] if "dirty" in render_ms else "-"))
+    return {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                     "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor(),
+                     "cpus": mp.cpu_count()},
+            "results": results}
+
+
+def compare(results, baseline, tolerance=.25):
+    """
+    Prints cases whose generations/sec fell by more than tolerance against baseline results
+    Returns number of such regressions
+    """
+    def key(result):
+        return result["automaton"], result["engine"], result["rule"], tuple(result["size"])
+
+    before = {key(result): result for result in baseline["results"]}
+    regressions = 0
+    for result in results["results"]:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        ratio = result["generations_per_sec"] / old["generations_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions += 1
+            print("Regression: %s %s %s %dx%d at %.0f%% of baseline speed" % (key(result)[:3] + tuple(result["size"]) +
+                                                                             (ratio * 100,)))
+    print("%d regression(s) against %d baseline cases" % (regressions, len(before)))
+    return regressions
+
+
+BENCHMARKS = {"conway": bench_conway, "lifelike": bench_lifelike, "active": bench_active, "rps": bench_rps,
+              "tiled": bench_tiled, "setup": bench_setup, "ensemble": bench_ensemble, "suite": bench_suite}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks for the step engines of each automaton")
+    parser.add_argument("benchmarks", nargs="*", help="any of " + ", ".join(BENCHMARKS) + " (default all)")
+    parser.add_argument("--json", help="suite: file to write results to")
+    parser.add_argument("--compare", help="suite: results file of an earlier run, exit status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=.25,
+                        help="suite: share of generations/sec a case may lose before it counts as a regression")
+    parser.add_argument("--quick", action="store_true", help="suite: only the two smaller sizes")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("Unknown benchmark " + repr(name) + ", choose from " + ", ".join(BENCHMARKS))
+    if (args.json or args.compare) and not args.benchmarks:
+        args.benchmarks = ["suite"]
+
+    regressions = 0
+    for name in args.benchmarks or BENCHMARKS:
+        if name != "suite":
+            BENCHMARKS[name]()
+            continue
+        results = bench_suite(SUITE_SIZES[:2] if args.quick else SUITE_SIZES)
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump(results, file, indent=1)
+        if args.compare:
+            with open(args.compare) as file:
+                regressions = compare(results, json.load(file), args.tolerance)
+    sys.exit(1 if regressions else 0)
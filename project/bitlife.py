@@ -0,0 +1,196 @@
+import numpy as np
+import grid, kernels
+
+WORD = 64  # cells stored per machine word
+
+
+def pack(field):
+    """
+    Packs 2d field of 0/1 cells into rows of uint64 words
+    Cell (x, y) is stored in word y // 64 of row x at bit y % 64
+    """
+    rows, columns = field.shape
+    packed = np.packbits(field == 1, axis=1, bitorder="little")
+    # Pad each row to a whole number of words
+    words = -(-columns // WORD)
+    padded = np.zeros((rows, words * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view("<u8")
+
+
+def unpack(bits, columns):
+    """
+    Unpacks rows of uint64 words into 2d uint8 field of 0/1 cells
+    """
+    return np.unpackbits(bits.view(np.uint8), axis=1, count=columns, bitorder="little")
+
+
+class PackedLife:
+    ###################################################
+    # Game of Life on bitboards, 64 cells per uint64  #
+    ###################################################
+
+    def __init__(self, rows, columns, band=1024):
+        self.rows, self.columns = rows, columns
+        self.band = band  # rows stepped at a time
+        self.words = -(-columns // WORD)
+        self.bits = np.zeros((rows, self.words), dtype=np.uint64)
+
+        # Last valid bit of each row, bits above it in the last word stay 0
+        self.last_bit = np.uint64((columns - 1) % WORD)
+        self.tail_mask = np.uint64((1 << ((columns - 1) % WORD + 1)) - 1)
+
+    def shift_neighbors(self, bits):
+        """
+        Returns rows holding the neighbor at y - 1 and y + 1 of every cell
+        Stitches the first and last valid bits together to keep the field toroidal
+        """
+        one, top = np.uint64(1), np.uint64(WORD - 1)
+        # Neighbor at y - 1: shift every bit up one place, carrying in bit 63 of the previous word
+        left = (bits << one) | (np.roll(bits, 1, axis=1) >> top)
+        left[:, 0] = (left[:, 0] & ~one) | ((bits[:, -1] >> self.last_bit) & one)
+        # Neighbor at y + 1: shift every bit down one place, carrying in bit 0 of the next word
+        right = (bits >> one) | (np.roll(bits, -1, axis=1) << top)
+        if self.last_bit != top:
+            wrap = np.uint64(1) << self.last_bit
+            right[:, -1] = (right[:, -1] & ~wrap) | ((bits[:, 0] & one) << self.last_bit)
+        return left, right
+
+    def step(self):
+        """
+        Advances one generation using bitwise adder logic on whole words
+        Works through bands of rows so temporaries stay small next to the field
+        """
+        new_bits = np.empty_like(self.bits)
+        for start in range(0, self.rows, self.band):
+            end = min(start + self.band, self.rows)
+            # Band plus one row above and below, stitched toroidally
+            block = self.bits.take(np.arange(start - 1, end + 1) % self.rows, axis=0)
+            new_bits[start:end] = self.step_block(block)
+        self.bits = new_bits
+
+    def step_block(self, block):
+        """
+        Returns next generation of the inner rows of block (first and last row are only neighbors)
+        """
+        left, right = self.shift_neighbors(block)
+        alive = block[1:-1]
+
+        # 3 bit counter (s2 s1 s0) of live neighbors, 8 neighbors wrap around to 0 which also dies
+        s0 = np.zeros_like(alive)
+        s1 = np.zeros_like(alive)
+        s2 = np.zeros_like(alive)
+        carry0, carry1 = np.empty_like(alive), np.empty_like(alive)
+        planes = (left[1:-1], right[1:-1],
+                  block[:-2], left[:-2], right[:-2],
+                  block[2:], left[2:], right[2:])
+        for plane in planes:
+            np.bitwise_and(s0, plane, out=carry0)
+            s0 ^= plane
+            np.bitwise_and(s1, carry0, out=carry1)
+            s1 ^= carry0
+            s2 ^= carry1
+
+        # Live next generation: 3 neighbors, or 2 neighbors and currently live
+        s0 |= alive
+        s0 &= s1
+        s0 &= ~s2
+        s0[:, -1] &= self.tail_mask
+        return s0
+
+    def get(self, x, y):
+        return int(self.bits[x, y // WORD] >> np.uint64(y % WORD)) & 1
+
+    def toggle(self, x, y):
+        self.bits[x, y // WORD] ^= np.uint64(1) << np.uint64(y % WORD)
+
+    def population(self):
+        """
+        Returns number of live cells
+        """
+        return int(np.unpackbits(self.bits.view(np.uint8)).sum(dtype=np.int64))
+
+
+class PackedConway(grid.Conway):
+    ###############################################################
+    # Conway's Game of Life stored as bitboards (64x less memory) #
+    ###############################################################
+
+    def __init__(self, width, height, scale, border, percentRandom, seed=None):
+        # Same setup as Conway, but never allocates the field as a float array
+        self.scale = scale
+
+        self.rows = int(width / scale)
+        self.columns = int(height / scale)
+        self.size = (self.rows, self.columns)
+
+        self.board = PackedLife(self.rows, self.columns)  # Field as rows of bitboards
+        self.unpacked = None  # curr_array as last unpacked, None once the board changed
+        self.border = border  # Lines between cells
+        self.percentRandom = percentRandom
+        self.rng = np.random.default_rng(seed)
+        self.rule = self.RULE  # bitboards only step B3/S23
+        self.table = kernels.rule_table(self.RULE)
+        self.states = 2
+        self.engine = "packed"
+        self.tracker = None
+
+    @property
+    def curr_array(self):
+        """
+        Field unpacked into the 2d array layout used by update, unpacked once per change of the board
+        (update reads it cell by cell, renderers once per frame)
+        The returned array is read only, edit a copy and assign the whole array instead
+        """
+        if self.unpacked is None:
+            self.unpacked = unpack(self.board.bits, self.columns)
+            self.unpacked.flags.writeable = False
+        return self.unpacked
+
+    @curr_array.setter
+    def curr_array(self, field):
+        self.board.bits = pack(np.asarray(field))
+        self.unpacked = None
+
+    def transition(self):
+        """
+        Rules for transitions between generations
+        """
+        self.board.step()
+        self.unpacked = None
+
+    def get_neighbors(self, x, y):
+        neighbors = 0
+        for n in range(-1, 2):
+            for m in range(-1, 2):
+                if not (n == m == 0):  # Ignore self during check
+                    neighbors += self.board.get((x + n) % self.rows, (y + m) % self.columns)
+        return neighbors
+
+    def click(self, pos):
+        """
+        Clicking on cell will change it's state from dead to live or vice versa
+        """
+        x, y = int(pos[0] / self.scale), int(pos[1] / self.scale)
+        self.board.toggle(x, y)
+        self.unpacked = None
+
+    def random_field(self, seed=None):
+        """
+        Generates random field of cells, seed restarts the random generator
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        # Pack one band of rows at a time so the unpacked field never exists in full
+        for start in range(0, self.rows, self.board.band):
+            end = min(start + self.board.band, self.rows)
+            band = self.rng.random((end - start, self.columns)) < self.percentRandom
+            self.board.bits[start:end] = pack(band)
+        self.unpacked = None
+
+    def reset(self):
+        """
+        Clears entire field to all dead cells
+        """
+        self.board.bits[:] = 0
+        self.unpacked = None
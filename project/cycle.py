@@ -0,0 +1,73 @@
+"""
+Detects fields that became static or periodic
+Every generation the field is hashed, a hash seen before means the field repeats an earlier
+generation (hashes are 64 bit, so false matches are negligible)
+Fields of one byte per cell are hashed as they are. Wider fields (the float64 curr_array of grid.py)
+are first summed per row with random weights, one matrix-vector product that reads every cell once
+without copying the field, and the row sums are hashed instead: a field differing in any cell differs
+in the sum of its row.
+"""
+from collections import OrderedDict
+import numpy as np
+
+WEIGHTS = {}  # columns -> random weight of each column, the same for the whole process
+
+
+def row_weights(columns):
+    """
+    Returns random weights in [1, 2) of columns cells, made once per number of columns
+    """
+    if columns not in WEIGHTS:
+        WEIGHTS[columns] = 1 + np.random.default_rng(columns).random(columns)
+    return WEIGHTS[columns]
+
+
+def fingerprint(field):
+    """
+    Returns 64 bit hash of field, equal fields always give the same hash
+    Hashes are only comparable within one process since Python salts the hash of bytes
+    """
+    if field.itemsize == 1:  # tiled int8, bool or unpacked uint8 fields
+        return hash(field.view(np.int8).tobytes())
+    return hash((field @ row_weights(field.shape[1])).tobytes())
+
+
+class CycleDetector:
+    ################################################################
+    # Hashes field every generation and spots repeated generations #
+    ################################################################
+
+    def __init__(self, history=4096):
+        self.history = history  # generations remembered, longer periods go unnoticed
+        self.seen = OrderedDict()  # field hash -> generation it was first seen at
+        self.period = None  # set once a generation repeats, 1 for static fields
+        self.start = None  # generation the cycle starts at
+
+    def reset(self):
+        self.__init__(self.history)
+
+    def update(self, field, generation, key=None):
+        """
+        Hashes field of given generation, returns True if an earlier generation had the same field
+        key is a hash of field made elsewhere (tiled workers hash their bands), field is then not read
+        """
+        if key is None:
+            key = fingerprint(field)
+        start = self.seen.get(key)
+        if start is not None:
+            self.start, self.period = start, generation - start
+            return True
+        self.seen[key] = generation
+        if len(self.seen) > self.history:
+            self.seen.popitem(last=False)  # forget the oldest generation
+        return False
+
+    def describe(self):
+        """
+        Returns text describing the cycle found, if any
+        """
+        if self.period is None:
+            return "no cycle found"
+        if self.period == 1:
+            return "static from generation %d" % self.start
+        return "period %d from generation %d" % (self.period, self.start)
@@ -0,0 +1,134 @@
+"""
+Ensembles, many small fields of the same automaton stacked into one (count, rows, columns) array
+A single call of the kernels in kernels.py steps every field at once (they count neighbors along the
+last two axes, so each field wraps at its own edges), which beats stepping thousands of grid.Conway
+objects one by one. Populations and state counts are reduced for all fields at once as well.
+"""
+import numpy as np
+import kernels, grid
+
+
+def count_states(fields, states):
+    """
+    Returns (count, len(states)) array, cells of each field equal to each state (in the order of states)
+    """
+    # One pass per state over all fields, faster than binning every cell once for the few states there are
+    return np.stack([np.count_nonzero(fields == state, axis=(1, 2)) for state in states], axis=1)
+
+
+class LifeLikeEnsemble:
+    ######################################################
+    # Stack of life-like fields stepped together at once #
+    ######################################################
+
+    def __init__(self, count, rows, columns, percentRandom=.4, rule="B3/S23", seed=None):
+        self.count = count
+        self.rows, self.columns = rows, columns
+        self.size = (rows, columns)
+        self.percentRandom = percentRandom
+        self.rule = rule
+        self.table = kernels.rule_table(rule)  # next state by [state][live neighbors]
+        self.states = self.table.shape[0]
+        self.fields = np.zeros((count, rows, columns), dtype=np.uint8)  # fields[i] is field i as [x][y]
+        self.rng = np.random.default_rng(seed)  # random fields, the same seed gives the same fields
+
+    def transition(self):
+        """
+        Advances every field by one generation
+        """
+        self.fields = kernels.apply_rule(self.fields, kernels.count_neighbors(self.fields == 1), self.table)
+
+    def random_field(self, seed=None):
+        """
+        Fills every field with random live cells, each live with probability percentRandom
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.fields = (self.rng.random(self.fields.shape) < self.percentRandom).view(np.uint8)
+
+    def reset(self):
+        self.fields.fill(0)
+
+    def load(self, i, field):
+        """
+        Copies 2d field (e.g. curr_array of a grid.LifeLike) into field i
+        """
+        self.fields[i] = kernels.rule_states(np.asarray(field), self.states)
+
+    def population(self):
+        """
+        Returns array of live cells per field
+        """
+        return np.count_nonzero(self.fields == 1, axis=(1, 2))
+
+    def state_counts(self):
+        """
+        Returns (count, states) array of cells per state per field, dead cells first
+        """
+        return count_states(self.fields, range(self.states))
+
+
+class ConwayEnsemble(LifeLikeEnsemble):
+    #####################################################
+    # Stack of Game of Life fields stepped all together #
+    #####################################################
+
+    def __init__(self, count, rows, columns, percentRandom=.4, seed=None):
+        super().__init__(count, rows, columns, percentRandom, grid.Conway.RULE, seed)
+
+
+class RPSEnsemble:
+    ####################################################
+    # Stack of ternary/quinary fields stepped together #
+    ####################################################
+
+    # Rock = -1, White = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4, so fields are int8
+    def __init__(self, count, rows, columns, numColors, weights=None, seed=None):
+        self.count = count
+        self.rows, self.columns = rows, columns
+        self.size = (rows, columns)
+        self.numColors = numColors
+        if weights is not None and len(weights) != numColors:
+            raise ValueError("Need " + str(numColors) + " weights, one per color " + str(grid.RPS.COLORS[numColors]))
+        self.weights = weights
+        self.fields = np.zeros((count, rows, columns), dtype=np.int8)
+        self.rng = np.random.default_rng(seed)
+
+    def transition(self):
+        """
+        Advances every field by one generation
+        """
+        self.fields = kernels.rps_step(self.fields, self.numColors)
+
+    def random_field(self, seed=None):
+        """
+        Fills every field with random colors drawn by weights
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        weights = None
+        if self.weights is not None:
+            weights = np.asarray(self.weights, dtype=float) / np.sum(self.weights)
+        colors = np.array(grid.RPS.COLORS[self.numColors], dtype=np.int8)
+        self.fields = self.rng.choice(colors, size=self.fields.shape, p=weights)
+
+    def reset(self):
+        self.fields.fill(0)
+
+    def load(self, i, field):
+        """
+        Copies 2d field (e.g. curr_array of a grid.RPS) into field i
+        """
+        self.fields[i] = field
+
+    def population(self):
+        """
+        Returns array of colored (not white) cells per field
+        """
+        return np.count_nonzero(self.fields, axis=(1, 2))
+
+    def state_counts(self):
+        """
+        Returns (count, 6) array of cells per field of rock, white, paper, scissors, lizard and Spock
+        """
+        return count_states(self.fields, kernels.RPS_STATES)
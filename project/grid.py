@@ -1,13 +1,23 @@
-import pygame, random
+import functools
 import numpy as np
+import kernels, ant, active
 
+try:
+    import pygame
+except ImportError:  # headless runs (see headless.py) only step fields and never draw
+    pygame = None
 
-class Conway:
-    ###################################
-    # Class for Conway's Game of Life #
-    ###################################
 
-    def __init__(self, width, height, scale, border, percentRandom):
+class LifeLike:
+    #####################################################################
+    # Class for outer totalistic rules ("B3/S23", "B36/S23", "B2/S/C3") #
+    #####################################################################
+
+    # "numpy" steps whole field at once, "loop" visits every cell (reference implementation),
+    # "active" only steps tiles that changed last generation and their neighbors
+    ENGINES = ("numpy", "loop", "active")
+
+    def __init__(self, width, height, scale, border, percentRandom, rule="B3/S23", engine="numpy", seed=None):
         self.scale = scale
 
         self.rows = int(width / scale)
@@ -17,10 +27,37 @@ class Conway:
         self.curr_array = np.ndarray(shape=self.size)  # Field as 2d array
         self.border = border  # Lines between cells
         self.percentRandom = percentRandom
+        self.rng = np.random.default_rng(seed)  # random fields, the same seed gives the same fields
+
+        # Dead = 0, Live = 1, Decaying = 2 .. states - 1 (Generations rules only)
+        self.rule = rule
+        self.table = kernels.rule_table(rule)  # next state by [state][live neighbors]
+        self.states = len(self.table)
+
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown engine " + repr(engine) + ", choose from " + str(self.ENGINES))
+        self.engine = engine
+        # Tiles that changed, see active_cells / active_tiles for the work done last generation
+        self.tracker = active.ActiveTiles(self.size) if engine == "active" else None
+
+    @property
+    def active_cells(self):
+        return self.tracker.active_cells if self.tracker is not None else self.rows * self.columns
+
+    @property
+    def active_tiles(self):
+        return self.tracker.active_tiles if self.tracker is not None else None
+
+    def invalidate(self):
+        """
+        Evaluates every cell next generation, needed after editing curr_array in place
+        """
+        if self.tracker is not None:
+            self.tracker.invalidate()
 
     def update(self, dead, live, surface):
         """
-        Updates cells color correlating to dead or live
+        Updates cells color correlating to dead or live (decaying cells are drawn dead)
         """
         for x in range(self.rows):
             for y in range(self.columns):
@@ -36,21 +73,25 @@ class Conway:
         """
         Rules for transitions between generations
         """
+        if self.engine == "numpy":
+            # Count neighbors of all cells at once and look up next states in the rule table
+            self.curr_array = kernels.totalistic_step(self.curr_array, self.table).astype(self.curr_array.dtype)
+            return
+        if self.engine == "active":
+            # Tiles are written back in place through a flat view of the field
+            self.curr_array = np.ascontiguousarray(self.curr_array)
+            self.tracker.step(self.curr_array, self.table)
+            return
+
         new_array = np.ndarray(shape=self.size)
         for x in range(self.rows):
             for y in range(self.columns):
                 state = self.curr_array[x][y]
                 neighbors = self.get_neighbors(x, y)
-                # Any live cell with two or three live neighbors survives.
-                if state == 1 and (neighbors == 2 or neighbors == 3):
-                    new_array[x][y] = 1
-                # Any dead cell with three live neighbors becomes a live cell.
-                elif state == 0 and neighbors == 3:
-                    new_array[x][y] = 1
-                # All other live cells die in the next generation.
-                # Similarly, all other dead cells stay dead.
-                else:
-                    new_array[x][y] = 0
+                # Values that are not a state of the rule count as dead cells
+                if state != int(state) or not 0 <= state < self.states:
+                    state = 0
+                new_array[x][y] = self.table[int(state)][neighbors]
 
         # update previous field with next generation's field
         self.curr_array = new_array
@@ -67,7 +108,7 @@ class Conway:
                     # Since field is finite, stitch edges to yield toroidal array
                     x_edge = (x + n + self.rows) % self.rows
                     y_edge = (y + m + self.columns) % self.columns
-                    neighbors += self.curr_array[x_edge][y_edge]
+                    neighbors += self.curr_array[x_edge][y_edge] == 1
         return neighbors
 
     def click(self, pos):
@@ -79,24 +120,36 @@ class Conway:
             self.curr_array[x][y] = 0
         else:
             self.curr_array[x][y] = 1
+        if self.tracker is not None:
+            self.tracker.invalidate(x, y)
 
-    def random_field(self):
+    def random_field(self, seed=None):
         """
-        Generates random field of cells
+        Generates random field of cells, percentRandom of them live
+        seed restarts the random generator, so the same seed always gives the same field
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                # self.curr_array[x][y] = random.randint(0, 1)
-                self.curr_array[x][y] = random.choices(
-                    [0, 1], [1 - self.percentRandom, self.percentRandom])[0]  # Fills grid with percentRandom live cells
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.curr_array[...] = self.rng.random(self.size) < self.percentRandom
+        self.invalidate()
 
     def reset(self):
         """
         Clears entire field to all dead cells
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                self.curr_array[x][y] = 0
+        self.curr_array.fill(0)
+        self.invalidate()
+
+
+class Conway(LifeLike):
+    ###################################
+    # Class for Conway's Game of Life #
+    ###################################
+
+    RULE = "B3/S23"
+
+    def __init__(self, width, height, scale, border, percentRandom, engine="numpy", seed=None):
+        super().__init__(width, height, scale, border, percentRandom, self.RULE, engine, seed)
 
 
 class RPS:
@@ -104,8 +157,14 @@ class RPS:
     # Class for ternary/quinary multi-state world #
     ###############################################
 
+    # "numpy" steps whole field at once, "loop" visits every cell (reference implementation)
+    ENGINES = ("numpy", "loop")
+
+    # Colors random fields are made of for each number of colors
+    COLORS = {3: (-1, 1, 2), 5: (-1, 1, 2, 3, 4)}
+
     # Rock = -1, White = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4
-    def __init__(self, width, height, scale, border, numColors):
+    def __init__(self, width, height, scale, border, numColors, engine="numpy", weights=None, seed=None):
         self.scale = scale
 
         self.rows = int(width / scale)
@@ -115,6 +174,15 @@ class RPS:
         self.curr_array = np.ndarray(shape=self.size)  # Field as 2d array
         self.border = border  # Lines between cells
         self.numColors = numColors
+        # Relative frequency of each color of COLORS in random fields, equal if None
+        if weights is not None and len(weights) != numColors:
+            raise ValueError("Need " + str(numColors) + " weights, one per color " + str(self.COLORS[numColors]))
+        self.weights = weights
+        self.rng = np.random.default_rng(seed)  # random fields, the same seed gives the same fields
+
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown engine " + repr(engine) + ", choose from " + str(self.ENGINES))
+        self.engine = engine
 
     def update(self, rock, paper, scissors, lizard, spock, surface):
         """
@@ -147,6 +215,11 @@ class RPS:
         """
         Updates current field with next generation field
         """
+        if self.engine == "numpy":
+            # Count neighbors of each color for all cells at once, see kernels.DOMINANCE for rules
+            self.curr_array = kernels.rps_step(self.curr_array, self.numColors)
+            return
+
         new_array = np.ndarray(shape=self.size)
         for x in range(self.rows):
             for y in range(self.columns):
@@ -211,24 +284,42 @@ class RPS:
         x, y = int(pos[0] / self.scale), int(pos[1] / self.scale)
         self.curr_array[x][y] = choice
 
-    def random_field(self):
+    def random_field(self, seed=None):
         """
-        Generates random field of cells
+        Generates random field of cells, colors drawn by weights
+        seed restarts the random generator, so the same seed always gives the same field
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                if self.numColors == 3:
-                    self.curr_array[x][y] = random.choices([-1, 1, 2])[0]
-                elif self.numColors == 5:
-                    self.curr_array[x][y] = random.choices([-1, 1, 2, 3, 4])[0]
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        weights = None
+        if self.weights is not None:
+            weights = np.asarray(self.weights, dtype=float) / np.sum(self.weights)
+        self.curr_array[...] = self.rng.choice(self.COLORS[self.numColors], size=self.size, p=weights)
 
     def reset(self):
         """
         Clears entire field to all white cells
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                self.curr_array[x][y] = 0
+        self.curr_array.fill(0)
+
+
+@functools.lru_cache(maxsize=4)
+def blank_cells(rows, columns, scale, border, color=(255, 255, 255)):
+    """
+    Returns surface of rows x columns cells of color, lines between cells are transparent (colorkey)
+    Blitting it clears every cell at once and leaves lines between cells as they are
+    """
+    size = (rows * scale, columns * scale)
+    blank = pygame.Surface(size)
+    blank.fill(color)
+    if border:
+        key = (0, 0, 0) if color != (0, 0, 0) else (255, 255, 255)
+        blank.set_colorkey(key)
+        for x in range(scale - border, size[0], scale):
+            blank.fill(key, (x, 0, border, size[1]))
+        for y in range(scale - border, size[1], scale):
+            blank.fill(key, (0, y, size[0], border))
+    return blank
 
 
 def most_freq(neighbors):
@@ -262,7 +353,7 @@ class Langton:
         self.rules = rules
         self.colors = colors
 
-    def transition(self, surface):
+    def transition(self, surface=None):
         """
         Updates cells colors on field between each transition
         """
@@ -275,13 +366,15 @@ class Langton:
 
             # Update color of cell ant is currently on
             # Move ant forward in current direction
-            # Draw ant on that forward cell
-            pygame.draw.rect(surface, self.colors[0],
-                             [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
+            # Draw ant on that forward cell (no drawing without surface)
+            if surface is not None:
+                pygame.draw.rect(surface, self.colors[0],
+                                 [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
             self.move()
-            pygame.draw.rect(surface, (255, 0, 0),
-                             [self.ant[0] * self.scale, self.ant[1] * self.scale,
-                              self.scale - self.border, self.scale - self.border])
+            if surface is not None:
+                pygame.draw.rect(surface, (255, 0, 0),
+                                 [self.ant[0] * self.scale, self.ant[1] * self.scale,
+                                  self.scale - self.border, self.scale - self.border])
 
         else:
             # updates value of cell to n+1 color
@@ -294,13 +387,22 @@ class Langton:
 
             # Update color of cell ant is currently on
             # Move ant forward in current direction
-            # Draw ant on that forward cell
-            pygame.draw.rect(surface, self.colors[update_idx],
-                             [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
+            # Draw ant on that forward cell (no drawing without surface)
+            if surface is not None:
+                pygame.draw.rect(surface, self.colors[update_idx],
+                                 [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
             self.move()
-            pygame.draw.rect(surface, (255, 0, 0),
-                             [self.ant[0] * self.scale, self.ant[1] * self.scale,
-                              self.scale - self.border, self.scale - self.border])
+            if surface is not None:
+                pygame.draw.rect(surface, (255, 0, 0),
+                                 [self.ant[0] * self.scale, self.ant[1] * self.scale,
+                                  self.scale - self.border, self.scale - self.border])
+
+    def fast_forward(self, steps, surface=None):
+        """
+        Advances ant steps times in a compute only loop (see ant.py)
+        Only cells that changed are drawn afterwards
+        """
+        ant.fast_forward(self, steps, surface)
 
     def move(self):
         """
@@ -365,16 +467,13 @@ class Langton:
                          [new_x, new_y, self.scale - self.border, self.scale - self.border])
         self.direction = direction
 
-    def reset(self, surface):
+    def reset(self, surface=None):
         """
         Clears entire field to all dead cells
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                x_pos, y_pos = x * self.scale, y * self.scale
-                self.curr_array[x][y] = -1  # initial field array to all empty (-1)
-                pygame.draw.rect(surface, (255, 255, 255),
-                                 [x_pos, y_pos, self.scale - self.border, self.scale - self.border])
+        self.curr_array.fill(-1)  # initial field array to all empty (-1)
+        if surface is not None:
+            surface.blit(blank_cells(self.rows, self.columns, self.scale, self.border), (0, 0))
 
 
 class Turmite:
@@ -382,7 +481,7 @@ class Turmite:
     # Class for Turmites #
     ######################
 
-    def __init__(self, width, height, scale, border, colors, rules):
+    def __init__(self, width, height, scale, border, colors, rules, seed=None):
         self.scale = scale
 
         self.rows = int(width / scale)
@@ -399,7 +498,11 @@ class Turmite:
         self.rules = rules
         self.colors = colors
 
-    def transition(self, surface):
+        # Many ants stepped together, see add_ant and step_ants
+        self.colony = ant.Colony()
+        self.rng = np.random.default_rng(seed)  # random ants, the same seed gives the same colony
+
+    def transition(self, surface=None):
         """
         Updates cells colors on field between each transition
         """
@@ -412,13 +515,15 @@ class Turmite:
 
             # Update color of cell ant is currently on
             # Move ant forward in current direction
-            # Draw ant on that forward cell
-            pygame.draw.rect(surface, self.colors[0],
-                             [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
+            # Draw ant on that forward cell (no drawing without surface)
+            if surface is not None:
+                pygame.draw.rect(surface, self.colors[0],
+                                 [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
             self.move()
-            pygame.draw.rect(surface, (255, 0, 0),
-                             [self.ant[0] * self.scale, self.ant[1] * self.scale,
-                              self.scale - self.border, self.scale - self.border])
+            if surface is not None:
+                pygame.draw.rect(surface, (255, 0, 0),
+                                 [self.ant[0] * self.scale, self.ant[1] * self.scale,
+                                  self.scale - self.border, self.scale - self.border])
 
         else:
             # updates value of cell to n+1 color
@@ -431,13 +536,48 @@ class Turmite:
 
             # Update color of cell ant is currently on
             # Move ant forward in current direction
-            # Draw ant on that forward cell
-            pygame.draw.rect(surface, self.colors[update_idx],
-                             [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
+            # Draw ant on that forward cell (no drawing without surface)
+            if surface is not None:
+                pygame.draw.rect(surface, self.colors[update_idx],
+                                 [ant_xcoord, ant_ycoord, self.scale - self.border, self.scale - self.border])
             self.move()
-            pygame.draw.rect(surface, (255, 0, 0),
-                             [self.ant[0] * self.scale, self.ant[1] * self.scale,
-                              self.scale - self.border, self.scale - self.border])
+            if surface is not None:
+                pygame.draw.rect(surface, (255, 0, 0),
+                                 [self.ant[0] * self.scale, self.ant[1] * self.scale,
+                                  self.scale - self.border, self.scale - self.border])
+
+    def fast_forward(self, steps, surface=None):
+        """
+        Advances ant steps times in a compute only loop (see ant.py)
+        Only cells that changed are drawn afterwards
+        """
+        ant.fast_forward(self, steps, surface)
+
+    def add_ant(self, x, y, direction="N"):
+        """
+        Adds ant(s) to the colony at cell (x, y), x and y may be arrays
+        """
+        self.colony.add(x, y, direction)
+
+    def random_ants(self, count):
+        """
+        Adds count ants at random cells facing random directions
+        """
+        self.colony.add(self.rng.integers(self.rows, size=count), self.rng.integers(self.columns, size=count),
+                        self.rng.integers(4, size=count))
+
+    def step_ants(self, steps, surface=None):
+        """
+        Advances every ant of the colony steps times in one vectorized pass per step
+        Only cells that changed and cells ants moved from or to are drawn afterwards
+        """
+        before = self.curr_array
+        cells = (before + 1).astype(np.uint8)
+        previous = (self.colony.x, self.colony.y)
+        self.colony.run(cells, ant.turn_table(self.rules, len(self.colors)), steps)
+        self.curr_array = cells - before.dtype.type(1)
+        if surface is not None:
+            ant.draw_colony(self, before, previous, surface)
 
     def move(self):
         """
@@ -502,13 +642,10 @@ class Turmite:
                          [new_x, new_y, self.scale - self.border, self.scale - self.border])
         self.direction = direction
 
-    def reset(self, surface):
+    def reset(self, surface=None):
         """
         Clears entire field to all dead cells
         """
-        for x in range(self.rows):
-            for y in range(self.columns):
-                x_pos, y_pos = x * self.scale, y * self.scale
-                self.curr_array[x][y] = -1  # initial field array to all empty (-1)
-                pygame.draw.rect(surface, (255, 255, 255),
-                                 [x_pos, y_pos, self.scale - self.border, self.scale - self.border])
\ No newline at end of file
+        self.curr_array.fill(-1)  # initial field array to all empty (-1)
+        if surface is not None:
+            surface.blit(blank_cells(self.rows, self.columns, self.scale, self.border), (0, 0))
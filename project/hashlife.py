@@ -0,0 +1,356 @@
+import numpy as np
+import grid
+
+
+class Node:
+    ##################################################################
+    # Quadtree node of 2^k x 2^k cells, children a=NW b=NE c=SW d=SE #
+    ##################################################################
+    __slots__ = ("k", "a", "b", "c", "d", "n")
+
+    def __init__(self, k, a, b, c, d, n):
+        self.k = k  # level, node covers 2^k x 2^k cells
+        self.a, self.b, self.c, self.d = a, b, c, d
+        self.n = n  # population
+
+
+OFF = Node(0, None, None, None, None, 0)
+ON = Node(0, None, None, None, None, 1)
+
+
+class HashLife:
+    ###########################################################################
+    # Gosper's HashLife: canonical quadtree with memoized RESULT of each node #
+    ###########################################################################
+
+    def __init__(self, max_nodes=2000000):
+        self.nodes = {}  # (a, b, c, d) -> Node, every node exists only once
+        self.results = {}  # (node, j) -> center of node after 2^j generations
+        self.empties = [OFF]  # empty node of each level
+        self.codes = {}  # 4x4 node -> 16 bit code of its cells, used by window
+        self.max_nodes = max_nodes  # nodes plus memoized results kept at most, checked while stepping
+        self.limit = max_nodes  # table size triggering the next trim, raised while the live tree is that large
+        self.collections = 0
+
+        self.root = self.empty(3)
+        self.center = (4, 4)  # plane coordinates of root's center, never moves
+
+    def join(self, a, b, c, d):
+        """
+        Returns the canonical node with children a, b, c, d
+        """
+        key = (a, b, c, d)
+        node = self.nodes.get(key)
+        if node is None:
+            node = Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n)
+            self.nodes[key] = node
+        return node
+
+    def empty(self, k):
+        """
+        Returns empty node of level k
+        """
+        while len(self.empties) <= k:
+            e = self.empties[-1]
+            self.empties.append(self.join(e, e, e, e))
+        return self.empties[k]
+
+    def centre(self, m):
+        """
+        Returns node one level up with m in the middle, surrounded by empty cells
+        """
+        z = self.empty(m.k - 1)
+        return self.join(self.join(z, z, z, m.a), self.join(z, z, m.b, z),
+                         self.join(z, m.c, z, z), self.join(m.d, z, z, z))
+
+    def life_4x4(self, m):
+        """
+        Base case: center 2x2 of a 4x4 node after one generation
+        """
+        cells = [[m.a.a.n, m.a.b.n, m.b.a.n, m.b.b.n],
+                 [m.a.c.n, m.a.d.n, m.b.c.n, m.b.d.n],
+                 [m.c.a.n, m.c.b.n, m.d.a.n, m.d.b.n],
+                 [m.c.c.n, m.c.d.n, m.d.c.n, m.d.d.n]]
+        quadrants = []
+        for x, y in ((1, 1), (1, 2), (2, 1), (2, 2)):
+            neighbors = sum(cells[x + n][y + m] for n in (-1, 0, 1) for m in (-1, 0, 1)) - cells[x][y]
+            # Any live cell with two or three live neighbors survives.
+            # Any dead cell with three live neighbors becomes a live cell.
+            alive = neighbors == 3 or (cells[x][y] == 1 and neighbors == 2)
+            quadrants.append(ON if alive else OFF)
+        return self.join(*quadrants)
+
+    def successor(self, m, j):
+        """
+        Returns center 2^(k-1) x 2^(k-1) of node m after 2^j generations (j <= k - 2)
+        """
+        if m.n == 0:  # empty space stays empty
+            return m.a
+        j = min(j, m.k - 2)
+        key = (m, j)
+        result = self.results.get(key)
+        if result is not None:
+            return result
+
+        if m.k == 2:
+            result = self.life_4x4(m)
+        else:
+            join, successor = self.join, self.successor
+            # 9 overlapping subnodes of level k-1 covering m
+            c1 = successor(m.a, j)
+            c2 = successor(join(m.a.b, m.b.a, m.a.d, m.b.c), j)
+            c3 = successor(m.b, j)
+            c4 = successor(join(m.a.c, m.a.d, m.c.a, m.c.b), j)
+            c5 = successor(join(m.a.d, m.b.c, m.c.b, m.d.a), j)
+            c6 = successor(join(m.b.c, m.b.d, m.d.a, m.d.b), j)
+            c7 = successor(m.c, j)
+            c8 = successor(join(m.c.b, m.d.a, m.c.d, m.d.c), j)
+            c9 = successor(m.d, j)
+            if j < m.k - 2:
+                # Subnodes already advanced 2^j generations, stitch their centers together
+                result = join(join(c1.d, c2.c, c4.b, c5.a), join(c2.d, c3.c, c5.b, c6.a),
+                              join(c4.d, c5.c, c7.b, c8.a), join(c5.d, c6.c, c8.b, c9.a))
+            else:
+                # Subnodes advanced half way, advance their overlaps the other half
+                result = join(successor(join(c1, c2, c4, c5), j), successor(join(c2, c3, c5, c6), j),
+                              successor(join(c4, c5, c7, c8), j), successor(join(c5, c6, c8, c9), j))
+        self.results[key] = result
+        if len(self.nodes) + len(self.results) > self.limit:
+            self.trim()
+        return result
+
+    def is_padded(self, m):
+        """
+        True if all live cells of m are inside its central half
+        """
+        return (m.k >= 3 and m.a.n == m.a.d.d.n and m.b.n == m.b.c.c.n
+                and m.c.n == m.c.b.b.n and m.d.n == m.d.a.a.n)
+
+    def advance(self, generations):
+        """
+        Advances root by any number of generations, one power of two at a time
+        """
+        j = 0
+        while generations:
+            if generations & 1:
+                root = self.root
+                # Pattern can grow at most 1 cell per generation, pad so it stays inside the result
+                while root.k < j + 2 or not self.is_padded(root):
+                    root = self.centre(root)
+                self.root = self.successor(self.centre(root), j)
+                if len(self.nodes) + len(self.results) > self.limit:
+                    self.trim()
+            generations >>= 1
+            j += 1
+
+    def trim(self):
+        """
+        Keeps the tables within max_nodes, also in the middle of a jump: drops the memoized results
+        first and, if the nodes alone fill more than half of it, those unreachable from root
+        Nodes the recursion still holds stay valid, they are only no longer shared (a later join
+        of the same children makes a new node)
+        """
+        self.results.clear()
+        # Half the budget is free afterwards, so the memo table has room to pay off before the next trim
+        if len(self.nodes) > self.max_nodes // 2:
+            self.collect()
+            # A live tree above half of max_nodes is kept whole, trim again only once the tables doubled it
+            self.limit = max(self.max_nodes, 2 * len(self.nodes))
+
+    def collect(self):
+        """
+        Garbage collection: drops nodes unreachable from root and results that refer to them
+        """
+        alive, stack = set(self.empties), [self.root]
+        while stack:
+            node = stack.pop()
+            if node.k > 0 and node not in alive:
+                alive.add(node)
+                stack.extend((node.a, node.b, node.c, node.d))
+        self.nodes = {key: node for key, node in self.nodes.items() if node in alive}
+        self.results = {key: node for key, node in self.results.items()
+                        if key[0] in alive and node in alive}
+        self.codes = {node: code for node, code in self.codes.items() if node in alive}
+        self.collections += 1
+
+    def load(self, field):
+        """
+        Builds quadtree from 2d field of 0/1 cells, field[0][0] is placed at plane (0, 0)
+        """
+        k = max(3, int(np.ceil(np.log2(max(field.shape)))))
+        size = 1 << k
+        cells = np.zeros((size, size), dtype=np.int64)
+        cells[:field.shape[0], :field.shape[1]] = field == 1
+
+        # Encode every 4x4 block as 16 bits and build one level 2 node per distinct block
+        codes = np.zeros((size // 4, size // 4), dtype=np.int64)
+        for x in range(4):
+            for y in range(4):
+                codes |= cells[x::4, y::4] << (x * 4 + y)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        blocks = np.empty(len(unique), dtype=object)
+        for i, code in enumerate(unique.tolist()):
+            leaf = [[ON if code >> (x * 4 + y) & 1 else OFF for y in range(4)] for x in range(4)]
+            blocks[i] = self.join(self.join(leaf[0][0], leaf[0][1], leaf[1][0], leaf[1][1]),
+                                  self.join(leaf[0][2], leaf[0][3], leaf[1][2], leaf[1][3]),
+                                  self.join(leaf[2][0], leaf[2][1], leaf[3][0], leaf[3][1]),
+                                  self.join(leaf[2][2], leaf[2][3], leaf[3][2], leaf[3][3]))
+        nodes = blocks[inverse.reshape(codes.shape)]
+
+        # Join quadrants level by level up to the root
+        join = np.frompyfunc(self.join, 4, 1)
+        while nodes.shape[0] > 1:
+            nodes = join(nodes[0::2, 0::2], nodes[0::2, 1::2], nodes[1::2, 0::2], nodes[1::2, 1::2])
+        self.root = nodes[0, 0]
+        self.center = (size // 2, size // 2)
+
+    def origin(self):
+        """
+        Plane coordinates of root's top left cell
+        """
+        half = 1 << (self.root.k - 1)
+        return self.center[0] - half, self.center[1] - half
+
+    def window(self, x, y, rows, columns):
+        """
+        Returns rows x columns uint8 array of the plane starting at (x, y)
+        """
+        # Collect the 4x4 blocks overlapping the window, then stamp them all at once
+        tops, lefts, codes = [], [], []
+        stack = [(self.root,) + self.origin()]
+        while stack:
+            node, top, left = stack.pop()
+            size = 1 << node.k
+            if node.n == 0 or top >= x + rows or left >= y + columns or top + size <= x or left + size <= y:
+                continue  # empty or outside window
+            if node.k == 2:
+                tops.append(top)
+                lefts.append(left)
+                codes.append(self.block_code(node))
+            else:
+                half = size >> 1
+                stack.extend(((node.a, top, left), (node.b, top, left + half),
+                              (node.c, top + half, left), (node.d, top + half, left + half)))
+
+        # Margin of one block around the window for blocks sticking out of it
+        field = np.zeros((rows + 8, columns + 8), dtype=np.uint8)
+        tops = np.array(tops, dtype=np.int64) - x + 4
+        lefts = np.array(lefts, dtype=np.int64) - y + 4
+        codes = np.array(codes, dtype=np.int64)
+        for i in range(4):
+            for j in range(4):
+                field[tops + i, lefts + j] = codes >> (i * 4 + j) & 1
+        return field[4:rows + 4, 4:columns + 4]
+
+    def block_code(self, m):
+        """
+        Encodes cells of a 4x4 node as 16 bits, cell (x, y) at bit x * 4 + y
+        """
+        code = self.codes.get(m)
+        if code is None:
+            rows = ((m.a.a, m.a.b, m.b.a, m.b.b), (m.a.c, m.a.d, m.b.c, m.b.d),
+                    (m.c.a, m.c.b, m.d.a, m.d.b), (m.c.c, m.c.d, m.d.c, m.d.d))
+            code = sum(q.n << (x * 4 + y) for x, row in enumerate(rows) for y, q in enumerate(row))
+            self.codes[m] = code
+        return code
+
+    def set_cell(self, x, y, alive):
+        """
+        Sets cell at plane (x, y) by rebuilding the path from root down to it
+        """
+        top, left = self.origin()
+        while not (top <= x < top + (1 << self.root.k) and left <= y < left + (1 << self.root.k)):
+            self.root = self.centre(self.root)
+            top, left = self.origin()
+        self.root = self._set(self.root, x - top, y - left, alive)
+
+    def _set(self, node, x, y, alive):
+        if node.k == 0:
+            return ON if alive else OFF
+        half = 1 << (node.k - 1)
+        a, b, c, d = node.a, node.b, node.c, node.d
+        if x < half and y < half:
+            a = self._set(a, x, y, alive)
+        elif x < half:
+            b = self._set(b, x, y - half, alive)
+        elif y < half:
+            c = self._set(c, x - half, y, alive)
+        else:
+            d = self._set(d, x - half, y - half, alive)
+        return self.join(a, b, c, d)
+
+
+class HashLifeConway(grid.Conway):
+    ######################################################################
+    # Conway's Game of Life on an unbounded plane, stepped with HashLife #
+    ######################################################################
+
+    # Unlike Conway the plane is not stitched at the edges, the field is only
+    # a viewport into it and patterns may leave it
+    def __init__(self, width, height, scale, border, percentRandom, step_exponent=0, max_nodes=2000000, seed=None):
+        super().__init__(width, height, scale, border, percentRandom, seed=seed)
+        self.engine = "hashlife"
+        self.life = HashLife(max_nodes)
+        self.step_exponent = step_exponent  # each transition advances 2^step_exponent generations
+        self.generation = 0
+        self.view = (0, 0)  # plane coordinates shown at curr_array[0][0]
+        self.load(self.curr_array)
+
+    def load(self, field):
+        """
+        Replaces the plane with field, assigning curr_array alone does not reach the plane
+        """
+        self.curr_array = np.asarray(field, dtype=self.curr_array.dtype)
+        self.life.load(self.curr_array)
+        self.view, self.generation = (0, 0), 0
+
+    def transition(self):
+        """
+        Advances 2^step_exponent generations at once
+        """
+        self.jump(self.step_exponent)
+
+    def jump(self, k):
+        """
+        Advances 2^k generations and exports the viewport into curr_array
+        """
+        self.life.advance(1 << k)
+        self.generation += 1 << k
+        self.export()
+
+    def fast_forward(self, generations):
+        """
+        Advances any number of generations in one go and exports the viewport once, for batch runs
+        """
+        self.life.advance(generations)
+        self.generation += generations
+        self.export()
+
+    def export(self):
+        """
+        Copies viewport window of the plane into curr_array for update
+        """
+        window = self.life.window(self.view[0], self.view[1], self.rows, self.columns)
+        self.curr_array = window.astype(self.curr_array.dtype)
+
+    def click(self, pos):
+        """
+        Clicking on cell will change it's state from dead to live or vice versa
+        """
+        super().click(pos)
+        x, y = int(pos[0] / self.scale), int(pos[1] / self.scale)
+        self.life.set_cell(self.view[0] + x, self.view[1] + y, self.curr_array[x][y] == 1)
+
+    def random_field(self, seed=None):
+        """
+        Generates random field of cells inside the viewport
+        """
+        super().random_field(seed)
+        self.load(self.curr_array)
+
+    def reset(self):
+        """
+        Clears entire plane to all dead cells
+        """
+        super().reset()
+        self.load(self.curr_array)
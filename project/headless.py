@@ -0,0 +1,325 @@
+"""
+Headless batch runner, steps an automaton without a display and writes results to files
+Run from the project directory, e.g.
+
+    python headless.py conway --rows 1920 --columns 1080 --generations 1000 --output final.npy --stats stats.csv
+    python headless.py conway --rule B36/S23 --generations 1000 --stats highlife.csv
+    python headless.py rps --colors 5 --generations 500 --stats rps.csv
+    python headless.py langton --rules RLR --generations 100000 --output ant.npy
+    python headless.py conway --generations 100000 --checkpoint run.snap --checkpoint-every 10000
+    python headless.py conway --resume run.snap --generations 50000 --checkpoint run.snap
+    python headless.py turmite --rules RRL --ants 1000 --generations 10000 --stats colony.csv
+    python headless.py conway --empty --pattern gosper_glider_gun --at 10 10 --generations 3000 --stats gun.csv
+    python headless.py conway --rows 320 --columns 180 --generations 500 --record life.gif --record-scale 2
+    python headless.py conway --engine hashlife --generations 1000000 --stats-every 100000 --stats life.csv
+    python headless.py conway --engine tiled --workers 8 --rows 20000 --columns 20000 --generations 100
+"""
+import os, sys, time, argparse, csv
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import grid, bitlife, hashlife, sparse, tiled, cycle, snapshot, patterns, recorder
+
+MODES = ("conway", "rps", "langton", "turmite")
+# Engines stepping a whole chunk with fast_forward when no cycle detector looks at every generation
+BATCH_ENGINES = (hashlife.HashLifeConway, tiled.TiledAutomaton)
+TILED_PIECE = 64  # generations tiled workers step between reporting their hashes to a cycle detector
+SNAPSHOT_MODES = {"LifeLike": "conway", "Conway": "conway", "PackedConway": "conway", "RPS": "rps",
+                  "Langton": "langton", "Turmite": "turmite"}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a cellular automaton without a display")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--rows", type=int, default=256, help="field width in cells")
+    parser.add_argument("--columns", type=int, default=256, help="field height in cells")
+    parser.add_argument("--generations", type=int, default=1000, help="generations (ant steps) to run")
+    parser.add_argument("--seed", type=int, default=None, help="seed for random field")
+    parser.add_argument("--empty", action="store_true", help="start from an empty instead of a random field")
+    parser.add_argument("--engine", default="numpy",
+                        help="conway: numpy, packed, loop, active, hashlife or tiled; rps: numpy, loop or tiled")
+    parser.add_argument("--step-exponent", type=int, default=0,
+                        help="hashlife engine: generations per transition are 2^step-exponent")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="tiled engine: processes stepping bands of the field, default one per CPU")
+    parser.add_argument("--rule", default="B3/S23",
+                        help="conway with numpy, loop or tiled engine: life-like rule, e.g. B36/S23 or B2/S/C3")
+    parser.add_argument("--percent-random", type=float, default=.4, help="conway: share of live cells")
+    parser.add_argument("--colors", type=int, choices=(3, 5), default=3, help="rps: ternary or quinary")
+    parser.add_argument("--weights", type=float, nargs="+",
+                        help="rps: relative frequency of rock, paper, scissors (, lizard, spock) in the random field")
+    parser.add_argument("--rules", default="RL", help="langton/turmite: rule string of R's and L's")
+    parser.add_argument("--ant", type=int, nargs=2, metavar=("X", "Y"), help="langton/turmite: ant start")
+    parser.add_argument("--direction", choices=("N", "E", "S", "W"), default="N", help="langton/turmite")
+    parser.add_argument("--ants", type=int, default=0,
+                        help="turmite: number of extra ants at random cells, stepped together with --ant")
+    parser.add_argument("--pattern", help="conway: .rle / .cells file or name in the patterns folder to place")
+    parser.add_argument("--at", type=int, nargs=2, metavar=("X", "Y"),
+                        help="conway: corner of --pattern, centered by default")
+    parser.add_argument("--sparse", action="store_true",
+                        help="langton/turmite: store field in chunks allocated as the ant visits them")
+    parser.add_argument("--no-wrap", action="store_true",
+                        help="langton/turmite with --sparse: unbounded plane instead of stitched edges")
+    parser.add_argument("--no-cycle-check", action="store_true",
+                        help="conway/rps: keep running after the field became static or periodic")
+    parser.add_argument("--cycle-history", type=int, default=4096,
+                        help="conway/rps: generations remembered when looking for repeated fields")
+    parser.add_argument("--checkpoint", help="snapshot file written at the end (and every --checkpoint-every)")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="generations between snapshots, 0 for none")
+    parser.add_argument("--checkpoint-encoding", choices=snapshot.ENCODINGS, default="int8",
+                        help="int8 opens instantly, bits is 8x smaller for conway, zlib compresses")
+    parser.add_argument("--resume", help="snapshot file to continue from instead of a new field")
+    parser.add_argument("--output", help="file for final field (.npy)")
+    parser.add_argument("--stats", help="file for periodic statistics (.csv)")
+    parser.add_argument("--stats-every", type=int, default=100, help="generations between statistics rows")
+    parser.add_argument("--record", help="animation of the run: .gif, .png (APNG) or, with ffmpeg on PATH, e.g. .mp4")
+    parser.add_argument("--record-every", type=int, default=1, help="generations between recorded frames")
+    parser.add_argument("--record-fps", type=int, default=30, help="frames per second of the recording")
+    parser.add_argument("--record-scale", type=int, default=1, help="pixels per cell in the recording")
+    args = parser.parse_args(argv)
+    if args.resume:
+        # Everything but the number of generations comes from the snapshot
+        header = snapshot.read_header(args.resume)[0]
+        if SNAPSHOT_MODES[header["class"]] != args.mode:
+            parser.error(args.resume + " holds a " + SNAPSHOT_MODES[header["class"]] + " field, not " + args.mode)
+        args.engine = "packed" if header["class"] == "PackedConway" else header.get("engine", args.engine)
+    if args.checkpoint_encoding == "bits" and args.mode != "conway":
+        parser.error("--checkpoint-encoding bits only stores conway fields")
+    if args.weights and len(args.weights) != args.colors:
+        parser.error("--weights needs " + str(args.colors) + " values, one per color")
+    if args.record_every < 1 or args.record_scale < 1:
+        parser.error("--record-every and --record-scale must be at least 1")
+    if args.record:
+        try:
+            recorder.writer_class(args.record)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.pattern and args.mode != "conway":
+        parser.error("--pattern only places conway patterns")
+    if args.rule != grid.Conway.RULE and args.engine in ("packed", "hashlife"):
+        parser.error("--rule needs the numpy or loop engine, " + args.engine + " only runs B3/S23")
+    if args.engine == "tiled" and args.mode not in ("conway", "rps"):
+        parser.error("--engine tiled only steps conway and rps fields")
+    if args.engine == "tiled" and args.checkpoint:
+        parser.error("--checkpoint does not store tiled fields, use another engine")
+    return args
+
+
+def build(args):
+    """
+    Creates automaton from command line arguments, one cell per pixel (scale 1, no border)
+    """
+    if args.resume:
+        automaton, args.first_generation = snapshot.load(args.resume)
+        return automaton
+    args.first_generation = 0
+
+    if args.engine == "tiled":
+        # One byte per cell in shared memory only, no float64 field is ever allocated
+        numColors = args.colors if args.mode == "rps" else None
+        automaton = tiled.TiledAutomaton(args.rows, args.columns, args.workers, args.rule, numColors,
+                                         args.percent_random, args.weights, args.seed)
+    elif args.mode == "conway":
+        if args.engine == "packed":
+            automaton = bitlife.PackedConway(args.rows, args.columns, 1, 0, args.percent_random, seed=args.seed)
+        elif args.engine == "hashlife":
+            automaton = hashlife.HashLifeConway(args.rows, args.columns, 1, 0, args.percent_random,
+                                                step_exponent=args.step_exponent, seed=args.seed)
+        elif args.rule != grid.Conway.RULE:
+            automaton = grid.LifeLike(args.rows, args.columns, 1, 0, args.percent_random, args.rule,
+                                      engine=args.engine, seed=args.seed)
+        else:
+            automaton = grid.Conway(args.rows, args.columns, 1, 0, args.percent_random, engine=args.engine,
+                                    seed=args.seed)
+    elif args.mode == "rps":
+        automaton = grid.RPS(args.rows, args.columns, 1, 0, args.colors, engine=args.engine, weights=args.weights,
+                             seed=args.seed)
+    else:
+        # Colors are only used by recordings, one per rule
+        colors = [recorder.ANT_COLORS[i % len(recorder.ANT_COLORS)] for i in range(len(args.rules))]
+        if args.sparse:
+            automaton = sparse.SparseLangton(args.rows, args.columns, 1, 0, colors, args.rules,
+                                             wrap=not args.no_wrap)
+        elif args.mode == "langton":
+            automaton = grid.Langton(args.rows, args.columns, 1, 0, colors, args.rules)
+        else:
+            automaton = grid.Turmite(args.rows, args.columns, 1, 0, colors, args.rules, seed=args.seed)
+
+    if args.mode in ("conway", "rps"):
+        automaton.reset()
+        if not args.empty:
+            automaton.random_field()
+        if args.pattern:
+            x, y = args.at or (None, None)
+            patterns.stamp(automaton, patterns.LIBRARY.get(args.pattern), x, y)
+    else:
+        automaton.reset()
+        automaton.ant = tuple(args.ant) if args.ant else (automaton.rows // 2, automaton.columns // 2)
+        automaton.direction = args.direction
+        if args.mode == "turmite" and args.ants:
+            # The --ant ant leads the colony, so it acts first on shared cells
+            automaton.add_ant(automaton.ant[0], automaton.ant[1], automaton.direction)
+            automaton.random_ants(args.ants)
+    return automaton
+
+
+def statistics(automaton, mode):
+    """
+    Returns {column: value} describing current field
+    """
+    if mode == "conway" and getattr(automaton, "tracker", None) is not None:
+        # Cells the active engine evaluated, against rows * columns for the other engines
+        return {"population": int(np.count_nonzero(automaton.curr_array == 1)),
+                "active_cells": automaton.active_cells, "active_tiles": automaton.active_tiles}
+    elif mode == "conway":
+        return {"population": int(np.count_nonzero(automaton.curr_array == 1))}
+    elif mode == "rps":
+        field = automaton.curr_array
+        names = ("rock", "white", "paper", "scissors", "lizard", "spock")
+        return {name: int(np.count_nonzero(field == state)) for name, state in zip(names, (-1, 0, 1, 2, 3, 4))}
+    elif len(getattr(automaton, "colony", ())):
+        return {"ant_x": int(automaton.colony.x[0]), "ant_y": int(automaton.colony.y[0]),
+                "ants": len(automaton.colony), "colored": int(np.count_nonzero(automaton.curr_array != -1))}
+    elif isinstance(automaton, sparse.SparseLangton):
+        return {"ant_x": automaton.ant[0], "ant_y": automaton.ant[1], "direction": automaton.direction,
+                "colored": automaton.field.population(), "bytes": automaton.field.memory()}
+    else:
+        return {"ant_x": automaton.ant[0], "ant_y": automaton.ant[1], "direction": automaton.direction,
+                "colored": int(np.count_nonzero(automaton.curr_array != -1))}
+
+
+def batched(automaton, detector=None):
+    """
+    True if automaton steps any number of generations with one fast_forward, as no detector needs every generation
+    Transitions of a batched automaton are single generations, however far HashLife jumps in a window
+    """
+    return detector is None and isinstance(automaton, BATCH_ENGINES)
+
+
+def step(automaton, mode, generations, detector=None, generation=0):
+    """
+    Advances automaton by generations (ants use the compute only fast path)
+    With a cycle detector Conway / RPS stop early once a field repeats
+    Returns number of transitions run
+    """
+    if mode in ("conway", "rps") and batched(automaton, detector):
+        # Whole chunk at once: HashLife in one jump exporting its window once, tiled workers without reporting back
+        automaton.fast_forward(generations)
+    elif mode in ("conway", "rps") and isinstance(automaton, tiled.TiledAutomaton):
+        # Workers hash their bands, the parent only meets them every TILED_PIECE generations
+        done = 0
+        while done < generations:
+            piece = min(TILED_PIECE, generations - done)
+            keys = automaton.fast_forward(piece, hashing=True)
+            done += piece
+            for i, key in enumerate(keys):
+                if detector.update(None, generation + done - piece + i + 1, key):
+                    return done  # the field is at the end of the piece, in the cycle found
+    elif mode in ("conway", "rps"):
+        per_step = 1 << getattr(automaton, "step_exponent", 0)
+        for i in range(generations):
+            automaton.transition()
+            if detector is not None and detector.update(automaton.curr_array, generation + (i + 1) * per_step):
+                return i + 1
+    elif len(getattr(automaton, "colony", ())):
+        automaton.step_ants(generations)
+    else:
+        automaton.fast_forward(generations)
+    return generations
+
+
+def run(automaton, args, stats_writer=None, detector=None, recording=None):
+    """
+    Steps automaton args.generations times, writing statistics every args.stats_every generations
+    Stops early once detector (a cycle.CycleDetector) finds a repeated field
+    Captures a frame for recording (a recorder.Recorder) every args.record_every generations and at the end
+    Generations are counted on from args.first_generation (the generation of a resumed snapshot)
+    Returns number of generations run
+    """
+    first = generation = args.first_generation
+    last = first + args.generations
+    checkpoint_every = args.checkpoint_every if args.checkpoint else 0
+    record_every = args.record_every if recording is not None else 0
+    if detector is not None:
+        key = automaton.fingerprint() if isinstance(automaton, tiled.TiledAutomaton) else None
+        detector.update(automaton.curr_array, generation, key)
+    # HashLife jumps 2^step_exponent generations per transition, unless it runs whole chunks
+    per_step = 1 if batched(automaton, detector) else 1 << getattr(automaton, "step_exponent", 0)
+    start = time.perf_counter()
+    while generation < last:
+        if stats_writer is not None and generation % args.stats_every == 0:
+            stats_writer.writerow(dict(generation=generation, seconds=round(time.perf_counter() - start, 6),
+                                       **statistics(automaton, args.mode)))
+        if checkpoint_every and generation % checkpoint_every == 0 and generation > first:
+            snapshot.save(automaton, args.checkpoint, args.checkpoint_encoding, generation)
+        if record_every and generation % record_every == 0:
+            recording.capture()
+        # Run up to the next statistics row, checkpoint or frame in one go
+        chunk = last - generation
+        if stats_writer is not None:
+            chunk = min(chunk, args.stats_every - generation % args.stats_every)
+        if checkpoint_every:
+            chunk = min(chunk, checkpoint_every - generation % checkpoint_every)
+        if record_every:
+            chunk = min(chunk, record_every - generation % record_every)
+        transitions = max(1, chunk // per_step)
+        transitions = step(automaton, args.mode, transitions, detector, generation)
+        generation += transitions * per_step
+        if detector is not None and detector.period is not None:
+            break
+    if stats_writer is not None:
+        stats_writer.writerow(dict(generation=generation, seconds=round(time.perf_counter() - start, 6),
+                                   **statistics(automaton, args.mode)))
+    if args.checkpoint:
+        snapshot.save(automaton, args.checkpoint, args.checkpoint_encoding, generation)
+    if recording is not None:
+        recording.capture()
+    return generation - first
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    automaton = build(args)
+
+    stats_file, stats_writer = None, None
+    if args.stats:
+        stats_file = open(args.stats, "w", newline="")
+        columns = ["generation", "seconds"] + list(statistics(automaton, args.mode))
+        stats_writer = csv.DictWriter(stats_file, fieldnames=columns)
+        stats_writer.writeheader()
+
+    # Hashing the field every generation finds static or periodic fields, ants never repeat in practice
+    # and a HashLife window repeating says nothing about the unbounded plane around it
+    detector = None
+    if args.mode in ("conway", "rps") and args.engine != "hashlife" and not args.no_cycle_check:
+        detector = cycle.CycleDetector(args.cycle_history)
+
+    # Frames are encoded by a separate process while the run goes on
+    recording = None
+    if args.record:
+        recording = recorder.Recorder(automaton, args.record, fps=args.record_fps, scale=args.record_scale)
+
+    start = time.perf_counter()
+    try:
+        generations = run(automaton, args, stats_writer, detector, recording)
+        seconds = time.perf_counter() - start
+        if args.output:
+            np.save(args.output, automaton.curr_array)
+    finally:
+        if stats_file is not None:
+            stats_file.close()
+        if recording is not None:
+            recording.close()
+        if isinstance(automaton, tiled.TiledAutomaton):
+            automaton.close()  # stops the workers and frees the shared field
+    print("%s: %d generations of %dx%d in %.3f s (%.1f generations/s)" % (
+        args.mode, generations, automaton.rows, automaton.columns, seconds, generations / max(seconds, 1e-9)))
+    if detector is not None and detector.period is not None:
+        print("stopped early, field is " + detector.describe())
+    if recording is not None:
+        print("recorded %d frames to %s" % (recording.frames, args.record))
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,187 @@
+import numpy as np
+
+
+def count_neighbors(alive):
+    """
+    Counts live cells in the 8 cells around every cell at once
+    Since field is finite, edges are stitched to yield toroidal array (same as get_neighbors)
+    Works on the last two axes so a stack of fields can be counted in one call
+    Returns uint8 array of neighbor counts
+    """
+    alive = alive.view(np.uint8) if alive.dtype == np.bool_ else alive.astype(np.uint8)
+    # Sum each cell with the cells above and below it, then add the
+    # left and right columns of that sum and remove the cell itself
+    vertical = alive + np.roll(alive, 1, axis=-2) + np.roll(alive, -1, axis=-2)
+    total = vertical + np.roll(vertical, 1, axis=-1) + np.roll(vertical, -1, axis=-1)
+    total -= alive
+    return total
+
+
+def life_step(field):
+    """
+    Applies B3/S23 rules to whole field
+    Returns boolean array of next generation's live cells
+    """
+    alive = field == 1
+    neighbors = count_neighbors(alive)
+    # Any dead cell with three live neighbors becomes a live cell.
+    # Any live cell with two or three live neighbors survives.
+    return (neighbors == 3) | (alive & (neighbors == 2))
+
+
+def parse_rule(rule):
+    """
+    Parses outer totalistic rule string "B3/S23" (births / survivals by number of live neighbors)
+    An optional third part "/C3" makes it a Generations rule: cells that do not survive decay
+    through states 2 .. C - 1 before dying, decaying cells neither count as neighbors nor are born
+    Returns (birth counts, survival counts, number of states)
+    """
+    parts = rule.upper().replace(" ", "").split("/")
+    if len(parts) not in (2, 3) or not parts[0].startswith("B") or not parts[1].startswith("S"):
+        raise ValueError("Rule " + repr(rule) + " is not of the form B3/S23 or B3/S23/C3")
+    try:
+        birth = sorted(set(int(n) for n in parts[0][1:]))
+        survive = sorted(set(int(n) for n in parts[1][1:]))
+        states = int(parts[2][1:]) if len(parts) == 3 and parts[2].startswith("C") else 2
+    except ValueError:
+        raise ValueError("Rule " + repr(rule) + " has non digit neighbor counts or states") from None
+    if len(parts) == 3 and not parts[2].startswith("C"):
+        raise ValueError("Rule " + repr(rule) + " must give its number of states as C<n>")
+    if any(n > 8 for n in birth + survive) or states < 2:
+        raise ValueError("Rule " + repr(rule) + " needs neighbor counts 0-8 and at least 2 states")
+    return tuple(birth), tuple(survive), states
+
+
+def rule_table(rule):
+    """
+    Precompiles rule string into lookup table of next state indexed by [state][live neighbors]
+    State 0 is dead, 1 is live and 2 .. C - 1 are decaying (Generations rules only)
+    """
+    birth, survive, states = parse_rule(rule)
+    table = np.zeros((states, 9), dtype=np.uint8)
+    table[0, list(birth)] = 1
+    # Live cells that do not survive start decaying, or die at once in two state rules
+    table[1] = 2 % states
+    table[1, list(survive)] = 1
+    for state in range(2, states):
+        table[state] = (state + 1) % states
+    return table
+
+
+def rule_states(field, states):
+    """
+    Returns uint8 array of cell states, values that are not a state of the rule count as dead cells
+    """
+    if states == 2:
+        return (field == 1).view(np.uint8)
+    state = field.astype(np.uint8)
+    invalid = (state != field) | (state >= states)
+    if invalid.any():
+        state[invalid] = 0
+    return state
+
+
+def apply_rule(state, neighbors, table):
+    """
+    Looks up next state of every cell from its state and number of live neighbors
+    Returns uint8 array of next generation's states
+    """
+    states = table.shape[0]
+    # Row major index into the flattened table, one byte while it fits
+    dtype = np.uint8 if table.size <= 256 else np.uint16
+    index = state.astype(dtype) * dtype(9)
+    index += neighbors
+    if states == 2:
+        # All 18 entries fit in one word, shifting it is cheaper than gathering from the table
+        code = np.uint32(sum(int(bit) << i for i, bit in enumerate(table.ravel())))
+        return (np.right_shift(code, index, dtype=np.uint32) & np.uint32(1)).astype(np.uint8)
+    return table.ravel()[index]
+
+
+def totalistic_step(field, table):
+    """
+    Applies outer totalistic rule table (see rule_table) to whole field
+    Values that are not a state of the rule count as dead cells
+    Returns uint8 array of next generation's states
+    """
+    state = rule_states(field, table.shape[0])
+    return apply_rule(state, count_neighbors(state == 1), table)
+
+
+# Rock = -1, White = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4
+RPS_STATES = (-1, 0, 1, 2, 3, 4)
+
+# Dominance matrix of each rule set: DOMINANCE[n][i][j] is 1 if state RPS_STATES[j] beats RPS_STATES[i]
+DOMINANCE = {
+    3: np.array([[0, 0, 1, 0, 0, 0],  # Rock < Paper
+                 [0, 0, 0, 0, 0, 0],  # White is never converted
+                 [0, 0, 0, 1, 0, 0],  # Paper < Scissors
+                 [1, 0, 0, 0, 0, 0],  # Scissors < Rock
+                 [0, 0, 0, 0, 0, 0],
+                 [0, 0, 0, 0, 0, 0]], dtype=bool),
+    5: np.array([[0, 0, 1, 0, 0, 1],  # Rock < Paper, Spock
+                 [0, 0, 0, 0, 0, 0],  # White is never converted
+                 [0, 0, 0, 1, 1, 0],  # Paper < Scissors, Lizard
+                 [1, 0, 0, 0, 0, 1],  # Scissors < Rock, Spock
+                 [1, 0, 0, 1, 0, 0],  # Lizard < Rock, Scissors
+                 [0, 0, 1, 0, 1, 0]], dtype=bool),  # Spock < Paper, Lizard
+}
+
+# Equally frequent dominating colors are resolved in the order most_freq visits them
+# (iteration order of a set of -1, 1, 2, 3, 4)
+TIE_ORDER = (1, 2, 3, 4, -1)
+
+
+def dominators(numColors):
+    """
+    Returns [(state, (dominating states in tie order)), ...] for states that can be converted
+    """
+    table = []
+    for i, state in enumerate(RPS_STATES):
+        beaten_by = [s for j, s in enumerate(RPS_STATES) if DOMINANCE[numColors][i][j]]
+        if beaten_by:
+            table.append((state, tuple(sorted(beaten_by, key=TIE_ORDER.index))))
+    return table
+
+
+DOMINATORS = {numColors: dominators(numColors) for numColors in DOMINANCE}
+
+
+def rps_step(field, numColors):
+    """
+    Applies ternary/quinary rules to whole field
+    Cells touched by more than 2 dominating cells become the most frequent dominating color
+    Returns next generation's field
+    """
+    # Work on int8 colors, values that are not exactly a color never count and never change
+    colors = field.astype(np.int8)
+    exact = colors == field
+    if not exact.all():
+        colors[~exact] = np.iinfo(np.int8).max
+
+    # Number of neighbors of every color, one plane per color
+    counts = {state: count_neighbors(colors == state)
+              for state in RPS_STATES if DOMINANCE[numColors][:, RPS_STATES.index(state)].any()}
+
+    new_colors = colors.copy()
+    for state, beaten_by in DOMINATORS[numColors]:
+        # Running argmax over dominating colors, a later color only wins with strictly more
+        # neighbors so equally frequent colors resolve in tie order
+        best = counts[beaten_by[0]]
+        total = best.copy()
+        winner = np.full(field.shape, beaten_by[0], dtype=np.int8)
+        for color in beaten_by[1:]:
+            better = (counts[color] > best).view(np.int8)
+            winner += better * np.int8(color - beaten_by[0])
+            best = np.maximum(best, counts[color])
+            total += counts[color]
+        # Branch free select: converted cells move from state to winner
+        convert = ((colors == state) & (total > 2)).view(np.int8)
+        winner -= np.int8(state)
+        winner *= convert
+        new_colors += winner
+
+    new_field = new_colors.astype(field.dtype)
+    if not exact.all():
+        np.copyto(new_field, field, where=~exact)
+    return new_field
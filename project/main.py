@@ -1,4 +1,5 @@
-import sys, pygame, os, grid
+import sys, pygame, os, grid, bitlife, hashlife, render, snapshot, patterns, scheduler, ant, background, recorder
+import viewport, profiling
 import numpy as np
 
 
@@ -13,53 +14,131 @@ def conway_game(colorList, random):
     screen = pygame.display.set_mode((1280, 720), pygame.RESIZABLE)
     # screen = pygame.display.set_mode(size_monitor, pygame.RESIZABLE)
     screen.fill(black)
-    conway.update(colorList[0], colorList[1], surface=screen)
+    if rendering != "viewport":  # the viewport draws only what is on screen, fields may be far larger
+        conway.update(colorList[0], colorList[1], surface=screen)
     conway.transition()
     if random == "y" or random == "Y":
         conway.random_field()
+    if conway_pattern:
+        patterns.stamp(conway, patterns.LIBRARY.get(conway_pattern))
 
     #############
     # Game Loop #
     #############
     generation = 0
+    step = 2 ** hashlife_step_exponent if conway_engine == "hashlife" else 1  # generations per transition
+    pacing = scheduler.FrameScheduler(generations_per_frame, frame_budget_ms)
+    palette = render.lifelike_palette(colorList[0], colorList[1], conway.states)
+    camera = None
+    if rendering == "viewport":
+        camera = viewport.Camera(conway.size, screen.get_size())
+        camera.show_all()
+        renderer = viewport.ViewportRenderer(conway, palette, camera, background=black)
+    elif rendering == "blit":
+        renderer = render.BlitRenderer(conway, palette, background=black)
+    else:
+        renderer = render.DirtyRenderer(conway, palette)
+    # With background_simulation a worker thread steps the field and every change goes through it
+    sim = background.BackgroundSimulation(conway, generations=step, pacing=pacing).start() \
+        if background_simulation else None
+    recording = recorder.Recorder(conway, record_file, palette) if record_file else None
+    recorded = -record_every  # generation of the last recorded frame
+    profiler, hud = create_profiler(), profiling.Hud() if profile_hud else None
     while True:
+        if sim is not None:
+            field, generation = sim.latest()
         pygame.display.set_caption("Conway's Game Of Life - Generation " + str(generation))
         clock.tick(fps)
+        profiler.lap("wait")
         keys = pygame.key.get_pressed()
 
-        # Continually iterates through generations while space is held
-        if keys[pygame.K_SPACE]:
-            conway.transition()
-            generation += 1
+        # Continually iterates through generations while space is held, see generations_per_frame
+        if sim is not None:
+            sim.run(keys[pygame.K_SPACE])
+        elif keys[pygame.K_SPACE]:
+            generation += step * pacing.run(conway.transition)
+        profiler.lap("step")
 
         # Resets field and generation to 0 using command Ctrl + R
         if (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]) and keys[pygame.K_r]:
-            conway.reset()
-            generation = 0
-            pygame.display.set_caption("Conway's Game Of Life - Generation " + str(generation))
+            if sim is not None:
+                sim.edit(conway.reset, generation=0)
+            else:
+                conway.reset()
+                generation = 0
+                pygame.display.set_caption("Conway's Game Of Life - Generation " + str(generation))
 
         # Similar as reset above, but randomizes field using command Ctrl + T
         if (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]) and keys[pygame.K_t]:
-            conway.reset()
-            conway.random_field()
-            generation = 0
-            pygame.display.set_caption("Conway's Game Of Life - Generation " + str(generation))
+            if sim is not None:
+                sim.edit(conway.reset)
+                sim.edit(conway.random_field, generation=0)
+            else:
+                conway.reset()
+                conway.random_field()
+                generation = 0
+                pygame.display.set_caption("Conway's Game Of Life - Generation " + str(generation))
 
         for event in pygame.event.get():
             if event.type == pygame.MOUSEBUTTONDOWN:
                 button = event.button
                 if button == 1:  # change cell state with left click
-                    pos = pygame.mouse.get_pos()
-                    conway.click(pos)
+                    pos = click_position(conway, camera, pygame.mouse.get_pos())
+                    if pos is not None and sim is not None:
+                        sim.edit(conway.click, pos)
+                    elif pos is not None:  # None outside a field smaller than the window
+                        conway.click(pos)
                 elif button == 3:  # iterate through next generation once with right click
-                    conway.transition()
-                    generation += 1
+                    if sim is not None:
+                        sim.advance()
+                    else:
+                        conway.transition()
+                        generation += step
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+                # Saves field to snapshot_file using command Ctrl + S
+                if sim is not None:
+                    sim.edit(lambda: save_snapshot(conway, sim.generation))
+                else:
+                    save_snapshot(conway, generation)
+            if camera is not None:
+                move_camera(camera, event, screen)
+            if event.type == pygame.VIDEORESIZE or event.type == pygame.VIDEOEXPOSE:
+                # Window contents may be lost, redraw every cell
+                screen.fill(black)
+                renderer.invalidate()
             if event.type == pygame.QUIT:
+                if sim is not None:
+                    sim.close()
+                if recording is not None:
+                    recording.close()
+                profiler.close()
                 pygame.quit()
                 sys.exit()
-
-        conway.update(colorList[0], colorList[1], surface=screen)
-        pygame.display.update()
+        profiler.lap("events")
+
+        if sim is not None:  # last finished generation, "full" rendering is drawn as "dirty"
+            recorded = record_frame(recording, generation, recorded, field)
+            profiler.lap("record")
+            rects, whole = renderer.draw(screen, field), False
+        elif rendering == "full":
+            recorded = record_frame(recording, generation, recorded)
+            profiler.lap("record")
+            conway.update(colorList[0], colorList[1], surface=screen)
+            rects, whole = [], True  # whole window
+        else:
+            recorded = record_frame(recording, generation, recorded)
+            profiler.lap("record")
+            rects, whole = renderer.draw(screen), False
+        if hud is not None:
+            field = field if sim is not None else conway.curr_array
+            rects = draw_hud(hud, screen, profiler, rects, whole, np.count_nonzero(field == 1))
+        profiler.lap("draw")
+        if whole:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        profiler.lap("display")
+        profiler.frame(generation)
 
 
 def rps_game(colorList, random):
@@ -73,7 +152,8 @@ def rps_game(colorList, random):
     screen = pygame.display.set_mode((1280, 720), pygame.RESIZABLE)
     # screen = pygame.display.set_mode(size_monitor, pygame.RESIZABLE)
     screen.fill(black)
-    rps.update(colorList[0], colorList[1], colorList[2], colorList[3], colorList[4], surface=screen)
+    if rendering != "viewport":  # the viewport draws only what is on screen, fields may be far larger
+        rps.update(colorList[0], colorList[1], colorList[2], colorList[3], colorList[4], surface=screen)
     rps.transition()
     if random == "y" or random == "Y":
         rps.random_field()
@@ -82,31 +162,59 @@ def rps_game(colorList, random):
     # Game Loop #
     #############
     generation = 0
+    pacing = scheduler.FrameScheduler(generations_per_frame, frame_budget_ms)
+    palette = render.rps_palette(*colorList)
+    camera = None
+    if rendering == "viewport":
+        camera = viewport.Camera(rps.size, screen.get_size())
+        camera.show_all()
+        renderer = viewport.ViewportRenderer(rps, palette, camera, background=black)
+    elif rendering == "blit":
+        renderer = render.BlitRenderer(rps, palette, background=black)
+    else:
+        renderer = render.DirtyRenderer(rps, palette)
+    # With background_simulation a worker thread steps the field and every change goes through it
+    sim = background.BackgroundSimulation(rps, pacing=pacing).start() if background_simulation else None
+    recording = recorder.Recorder(rps, record_file, palette) if record_file else None
+    recorded = -record_every  # generation of the last recorded frame
+    profiler, hud = create_profiler(), profiling.Hud() if profile_hud else None
     while True:
+        if sim is not None:
+            field, generation = sim.latest()
         pygame.display.set_caption(
             "Rock, Paper, Scissors, Lizard, Spock Cellular Automata - Generation " + str(generation))
         clock.tick(fps)
+        profiler.lap("wait")
         keys = pygame.key.get_pressed()
 
-        # Continually iterates through generations while space is held
-        if keys[pygame.K_SPACE]:
-            rps.transition()
-            generation += 1
+        # Continually iterates through generations while space is held, see generations_per_frame
+        if sim is not None:
+            sim.run(keys[pygame.K_SPACE])
+        elif keys[pygame.K_SPACE]:
+            generation += pacing.run(rps.transition)
+        profiler.lap("step")
 
         # Resets field and generation to 0 using command Ctrl + R
         if (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]) and keys[pygame.K_r]:
-            rps.reset()
-            generation = 0
-            pygame.display.set_caption(
-                "Rock, Paper, Scissors, Lizard, Spock Cellular Automata - Generation " + str(generation))
+            if sim is not None:
+                sim.edit(rps.reset, generation=0)
+            else:
+                rps.reset()
+                generation = 0
+                pygame.display.set_caption(
+                    "Rock, Paper, Scissors, Lizard, Spock Cellular Automata - Generation " + str(generation))
 
         # Similar as reset above, but randomizes field using command Ctrl + T
         if (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]) and keys[pygame.K_t]:
-            rps.reset()
-            rps.random_field()
-            generation = 0
-            pygame.display.set_caption(
-                "Rock, Paper, Scissors, Lizard, Spock Cellular Automata - Generation " + str(generation))
+            if sim is not None:
+                sim.edit(rps.reset)
+                sim.edit(rps.random_field, generation=0)
+            else:
+                rps.reset()
+                rps.random_field()
+                generation = 0
+                pygame.display.set_caption(
+                    "Rock, Paper, Scissors, Lizard, Spock Cellular Automata - Generation " + str(generation))
 
         for event in pygame.event.get():
             # Rock = -1, White (background) = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4
@@ -124,17 +232,62 @@ def rps_game(colorList, random):
                     choice = 4
 
                 if button == 1:  # change cell state with left click
-                    pos = pygame.mouse.get_pos()
-                    rps.click(pos, choice)
+                    pos = click_position(rps, camera, pygame.mouse.get_pos())
+                    if pos is not None and sim is not None:
+                        sim.edit(rps.click, pos, choice)
+                    elif pos is not None:  # None outside a field smaller than the window
+                        rps.click(pos, choice)
                 elif button == 3:  # iterate through next generation once right click
-                    rps.transition()
-                    generation += 1
+                    if sim is not None:
+                        sim.advance()
+                    else:
+                        rps.transition()
+                        generation += 1
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+                # Saves field to snapshot_file using command Ctrl + S
+                if sim is not None:
+                    sim.edit(lambda: save_snapshot(rps, sim.generation))
+                else:
+                    save_snapshot(rps, generation)
+            if camera is not None:
+                move_camera(camera, event, screen)
+            if event.type == pygame.VIDEORESIZE or event.type == pygame.VIDEOEXPOSE:
+                # Window contents may be lost, redraw every cell
+                screen.fill(black)
+                renderer.invalidate()
             if event.type == pygame.QUIT:
+                if sim is not None:
+                    sim.close()
+                if recording is not None:
+                    recording.close()
+                profiler.close()
                 pygame.quit()
                 sys.exit()
-
-        rps.update(colorList[0], colorList[1], colorList[2], colorList[3], colorList[4], surface=screen)
-        pygame.display.update()
+        profiler.lap("events")
+
+        if sim is not None:  # last finished generation, "full" rendering is drawn as "dirty"
+            recorded = record_frame(recording, generation, recorded, field)
+            profiler.lap("record")
+            rects, whole = renderer.draw(screen, field), False
+        elif rendering == "full":
+            recorded = record_frame(recording, generation, recorded)
+            profiler.lap("record")
+            rps.update(colorList[0], colorList[1], colorList[2], colorList[3], colorList[4], surface=screen)
+            rects, whole = [], True  # whole window
+        else:
+            recorded = record_frame(recording, generation, recorded)
+            profiler.lap("record")
+            rects, whole = renderer.draw(screen), False
+        if hud is not None:
+            field = field if sim is not None else rps.curr_array
+            rects = draw_hud(hud, screen, profiler, rects, whole, np.count_nonzero(field), "colored cells")
+        profiler.lap("draw")
+        if whole:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        profiler.lap("display")
+        profiler.frame(generation)
 
 
 def langtons_ant():
@@ -150,21 +303,36 @@ def langtons_ant():
     screen.fill(black)
     langton.reset(screen)
     langton.transition(screen)
+    if rendering == "blit":
+        renderer = render.BlitRenderer(langton, render.ant_palette(langton.colors), background=black)
 
     #############
     # Game Loop #
     #############
     generation = 0
+    pacing = scheduler.FrameScheduler(generations_per_frame, frame_budget_ms)
+    recording = recorder.Recorder(langton, record_file) if record_file else None
+    recorded = -record_every  # generation of the last recorded frame
+    profiler, hud = create_profiler(), profiling.Hud() if profile_hud else None
     while True:
         pygame.display.set_caption(
             "Langston's Ant - Generation " + str(generation))
+        if frame_budget_ms is not None:  # stepping fills the frame, the clock only waits out the rest
+            clock.tick(fps)
         # clock.tick(fps)  # Comment out for fastest performance
+        profiler.lap("wait")
         keys = pygame.key.get_pressed()
 
-        # Continually iterates through generations while space is held
+        # Continually iterates through generations while space is held, see generations_per_frame
         if keys[pygame.K_SPACE]:
-            langton.transition(screen)
-            generation += 1
+            # Cells are drawn once per frame, however many batches of steps ran
+            before = langton.curr_array
+            previous = (langton.ant[0] % langton.rows, langton.ant[1] % langton.columns)
+            batches = pacing.run(lambda: langton.fast_forward(langton_steps_per_frame))
+            profiler.lap("step")
+            ant.draw_changes(langton, before, previous, screen)
+            profiler.lap("draw")
+            generation += batches * langton_steps_per_frame
 
         # Resets field and generation to 0 using command Ctrl + R
         if (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]) and keys[pygame.K_r]:
@@ -194,11 +362,107 @@ def langtons_ant():
                 elif button == 3:  # iterate through next generation once right click
                     langton.transition(screen)
                     generation += 1
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_s and event.mod & pygame.KMOD_CTRL:
+                # Saves field to snapshot_file using command Ctrl + S
+                save_snapshot(langton, generation)
             if event.type == pygame.QUIT:
+                if recording is not None:
+                    recording.close()
+                profiler.close()
                 pygame.quit()
                 sys.exit()
+        profiler.lap("events")
+
+        recorded = record_frame(recording, generation, recorded)
+        profiler.lap("record")
+        whole = rendering != "blit"  # cells were drawn straight to the window while stepping
+        rects = [] if whole else renderer.draw(screen)
+        if hud is not None:
+            cells = np.count_nonzero(langton.curr_array != -1)
+            rects = draw_hud(hud, screen, profiler, rects, whole, cells, "colored cells")
+        profiler.lap("draw")
+        if whole:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        profiler.lap("display")
+        profiler.frame(generation)
+
+
+def save_snapshot(automaton, generation):
+    """
+    Saves automaton to snapshot_file, fields that cannot be saved are reported instead
+    """
+    try:
+        snapshot.save(automaton, snapshot_file, generation=generation)
+    except ValueError as error:  # e.g. HashLife's unbounded plane
+        print(error)
+
+
+def record_frame(recording, generation, recorded, field=None):
+    """
+    Captures field for recording once generation moved record_every on (or back, after a reset)
+    Returns generation of the last recorded frame
+    """
+    if recording is not None and (generation < recorded or generation - recorded >= record_every):
+        recording.capture(field)
+        return generation
+    return recorded
 
-        pygame.display.update()
+
+def click_position(automaton, camera, pos):
+    """
+    Returns window position to pass to automaton.click for mouse position pos, None if no cell is under it
+    With the viewport the cell under the mouse is found through camera, otherwise pos is returned as is
+    """
+    if camera is None:
+        return pos
+    cell = camera.cell_at(pos)
+    if cell is None:
+        return None
+    return cell[0] * automaton.scale, cell[1] * automaton.scale
+
+
+def move_camera(camera, event, screen):
+    """
+    Zooms viewport with the mouse wheel, pans it by dragging with the middle button or with the arrow keys
+    Home shows the whole field
+    """
+    if event.type == pygame.MOUSEWHEEL:
+        camera.zoom_at(pygame.mouse.get_pos(), event.y)
+    elif event.type == pygame.MOUSEMOTION and event.buttons[1]:
+        camera.pan(*event.rel)
+    elif event.type == pygame.KEYDOWN:
+        step = (screen.get_width() // 4, screen.get_height() // 4)  # a quarter of the window per press
+        if event.key == pygame.K_LEFT:
+            camera.pan(step[0], 0)
+        elif event.key == pygame.K_RIGHT:
+            camera.pan(-step[0], 0)
+        elif event.key == pygame.K_UP:
+            camera.pan(0, step[1])
+        elif event.key == pygame.K_DOWN:
+            camera.pan(0, -step[1])
+        elif event.key == pygame.K_HOME:
+            camera.show_all()
+    elif event.type == pygame.VIDEORESIZE:
+        camera.resize(screen.get_size())
+
+
+def create_profiler():
+    """
+    Returns profiling.Profiler if profile, profile_hud or profile_file is set, otherwise a NullProfiler doing nothing
+    """
+    if profile or profile_hud or profile_file is not None:
+        return profiling.Profiler(dump_file=profile_file, dump_generations=profile_generations)
+    return profiling.NullProfiler()
+
+
+def draw_hud(hud, screen, profiler, rects, whole, cells, label="live cells"):
+    """
+    Draws hud on top of the field, returns rects plus the hud's rect unless the whole window is updated anyway
+    """
+    rect = hud.draw(screen, profiler, cells, label)
+    return rects if whole else rects + [rect]
 
 
 def random_color():
@@ -227,11 +491,82 @@ if __name__ == '__main__':
     # Recommend value between 0.1 < x < 0.5
     percentRandom = .4
 
+    "*** ENGINES ***"
+    # Engine stepping Conway's Game of Life between generations
+    # "numpy" (default), "packed" (64 cells per machine word, least memory), "loop" (cell by cell),
+    # "active" (only steps tiles that changed last generation, fastest once the field has settled)
+    # or "hashlife" (unbounded plane, jumps 2^hashlife_step_exponent generations per transition)
+    conway_engine = "numpy"
+    hashlife_step_exponent = 0
+
+    # Rule of the life-like world, births / survivals by number of live neighbors (only "numpy" and "loop")
+    # "B3/S23" is Conway's Game of Life, try "B36/S23" (HighLife), "B2/S" (Seeds), "B3678/S34678" (Day & Night)
+    # or Generations rules with decaying states such as "B2/S/C3" (Brian's Brain)
+    conway_rule = "B3/S23"
+
+    # Pattern placed in the middle of the field at start, a name from the patterns folder (e.g. "gosper_glider_gun")
+    # or a path to any .rle / .cells file, None for no pattern
+    conway_pattern = None
+
+    "*** RENDERING ***"
+    # How fields are drawn each frame
+    # "dirty" redraws only cells that changed (Conway / RPS), "full" redraws every cell (Conway / RPS),
+    # "blit" draws whole field in one blit through a color palette, best when most cells change (all modes)
+    # "viewport" draws only the cells in the window, zoom with the mouse wheel, pan by dragging with the
+    # middle mouse button or with the arrow keys, Home shows the whole field (Conway / RPS, no cell borders)
+    rendering = "dirty"
+
+    # Field size (rows, columns) in cells for "viewport" rendering, e.g. (20000, 20000), None to fill the window
+    # at scalar pixels per cell. Zoomed out, every pixel shows the average color of the cells under it
+    field_size = None
+
     "*** GAME SPEED ***"
     # Speed between generations
     # Recommend number between 1 < x < 60
     fps = 60
 
+    # Generations stepped per frame while space is held, the field is drawn once after them
+    # Recommend 1 to watch each generation, more to run faster than fps
+    generations_per_frame = 1
+
+    # Milliseconds per frame spent stepping, None to always step generations_per_frame
+    # Otherwise as many generations as fit in the budget (at most generations_per_frame, None for no limit)
+    # are stepped, keeps clicks and keys responsive however fast the simulation runs
+    # Keep it below 1000 / fps, e.g. generations_per_frame = None and frame_budget_ms = 12
+    frame_budget_ms = None
+
+    # Step Conway / RPS in a background thread, the window draws the last finished generation and
+    # stays responsive however slow a generation is (drawn with "dirty" or "blit" rendering)
+    background_simulation = False
+
+    # Steps Langton's ant takes per generation of generations_per_frame
+    # Recommend 1 to watch each step, 10000+ to get past the chaotic phase quickly
+    langton_steps_per_frame = 1
+
+    "*** SNAPSHOTS ***"
+    # File Ctrl + S saves the field to, continue from it with: python headless.py <mode> --resume <file>
+    snapshot_file = "snapshot.snap"
+
+    "*** RECORDING ***"
+    # File the game is recorded to while it runs, finished when the window is closed, None for no recording
+    # ".gif", ".png" (animated PNG, encodes fastest) or, with ffmpeg installed, any video such as ".mp4"
+    # Cells are recorded at one pixel each, one frame every record_every generations
+    record_file = None
+    record_every = 1
+
+    "*** PROFILING ***"
+    # Times the phases of every frame (wait, step, events, record, draw, display), their averages and
+    # percentiles over the last frames are printed when the window is closed
+    profile = False
+
+    # Shows generations/s, milliseconds per phase and live cells in the top left corner (also times frames)
+    profile_hud = False
+
+    # File the first profile_generations generations are profiled to function by function (cProfile), None for none
+    # Read it with: python -m pstats <file>. With background_simulation stepping runs in another thread, not included
+    profile_file = None
+    profile_generations = 1000
+
     "*** COLORS ***"
     black = (0, 0, 0)
     duke_blue = (1, 33, 105)
@@ -252,6 +587,9 @@ if __name__ == '__main__':
     # Input color selection into following lists for each game mode
     conway_colors = [white, duke_blue]  # [dead color, live color]
     rps_colors = [p1, p2, p3, p4, p5]  # make sure list is of length 5
+    # Relative frequency of [rock, paper, scissors, lizard, spock] in random fields, None for equal
+    # Only the first 3 are used for ternary fields
+    rps_weights = None
 
     # Change rules for Langton's Ant here
     # Use only R's and L's
@@ -301,12 +639,25 @@ if __name__ == '__main__':
     border = 1 if border == "y" or border == "Y" else 0
     numColors = 3 if numColors == "t" or numColors == "T" else 5
 
+    # Field larger (or smaller) than the window, only the viewport's camera looks at part of it
+    if rendering == "viewport" and field_size is not None:
+        width, height = field_size[0] * scalar, field_size[1] * scalar
+
     # Call game creation functions
     if mode == "1":
-        conway = grid.Conway(width, height, scalar, border, percentRandom)
+        if conway_engine == "packed":
+            conway = bitlife.PackedConway(width, height, scalar, border, percentRandom)
+        elif conway_engine == "hashlife":
+            conway = hashlife.HashLifeConway(width, height, scalar, border, percentRandom,
+                                             step_exponent=hashlife_step_exponent)
+        elif conway_rule != grid.Conway.RULE:
+            conway = grid.LifeLike(width, height, scalar, border, percentRandom, conway_rule, engine=conway_engine)
+        else:
+            conway = grid.Conway(width, height, scalar, border, percentRandom, engine=conway_engine)
         conway_game(conway_colors, rand)
     elif mode == "2":
-        rps = grid.RPS(width, height, scalar, border, numColors)
+        rps = grid.RPS(width, height, scalar, border, numColors,
+                       weights=rps_weights[:numColors] if rps_weights else None)
         rps_game(rps_colors, rand)
     elif mode == "3":
         langton = grid.Langton(width, height, scalar, border, langton_colors, langton_rules)
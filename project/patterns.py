@@ -0,0 +1,289 @@
+"""
+Loaders for Life patterns in RLE (.rle) and plaintext (.cells) format
+Files are parsed line by line into runs of cells, the runs are then filled into an array at once
+through a difference array, so even multi-megabyte patterns never visit cells one by one.
+Patterns use the field layout of the automata: cells[x][y] with x to the right and y downwards.
+"""
+import os, re
+from collections import OrderedDict
+import numpy as np
+
+RLE_HEADER = re.compile(r"\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?",
+                        re.IGNORECASE)
+
+
+class Pattern:
+    #################################################
+    # Block of cell values read from a pattern file #
+    #################################################
+
+    def __init__(self, cells, rule=None, name=None):
+        self.cells = cells  # uint8 array cells[x][y], 0 is dead
+        self.rule = rule  # rule given by the file, e.g. "B3/S23", if any
+        self.name = name
+
+    @property
+    def size(self):
+        return self.cells.shape
+
+
+def fill_runs(xs, ys, lengths, values, width, height):
+    """
+    Returns uint8 array of shape (width, height) with runs of values starting at (x, y) going right
+    """
+    xs, ys = np.asarray(xs, dtype=np.intp), np.asarray(ys, dtype=np.intp)
+    lengths, values = np.asarray(lengths, dtype=np.intp), np.asarray(values, dtype=np.int16)
+    # Each run adds its value where it starts and takes it away where it ends, a running sum
+    # along x then gives every cell its value (runs never overlap)
+    difference = np.zeros((width + 1, height), dtype=np.int16)
+    np.add.at(difference, (xs, ys), values)
+    np.add.at(difference, (xs + lengths, ys), -values)
+    return np.cumsum(difference[:-1], axis=0, dtype=np.int16).astype(np.uint8)
+
+
+# Value of every RLE tag character: dead, live, states A-X, PREFIX adds 24 per letter p-y
+RLE_VALUES = np.full(256, -1, dtype=np.int16)
+RLE_VALUES[[ord("b"), ord(".")]] = 0
+RLE_VALUES[ord("o")] = 1
+RLE_VALUES[ord("A"):ord("X") + 1] = np.arange(1, 25)
+RLE_PREFIX = np.zeros(256, dtype=np.int16)
+RLE_PREFIX[ord("p"):ord("y") + 1] = np.arange(24, 24 * 11, 24)
+NEWLINE, END = ord("$"), ord("!")
+CHUNK = 1 << 20  # characters tokenized at once
+
+
+def rle_runs(text, x, y):
+    """
+    Tokenizes RLE body text (no whitespace) starting at cell (x, y), all at once with array operations
+    Returns (xs, ys, lengths, values of runs with non zero value, x and y after the text, ended by !)
+    """
+    chars = np.frombuffer(text.encode(), dtype=np.uint8)
+    ended = False
+    stop = np.flatnonzero(chars == END)
+    if len(stop):
+        chars, ended = chars[:stop[0]], True
+
+    # Prefixes p-y belong to the tag after them, drop them and keep their offset with that tag
+    prefix = RLE_PREFIX[chars]
+    offset = np.zeros(len(chars), dtype=np.int16)
+    offset[1:] = prefix[:-1]
+    keep = prefix == 0
+    chars, offset = chars[keep], offset[keep]
+
+    digit = (chars >= ord("0")) & (chars <= ord("9"))
+    tags = np.flatnonzero(~digit)
+    if len(tags) and tags[-1] < len(chars) - 1:
+        chars, digit = chars[:tags[-1] + 1], digit[:tags[-1] + 1]  # a count without its tag
+    # Count before each tag: every digit adds its value times 10^(distance to the tag - 1)
+    places = np.flatnonzero(digit)
+    owner = np.searchsorted(tags, places)
+    weights = (chars[places] - ord("0")) * 10.0 ** (tags[owner] - places - 1)
+    counts = np.bincount(owner, weights, len(tags)).astype(np.int64)
+    counts[counts == 0] = 1
+
+    symbols = chars[tags]
+    newline = symbols == NEWLINE
+    values = np.where(newline, 0, RLE_VALUES[symbols] + offset[tags])
+    if (values < 0).any():
+        raise ValueError("Unknown RLE tag " + repr(chr(symbols[values < 0][0])))
+
+    # Rows advance by the count of each $, x restarts from 0 after it
+    row = y + np.cumsum(np.where(newline, counts, 0))
+    steps = np.where(newline, 0, counts)
+    before = np.cumsum(steps) - steps  # cells of the text before each tag
+    restart = np.maximum.accumulate(np.where(newline, before, 0))  # cells before the last $
+    starts = before - restart + np.where(np.cumsum(newline) == 0, x, 0)
+
+    live = values > 0
+    if len(tags):
+        x, y = (0 if newline[-1] else int(starts[-1] + steps[-1])), int(row[-1])
+    return starts[live], row[live], counts[live], values[live], x, y, ended
+
+
+def parse_rle(lines, name=None):
+    """
+    Parses RLE pattern from an iterable of lines (e.g. an open file)
+    """
+    width = height = 0
+    rule = None
+    runs = []
+    x = y = 0
+    body, size = [], 0
+    ended = False
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            if line.startswith("#N") and name is None:
+                name = line[2:].strip()
+            continue
+        header = RLE_HEADER.match(line)
+        if header and not runs and not body:
+            width, height = int(header.group(1)), int(header.group(2))
+            rule = header.group(3)
+            continue
+        body.append("".join(line.split()))
+        size += len(line)
+        if size >= CHUNK or "!" in line:
+            text = "".join(body)
+            # Counts and prefixes at the end wait for their tag in the next chunk
+            cut = len(text.rstrip("0123456789pqrstuvwxy"))
+            *run, x, y, ended = rle_runs(text[:cut], x, y)
+            runs.append(run)
+            body, size = [text[cut:]], len(text) - cut
+            if ended:
+                break
+    if not ended:
+        *run, x, y, ended = rle_runs("".join(body), x, y)
+        runs.append(run)
+
+    xs, ys, lengths, values = (np.concatenate(part) for part in zip(*runs))
+    width = max(width, int((xs + lengths).max()) if len(xs) else 0)
+    height = max(height, int(ys.max()) + 1 if len(ys) else 0)
+    return Pattern(fill_runs(xs, ys, lengths, values, width, height), rule, name)
+
+
+def parse_plaintext(lines, name=None):
+    """
+    Parses plaintext pattern (. dead, O live, ! starts a comment line) from an iterable of lines
+    """
+    runs = []
+    width = height = 0
+    body, size = [], 0
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith("!"):
+            if line.startswith("!Name:") and name is None:
+                name = line[6:].strip()
+            continue
+        body.append(line)
+        size += len(line) + 1
+        width = max(width, len(line))
+        if size >= CHUNK:
+            runs.append(plaintext_runs(body, height))
+            height += len(body)
+            body, size = [], 0
+    if body:
+        runs.append(plaintext_runs(body, height))
+        height += len(body)
+    xs, ys, lengths = (np.concatenate(part) for part in zip(*runs)) if runs else [np.zeros(0, dtype=np.int64)] * 3
+    return Pattern(fill_runs(xs, ys, lengths, np.ones(len(xs), dtype=np.int16), width, height), None, name)
+
+
+def plaintext_runs(lines, y):
+    """
+    Returns (xs, ys, lengths) of runs of live cells in plaintext lines starting at row y
+    """
+    chars = np.frombuffer(("\n".join(lines) + "\n").encode(), dtype=np.uint8)
+    live = ((chars == ord("O")) | (chars == ord("*"))).view(np.int8)
+    edges = np.diff(live, prepend=0)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    newlines = np.flatnonzero(chars == ord("\n"))
+    row = np.searchsorted(newlines, starts)
+    line_start = np.concatenate([[0], newlines + 1])[row]
+    return starts - line_start, row + y, ends - starts
+
+
+def load(path):
+    """
+    Reads pattern file, RLE unless it ends in .cells or .txt
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    parse = parse_plaintext if path.lower().endswith((".cells", ".txt")) else parse_rle
+    with open(path) as file:
+        pattern = parse(file)
+    pattern.name = pattern.name or name
+    return pattern
+
+
+def place(field, pattern, x=0, y=0, wrap=True):
+    """
+    Writes pattern into 2d field with its corner at (x, y) in one assignment
+    With wrap the pattern continues across the edges of the field (toroidal), otherwise
+    cells outside the field are dropped
+    """
+    cells = pattern.cells if isinstance(pattern, Pattern) else pattern
+    rows, columns = field.shape
+    width, height = cells.shape
+    if wrap:
+        if width > rows or height > columns:  # a pattern larger than the field would overlap itself
+            cells = cells[:rows, :columns]
+            width, height = cells.shape
+        field[np.ix_((x + np.arange(width)) % rows, (y + np.arange(height)) % columns)] = cells
+        return
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, rows), min(y + height, columns)
+    if x0 < x1 and y0 < y1:
+        field[x0:x1, y0:y1] = cells[x0 - x:x1 - x, y0 - y:y1 - y]
+
+
+def stamp(automaton, pattern, x=None, y=None, wrap=True):
+    """
+    Places pattern on automaton's field, centered unless (x, y) is given
+    """
+    cells = pattern.cells if isinstance(pattern, Pattern) else pattern
+    field = automaton.curr_array
+    if not field.flags.writeable:  # e.g. the cached unpacked field of bitlife.PackedConway
+        field = field.copy()
+    if x is None or y is None:
+        x, y = (field.shape[0] - cells.shape[0]) // 2, (field.shape[1] - cells.shape[1]) // 2
+    place(field, cells, x, y, wrap)
+    # Assign the field back, some automata only hand out copies (bit packed, sparse), HashLife
+    # rebuilds its plane from the field
+    if hasattr(automaton, "load"):
+        automaton.load(field)
+    else:
+        automaton.curr_array = field
+    if hasattr(automaton, "invalidate"):  # active engine only steps tiles it knows changed
+        automaton.invalidate()
+
+
+class PatternLibrary:
+    ###################################################################
+    # Cache of parsed patterns, reparsed only when their file changes #
+    ###################################################################
+
+    def __init__(self, directory=None, max_patterns=32):
+        # Folder names are looked up in, defaults to the patterns folder next to this file
+        self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(__file__)), "patterns")
+        self.max_patterns = max_patterns
+        # path -> (modification time, size, pattern), least recently used first
+        self.patterns = OrderedDict()
+
+    def path(self, name):
+        """
+        Returns file of pattern name, which may be a path or a file name in the library folder
+        """
+        if os.path.exists(name):
+            return name
+        for extension in ("", ".rle", ".cells", ".txt"):
+            path = os.path.join(self.directory, name + extension)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError("No pattern " + repr(name) + " in " + self.directory)
+
+    def get(self, name):
+        """
+        Returns parsed pattern, parsing its file only if it is not cached or changed since
+        """
+        path = os.path.abspath(self.path(name))
+        stat = os.stat(path)
+        cached = self.patterns.pop(path, None)
+        if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+            cached = (stat.st_mtime, stat.st_size, load(path))
+        self.patterns[path] = cached
+        if len(self.patterns) > self.max_patterns:
+            self.patterns.popitem(last=False)
+        return cached[2]
+
+    def names(self):
+        """
+        Pattern files in the library folder
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.directory)
+                      if name.lower().endswith((".rle", ".cells", ".txt")))
+
+
+# Shared by every caller, so patterns parsed once stay cached for the whole process
+LIBRARY = PatternLibrary()
@@ -0,0 +1,156 @@
+"""
+Instrumentation of the game loops in main.py, times the phases of every frame (waiting, stepping,
+events, recording, drawing, display updates) and keeps the last window frames for rolling averages
+and percentiles. Optionally the first generations are profiled call by call with cProfile, and a
+HUD shows generations per second, milliseconds per phase and live cells in the window's corner.
+When profiling is off the loops get a NullProfiler, whose calls do nothing.
+"""
+import time, cProfile
+from collections import deque
+import numpy as np
+try:  # the profilers themselves also run without a window
+    import pygame
+except ImportError:
+    pygame = None
+
+PERCENTILES = (50, 95, 99)
+
+
+class Profiler:
+    #############################################
+    # Times the phases of every frame of a loop #
+    #############################################
+
+    def __init__(self, window=300, dump_file=None, dump_generations=1000):
+        self.window = window  # frames kept for averages and percentiles
+        self.times = {}  # phase -> deque of seconds per frame, in the order the phases first ran
+        self.current = {}  # phase -> seconds so far this frame
+        self.totals = deque(maxlen=window)  # seconds of the last frames
+        self.frames = deque(maxlen=window)  # (end time, generation) of the last frames
+        self.mark = time.perf_counter()  # end of the last lap
+        self.dump_file = dump_file
+        self.dump_generations = dump_generations
+        self.calls = None  # cProfile of the first dump_generations generations
+        if dump_file is not None:
+            self.calls = cProfile.Profile()
+            self.calls.enable()
+
+    def lap(self, name):
+        """
+        Adds time since the previous lap (or frame) to phase name, call once a phase finished
+        """
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.) + now - self.mark
+        self.mark = now
+
+    def frame(self, generation):
+        """
+        Ends a frame that left the field at generation, its laps are added to the rolling window
+        """
+        self.totals.append(sum(self.current.values()))
+        for name, seconds in self.current.items():
+            if name not in self.times:
+                self.times[name] = deque(maxlen=self.window)
+            self.times[name].append(seconds)
+            self.current[name] = 0.
+        if self.frames and generation < self.frames[-1][1]:  # reset, rates start over
+            self.frames.clear()
+        self.frames.append((time.perf_counter(), generation))
+        if self.calls is not None and generation >= self.dump_generations:
+            self.dump()
+        self.mark = time.perf_counter()
+
+    def dump(self):
+        """
+        Stops cProfile and writes its stats to dump_file, read them with python -m pstats dump_file
+        """
+        self.calls.disable()
+        self.calls.dump_stats(self.dump_file)
+        self.calls = None
+        print("profile of %d generations written to %s" % (self.frames[-1][1] if self.frames else 0, self.dump_file))
+
+    def rate(self):
+        """
+        Returns (generations per second, frames per second) over the rolling window
+        """
+        if len(self.frames) < 2:
+            return 0., 0.
+        (start, first), (end, last) = self.frames[0], self.frames[-1]
+        if end <= start:
+            return 0., 0.
+        return (last - first) / (end - start), (len(self.frames) - 1) / (end - start)
+
+    def stats(self, name=None):
+        """
+        Returns (mean, *percentiles) in milliseconds of phase name (default whole frames) over the rolling window
+        """
+        times = np.array(self.totals if name is None else self.times[name]) * 1000
+        return (times.mean(),) + tuple(np.percentile(times, PERCENTILES))
+
+    def summary(self):
+        """
+        Returns table of every phase's mean and percentiles, generations and frames per second
+        """
+        lines = ["%-8s %8s" % ("phase", "mean ms") + "".join("%8s" % ("p%d" % p) for p in PERCENTILES)]
+        for name in list(self.times) + [None]:
+            lines.append("%-8s" % (name or "frame") + "".join(" %7.2f" % value for value in self.stats(name)))
+        lines.append("%.1f generations/s, %.1f frames/s over the last %d frames" % (self.rate() + (len(self.frames),)))
+        return "\n".join(lines)
+
+    def close(self):
+        """
+        Prints summary, a cProfile still running is written as it is
+        """
+        if self.calls is not None:
+            self.dump()
+        if self.times:
+            print(self.summary())
+
+
+class NullProfiler:
+    ################################################
+    # Stands in for Profiler when profiling is off #
+    ################################################
+
+    def lap(self, name):
+        pass
+
+    def frame(self, generation):
+        pass
+
+    def close(self):
+        pass
+
+
+class Hud:
+    ###########################################################
+    # Draws generations/s, ms per phase and cell count on top #
+    ###########################################################
+
+    def __init__(self, size=20, color=(255, 255, 255), background=(0, 0, 0)):
+        self.font = pygame.font.Font(None, size)
+        self.color = color
+        self.background = background
+        self.size = (0, 0)  # box only grows, so no text of a previous frame is left next to it
+
+    def draw(self, surface, profiler, cells=None, label="live cells"):
+        """
+        Draws profiler's rolling averages (and cells, e.g. the live cell count) in the top left corner
+        Returns dirty rect to pass to pygame.display.update
+        """
+        generations, frames = profiler.rate()
+        lines = ["%.1f gens/s  %.1f fps" % (generations, frames)]
+        for name in profiler.times:
+            mean, median, p95, p99 = profiler.stats(name)
+            lines.append("%s %.2f ms (p95 %.2f)" % (name, mean, p95))
+        if cells is not None:
+            lines.append("%s %d" % (label, cells))
+        texts = [self.font.render(line, True, self.color) for line in lines]
+        padding, height = 4, self.font.get_linesize()
+        self.size = (max(self.size[0], max(text.get_width() for text in texts) + 2 * padding),
+                     max(self.size[1], len(texts) * height + 2 * padding))
+        rect = pygame.Rect((0, 0), self.size)
+        surface.fill(self.background, rect)
+        for i, text in enumerate(texts):
+            surface.blit(text, (padding, padding + i * height))
+        return rect
@@ -0,0 +1,347 @@
+"""
+Records automata to animated GIF / APNG files or, through a local ffmpeg, to any video format
+Frames are the palette index of every cell (see render.state_index), copied into a ring of shared
+memory slots and encoded by a separate process, so stepping is only slowed by that copy. Once every
+slot waits for the encoder, capture waits too: memory stays the same however long the recording runs.
+GIF and APNG frames only hold the box of cells that changed since the previous frame. APNG is the
+fastest format (zlib), GIF is compressed by LZW in Python at around 100 ns per pixel.
+"""
+import os, queue, shutil, struct, subprocess, zlib
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import render
+
+WHITE, BLACK = (255, 255, 255), (0, 0, 0)
+ANT_COLOR = (255, 0, 0)
+# Rock, paper, scissors, lizard, Spock
+RPS_COLORS = ((228, 26, 28), (31, 120, 180), (255, 127, 0), (77, 175, 74), (152, 78, 163))
+# Cell colors of ants by rule, repeated for longer rules
+ANT_COLORS = ((0, 0, 0), (31, 120, 180), (255, 127, 0), (77, 175, 74), (152, 78, 163), (166, 86, 40),
+              (247, 129, 191), (153, 153, 153), (255, 255, 51), (1, 33, 105))
+
+
+def default_palette(automaton):
+    """
+    Returns palette (states, colors) to record automaton with when none is given
+    """
+    if hasattr(automaton, "numColors"):
+        return render.rps_palette(*RPS_COLORS)
+    if hasattr(automaton, "colors"):
+        return render.ant_palette(automaton.colors)
+    return render.lifelike_palette(WHITE, BLACK, automaton.states)
+
+
+def frame_index(automaton, field, states, ant_index):
+    """
+    Returns uint8 palette index of every cell of field, cells holding an ant are ant_index
+    """
+    index = render.state_index(field, states)
+    colony = getattr(automaton, "colony", None)
+    ant = getattr(automaton, "ant", None)
+    if colony is not None and len(colony):  # a colony includes the ant it started from
+        index[colony.x, colony.y] = ant_index
+    elif hasattr(automaton, "view") and ant is not None:
+        # Ants on a sparse plane are in plane coordinates, shown only inside the viewport
+        x, y = ant[0] - automaton.view[0], ant[1] - automaton.view[1]
+        if 0 <= x < index.shape[0] and 0 <= y < index.shape[1]:
+            index[x, y] = ant_index
+    elif ant is not None and ant != (-1, -1):  # (-1, -1) is no ant on a field of grid.py
+        index[ant[0] % index.shape[0], ant[1] % index.shape[1]] = ant_index
+    return index
+
+
+def changed_box(frame, previous):
+    """
+    Returns (x0, y0, x1, y1) bounding the cells where frame differs from previous (whole frame if
+    there is none), at least one cell so every frame keeps its delay
+    """
+    if previous is None:
+        return 0, 0, frame.shape[0], frame.shape[1]
+    changed = frame != previous
+    xs, ys = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+    if not len(xs):
+        return 0, 0, 1, 1
+    return xs[0], ys[0], xs[-1] + 1, ys[-1] + 1
+
+
+def scanlines(frame, scale):
+    """
+    Returns frame [x][y] as image rows (y major) with every cell scale x scale pixels
+    """
+    lines = frame.T
+    if scale > 1:
+        lines = lines.repeat(scale, axis=0).repeat(scale, axis=1)
+    return np.ascontiguousarray(lines)
+
+
+def pack_bits(lines, depth):
+    """
+    Returns rows of pixels below 2^depth packed depth bits each, first pixel in the highest bits
+    """
+    per = 8 // depth
+    if per == 1:
+        return lines
+    padded = np.zeros((lines.shape[0], -(-lines.shape[1] // per) * per), dtype=np.uint8)
+    padded[:, :lines.shape[1]] = lines
+    shifts = np.arange(per - 1, -1, -1, dtype=np.uint8) * np.uint8(depth)
+    return np.bitwise_or.reduce(padded.reshape(len(lines), -1, per) << shifts, axis=2)
+
+
+def lzw(pixels, bits):
+    """
+    Returns GIF LZW code stream of pixels (bytes of palette indices below 2^bits)
+    """
+    clear, end = 1 << bits, (1 << bits) + 1
+    out = bytearray()
+    size, next_code, table = bits + 1, end + 1, {}
+    buffer, count = clear, size  # bits not yet written, least significant first
+    if not pixels:
+        pixels = b"\0"
+    code = pixels[0]
+    for pixel in pixels[1:]:
+        key = code << 8 | pixel
+        known = table.get(key)
+        if known is not None:
+            code = known
+            continue
+        buffer |= code << count
+        count += size
+        while count >= 8:
+            out.append(buffer & 255)
+            buffer >>= 8
+            count -= 8
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            # The decoder grows its code size one code later than the table, hence > instead of ==
+            if next_code > 1 << size and size < 12:
+                size += 1
+        else:  # table full, start over
+            buffer |= clear << count
+            count += size
+            size, next_code, table = bits + 1, end + 1, {}
+        code = pixel
+    for last in (code, end):
+        buffer |= last << count
+        count += size
+        if last == code and next_code < 4096 and next_code + 1 > 1 << size and size < 12:
+            size += 1  # the decoder adds the final table entry before reading end
+    while count > 0:
+        out.append(buffer & 255)
+        buffer >>= 8
+        count -= 8
+    return bytes(out)
+
+
+class GifWriter:
+    ###############################################
+    # Streams palette frames into an animated GIF #
+    ###############################################
+
+    def __init__(self, path, colors, shape, fps, scale=1):
+        width, height = shape[0] * scale, shape[1] * scale
+        if max(width, height) > 65535:
+            raise ValueError("GIF images are at most 65535 pixels wide and high")
+        self.file = open(path, "wb")
+        self.scale = scale
+        self.bits = max(1, (len(colors) - 1).bit_length())
+        self.delay = max(2, round(100 / fps))  # hundredths of a second, viewers slow down anything shorter
+        self.previous = None
+        table = bytearray(3 << self.bits)
+        table[:3 * len(colors)] = bytes(c for color in colors for c in color)
+        self.file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF0 | (self.bits - 1), 0, 0) + table)
+        self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")  # loop forever
+
+    def write(self, frame):
+        x0, y0, x1, y1 = changed_box(frame, self.previous)
+        self.previous = frame.copy()
+        lines = scanlines(frame[x0:x1, y0:y1], self.scale)
+        s = self.scale
+        # Changed box is drawn over the previous frame, which stays (disposal 1)
+        self.file.write(b"\x21\xF9\x04\x04" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.file.write(b"\x2C" + struct.pack("<HHHHB", x0 * s, y0 * s, lines.shape[1], lines.shape[0], 0))
+        minimum = max(2, self.bits)
+        data = lzw(lines.tobytes(), minimum)
+        blocks = b"".join(bytes((len(data[i:i + 255]),)) + data[i:i + 255] for i in range(0, len(data), 255))
+        self.file.write(bytes((minimum,)) + blocks + b"\x00")
+
+    def close(self):
+        self.file.write(b"\x3B")
+        self.file.close()
+
+
+class ApngWriter:
+    ###############################################
+    # Streams palette frames into an animated PNG #
+    ###############################################
+
+    def __init__(self, path, colors, shape, fps, scale=1, level=1):
+        self.file = open(path, "wb")
+        self.shape, self.scale, self.fps, self.level = shape, scale, fps, level
+        # Pixels are packed into as few bits as the palette needs, a quarter of the bytes to compress
+        # for Life, which the fastest compression level then shrinks better than bytes at level 6
+        self.depth = next(depth for depth in (1, 2, 4, 8) if len(colors) <= 1 << depth)
+        self.previous = None
+        self.sequence = 0  # fcTL / fdAT chunks are numbered
+        self.frames = 0
+        width, height = shape[0] * scale, shape[1] * scale
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, self.depth, 3, 0, 0, 0))
+        self.chunk(b"PLTE", bytes(c for color in colors for c in color))
+        # Number of frames is only known at the end, close writes it here
+        self.actl = self.file.tell()
+        self.chunk(b"acTL", struct.pack(">II", 0, 0))
+
+    def chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write(self, frame):
+        x0, y0, x1, y1 = changed_box(frame, self.previous)
+        self.previous = frame.copy()
+        lines = scanlines(frame[x0:x1, y0:y1], self.scale)
+        s = self.scale
+        # Rows of pixels each start with filter type 0 (none)
+        packed = pack_bits(lines, self.depth)
+        data = zlib.compress(np.hstack((np.zeros((len(packed), 1), dtype=np.uint8), packed)).tobytes(), self.level)
+        self.chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, lines.shape[1], lines.shape[0], x0 * s, y0 * s,
+                                        1, self.fps, 0, 0))
+        self.sequence += 1
+        if self.frames == 0:  # first frame is also the still image
+            self.chunk(b"IDAT", data)
+        else:
+            self.chunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        if self.frames == 0:  # an animated PNG needs a frame to be a PNG at all
+            self.write(np.zeros(self.shape, dtype=np.uint8))
+        self.chunk(b"IEND", b"")
+        self.file.seek(self.actl)
+        self.chunk(b"acTL", struct.pack(">II", self.frames, 0))
+        self.file.close()
+
+
+class FfmpegWriter:
+    ###############################################
+    # Pipes frames as raw RGB into a local ffmpeg #
+    ###############################################
+
+    def __init__(self, path, colors, shape, fps, scale=1):
+        self.scale = scale
+        self.colors = np.array(colors, dtype=np.uint8)
+        width, height = shape[0] * scale, shape[1] * scale
+        # Most codecs need even sizes, padding adds at most one row / column
+        self.process = subprocess.Popen(
+            [shutil.which("ffmpeg"), "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+             "-s", "%dx%d" % (width, height), "-r", str(fps), "-i", "-",
+             "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path], stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(self.colors[scanlines(frame, self.scale)].tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise RuntimeError("ffmpeg failed with exit status " + str(self.process.returncode))
+
+
+def writer_class(path):
+    """
+    Returns writer for path by its extension: .gif, .png / .apng, anything else through ffmpeg
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return GifWriter
+    if extension in (".png", ".apng"):
+        return ApngWriter
+    if shutil.which("ffmpeg") is None:
+        raise ValueError("Recording to " + extension + " needs ffmpeg on PATH, use .gif or .png instead")
+    return FfmpegWriter
+
+
+def encode(path, colors, shape, fps, scale, name, slots, filled, free):
+    """
+    Encoder process: writes every slot handed over through filled, gives slots back through free
+    """
+    buffer = shared_memory.SharedMemory(name=name)
+    slots = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=buffer.buf)
+    writer = writer_class(path)(path, colors, shape, fps, scale)
+    try:
+        while True:
+            slot = filled.get()
+            if slot is None:
+                break
+            writer.write(slots[slot])
+            free.put(slot)
+    finally:
+        writer.close()
+        del slots
+        buffer.close()
+
+
+class Recorder:
+    ###########################################################
+    # Captures frames of an automaton for the encoder process #
+    ###########################################################
+
+    def __init__(self, automaton, path, palette=None, fps=30, scale=1, slots=8):
+        self.automaton = automaton
+        self.path = path
+        writer_class(path)  # fails early on formats that cannot be written
+        self.states, colors = palette or default_palette(automaton)
+        self.colors = tuple(colors) + (ANT_COLOR,)
+        self.ant_index = len(colors)  # extra palette entry for ants
+        if len(self.colors) > 256:
+            raise ValueError("Recordings hold at most 255 colors")
+        self.shape = tuple(automaton.size)
+        self.frames = 0
+
+        # Ring of frame slots, free slots wait in free and slots to encode in filled
+        self.buffer = shared_memory.SharedMemory(create=True, size=max(slots * self.shape[0] * self.shape[1], 1))
+        self.slots = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.buffer.buf)
+        self.free, self.filled = mp.Queue(), mp.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.process = mp.Process(target=encode, args=(path, self.colors, self.shape, fps, scale, self.buffer.name,
+                                                        slots, self.filled, self.free), daemon=True)
+        self.process.start()
+
+    def capture(self, field=None):
+        """
+        Hands field (default automaton.curr_array) to the encoder, waits while every slot is taken
+        """
+        while True:
+            try:
+                slot = self.free.get(timeout=1)
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    raise RuntimeError("Encoder of " + self.path + " stopped, see its error above")
+        field = self.automaton.curr_array if field is None else field
+        self.slots[slot] = frame_index(self.automaton, field, self.states, self.ant_index)
+        self.filled.put(slot)
+        self.frames += 1
+
+    def close(self):
+        """
+        Waits for the encoder to write every captured frame and finish the file
+        """
+        if self.process is None:
+            return
+        self.filled.put(None)
+        self.process.join()
+        failed = self.process.exitcode
+        self.process = None
+        del self.slots
+        self.buffer.close()
+        self.buffer.unlink()
+        if failed:
+            raise RuntimeError("Encoder of " + self.path + " failed, see its error above")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
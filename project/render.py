@@ -0,0 +1,171 @@
+"""
+Renderers drawing an automaton's curr_array onto a pygame surface
+A palette is a pair (states, colors): cells equal to states[i] are drawn in colors[i],
+cells matching no state are drawn in colors[0]
+"""
+import numpy as np
+try:  # palettes and state_index are also used without a window, e.g. by headless recordings
+    import pygame
+except ImportError:
+    pygame = None
+
+WHITE = (255, 255, 255)
+
+
+def conway_palette(dead, live):
+    return (0, 1), (dead, live)
+
+
+def lifelike_palette(dead, live, states=2):
+    # Decaying states of Generations rules fade from live towards dead
+    fading = [tuple(int(l + (d - l) * i / (states - 1)) for l, d in zip(live, dead)) for i in range(1, states - 1)]
+    return tuple(range(states)), (dead, live) + tuple(fading)
+
+
+def rps_palette(rock, paper, scissors, lizard, spock):
+    # Rock = -1, White = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4
+    return (0, -1, 1, 2, 3, 4), (WHITE, rock, paper, scissors, lizard, spock)
+
+
+def ant_palette(colors):
+    # Empty cells are -1, cells of color i are i
+    return (-1,) + tuple(range(len(colors))), (WHITE,) + tuple(colors)
+
+
+def state_index(field, states):
+    """
+    Returns uint8 array with the palette index of every cell
+    """
+    index = np.zeros(field.shape, dtype=np.uint8)
+    for i, state in enumerate(states[1:], 1):
+        index += (field == state).view(np.uint8) * np.uint8(i)
+    return index
+
+
+class DirtyRenderer:
+    ###############################################################
+    # Redraws only the cells that changed since the previous draw #
+    ###############################################################
+
+    def __init__(self, automaton, palette, max_rects=2000):
+        self.automaton = automaton
+        self.states, self.colors = palette
+        self.previous = None  # palette index of every cell as last drawn
+        self.max_rects = max_rects  # above this many dirty rects the whole field is updated at once
+
+    def invalidate(self):
+        """
+        Forces next draw to redraw every cell, e.g. after the window was cleared or resized
+        """
+        self.previous = None
+
+    def draw(self, surface, field=None):
+        """
+        Draws changed cells of field (default automaton.curr_array) onto surface
+        Returns dirty rects to pass to pygame.display.update
+        """
+        automaton = self.automaton
+        index = state_index(automaton.curr_array if field is None else field, self.states)
+        if self.previous is None or self.previous.shape != index.shape:
+            changed = np.ones(index.shape, dtype=bool)
+        else:
+            changed = index != self.previous
+        self.previous = index
+
+        # Batch changed cells into vertical spans of one color
+        same = index[:, 1:] == index[:, :-1]
+        starts, ends = changed.copy(), changed.copy()
+        starts[:, 1:] &= ~(changed[:, :-1] & same)
+        ends[:, :-1] &= ~(changed[:, 1:] & same)
+        xs, first = np.nonzero(starts)
+        last = np.nonzero(ends)[1]
+        colors = index[xs, first]
+
+        scale, border = automaton.scale, automaton.border
+        cell = scale - border
+        rects = []
+        for x, y0, y1, color in zip(xs.tolist(), first.tolist(), last.tolist(), colors.tolist()):
+            rgb = self.colors[color]
+            if border:
+                # Keep lines between cells, so cells of a span are filled one by one
+                for y in range(y0, y1 + 1):
+                    surface.fill(rgb, (x * scale, y * scale, cell, cell))
+            else:
+                surface.fill(rgb, (x * scale, y0 * scale, cell, (y1 - y0 + 1) * scale))
+            rects.append(pygame.Rect(x * scale, y0 * scale, cell, (y1 - y0) * scale + cell))
+
+        if len(rects) > self.max_rects:
+            return [pygame.Rect(0, 0, index.shape[0] * scale, index.shape[1] * scale)]
+        return rects
+
+
+class BlitRenderer:
+    ################################################################
+    # Draws whole field in one blit through a palette lookup table #
+    ################################################################
+
+    def __init__(self, automaton, palette, background=(0, 0, 0), ant_color=(255, 0, 0)):
+        self.automaton = automaton
+        self.states, self.colors = palette
+        self.background = background  # color of lines between cells
+        self.ant_color = ant_color  # Langton / Turmite ant
+        self.ant_index = len(self.colors)  # extra palette entry for the ants of a Turmite colony
+
+        self.cells = None  # 8 bit surface, one pixel per cell, its palette maps index -> RGB
+        self.scaled = None  # cells scaled up to window size
+        self.overlay = None  # cached lines between cells
+
+    def invalidate(self):
+        """
+        Nothing is kept between frames, every draw redraws the whole field
+        """
+
+    def border_overlay(self, size, scale, border):
+        """
+        Returns transparent surface with lines between cells, rebuilt only if size changes
+        """
+        key = (size, scale, border)
+        if self.overlay is None or self.overlay[0] != key:
+            overlay = pygame.Surface(size, pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 0))
+            cell = scale - border
+            for x in range(cell, size[0], scale):
+                overlay.fill(self.background, (x, 0, border, size[1]))
+            for y in range(cell, size[1], scale):
+                overlay.fill(self.background, (0, y, size[0], border))
+            self.overlay = (key, overlay)
+        return self.overlay[1]
+
+    def draw(self, surface, field=None):
+        """
+        Draws field (default automaton.curr_array) onto surface
+        Returns dirty rects to pass to pygame.display.update
+        """
+        automaton = self.automaton
+        index = state_index(automaton.curr_array if field is None else field, self.states)
+        colony = getattr(automaton, "colony", None)
+        if colony is not None and len(colony):
+            index[colony.x, colony.y] = self.ant_index
+        if self.cells is None or self.cells.get_size() != index.shape:
+            self.cells = pygame.Surface(index.shape, depth=8)
+            self.cells.set_palette(tuple(self.colors) + (self.ant_color,))
+        # Palette lookup happens in C when the 8 bit surface is blitted or scaled
+        pygame.surfarray.blit_array(self.cells, index)
+
+        scale, border = automaton.scale, automaton.border
+        size = (index.shape[0] * scale, index.shape[1] * scale)
+        if scale == 1:
+            surface.blit(self.cells, (0, 0))
+        else:
+            if self.scaled is None or self.scaled.get_size() != size:
+                self.scaled = pygame.Surface(size, depth=8)
+                self.scaled.set_palette(tuple(self.colors) + (self.ant_color,))
+            pygame.transform.scale(self.cells, size, self.scaled)
+            surface.blit(self.scaled, (0, 0))
+        if border:
+            surface.blit(self.border_overlay(size, scale, border), (0, 0))
+
+        ant = getattr(automaton, "ant", None)
+        if ant is not None and ant != (-1, -1):
+            surface.fill(self.ant_color, (ant[0] * scale, ant[1] * scale, scale - border, scale - border))
+        return [pygame.Rect((0, 0), size)]
@@ -0,0 +1,43 @@
+"""
+Frame pacing, decides how many generations are stepped between two rendered frames
+Either a fixed number of generations per frame, or as many as fit in a time budget so the
+window keeps handling input at any speed of the simulation
+"""
+import time
+
+
+class FrameScheduler:
+    ##################################################
+    # Steps the simulation between rendered frames #
+    ##################################################
+
+    def __init__(self, generations_per_frame=1, budget_ms=None):
+        if generations_per_frame is None and budget_ms is None:
+            raise ValueError("Need generations_per_frame, budget_ms or both")
+        # Steps per frame, with a budget the most steps per frame (None for no limit)
+        self.generations_per_frame = generations_per_frame
+        self.budget = budget_ms / 1000 if budget_ms is not None else None  # seconds of stepping per frame
+        self.step_time = None  # running average of seconds per step
+        self.steps = 0  # steps run last frame
+        self.rate = 0.  # steps per second during last frame
+
+    def run(self, step):
+        """
+        Calls step for one frame, generations_per_frame times or, with a budget, until the next
+        call would likely overrun it (always at least once)
+        Returns number of calls
+        """
+        start = now = time.perf_counter()
+        count = 0
+        while self.generations_per_frame is None or count < self.generations_per_frame:
+            if self.budget is not None and count and now - start + self.step_time > self.budget:
+                break
+            step()
+            count += 1
+            before, now = now, time.perf_counter()
+            # Average over the last few steps, so a single slow step does not stall the next frames
+            took = now - before
+            self.step_time = took if self.step_time is None else .8 * self.step_time + .2 * took
+        self.steps = count
+        self.rate = count / (now - start) if now > start else 0.
+        return count
@@ -0,0 +1,143 @@
+"""
+Versioned binary snapshots of automata
+A snapshot is the magic bytes, the format version and header length (little endian uint32), a JSON
+header describing the automaton, then the field as a payload starting at a 64 byte boundary:
+    "int8"  one byte per cell, loaded through a memory map so even huge fields open instantly
+    "bits"  one bit per cell for fields of 0 and 1 (Conway), row by row
+    "zlib"  one byte per cell compressed with zlib
+"""
+import os, json, struct, zlib
+import numpy as np
+import grid, bitlife
+
+MAGIC = b"CELLSNAP"
+VERSION = 1
+ALIGN = 64
+ENCODINGS = ("int8", "bits", "zlib")
+ROWS_PER_WRITE = 4096  # rows written at once, keeps temporaries small for huge fields
+
+# Classes that can be saved, looked up by name when loading
+CLASSES = {cls.__name__: cls for cls in (grid.LifeLike, grid.Conway, grid.RPS, grid.Langton, grid.Turmite,
+                                         bitlife.PackedConway)}
+
+
+def describe(automaton):
+    """
+    Returns header dictionary with everything needed to rebuild automaton apart from its field
+    """
+    name = type(automaton).__name__
+    if CLASSES.get(name) is not type(automaton):
+        raise ValueError("Snapshots support " + ", ".join(CLASSES) + ", not " + name)
+    header = {"class": name, "shape": [automaton.rows, automaton.columns],
+              "scale": automaton.scale, "border": automaton.border}
+    if isinstance(automaton, grid.LifeLike):
+        header.update(percentRandom=automaton.percentRandom, rule=automaton.rule, engine=automaton.engine)
+    elif isinstance(automaton, grid.RPS):
+        header.update(numColors=automaton.numColors, engine=automaton.engine)
+    else:
+        header.update(rules=automaton.rules, colors=[[int(c) for c in color] for color in automaton.colors],
+                      ant=[int(a) for a in automaton.ant], direction=automaton.direction)
+        colony = getattr(automaton, "colony", None)
+        if colony is not None and len(colony):
+            header["colony"] = [colony.x.tolist(), colony.y.tolist(), colony.direction.tolist()]
+    return header
+
+
+def build(header):
+    """
+    Creates automaton described by header, its field is left to the caller
+    """
+    cls = CLASSES[header["class"]]
+    rows, columns = header["shape"]
+    scale, border = header["scale"], header["border"]
+    width, height = rows * scale, columns * scale
+    if cls is bitlife.PackedConway:
+        return cls(width, height, scale, border, header["percentRandom"])
+    if cls is grid.LifeLike:
+        return cls(width, height, scale, border, header["percentRandom"], header["rule"], engine=header["engine"])
+    if cls is grid.Conway:
+        return cls(width, height, scale, border, header["percentRandom"], engine=header["engine"])
+    if cls is grid.RPS:
+        return cls(width, height, scale, border, header["numColors"], engine=header["engine"])
+
+    automaton = cls(width, height, scale, border, [tuple(color) for color in header["colors"]], header["rules"])
+    automaton.ant, automaton.direction = tuple(header["ant"]), header["direction"]
+    if "colony" in header:
+        automaton.colony.add(*header["colony"])
+    return automaton
+
+
+def save(automaton, path, encoding="int8", generation=0):
+    """
+    Writes automaton and its field to path as a snapshot of given generation
+    The file is written aside and moved over path at the end, so a crash never leaves half a
+    snapshot and fields still memory mapped from the old file stay readable
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError("Unknown encoding " + repr(encoding) + ", choose from " + str(ENCODINGS))
+    field = automaton.curr_array
+    if encoding == "bits" and not np.isin(field, (0, 1)).all():
+        raise ValueError("Encoding 'bits' only stores fields of 0 and 1")
+
+    header = describe(automaton)
+    header.update(encoding=encoding, generation=generation)
+    text = json.dumps(header).encode()
+    start = len(MAGIC) + 8 + len(text)
+    padding = -start % ALIGN
+
+    partial = path + ".partial"
+    with open(partial, "wb") as file:
+        file.write(MAGIC + struct.pack("<II", VERSION, len(text) + padding))
+        file.write(text + b" " * padding)  # JSON ignores trailing spaces
+        compressor = zlib.compressobj() if encoding == "zlib" else None
+        for x in range(0, len(field), ROWS_PER_WRITE):
+            rows = field[x:x + ROWS_PER_WRITE]
+            if encoding == "bits":
+                data = np.packbits(rows == 1, axis=1, bitorder="little").tobytes()
+            else:
+                data = rows.astype(np.int8).tobytes()
+            file.write(compressor.compress(data) if compressor else data)
+        if compressor:
+            file.write(compressor.flush())
+    os.replace(partial, path)
+
+
+def read_header(path):
+    """
+    Returns (header, payload offset) of snapshot at path
+    """
+    with open(path, "rb") as file:
+        magic, (version, length) = file.read(len(MAGIC)), struct.unpack("<II", file.read(8))
+        if magic != MAGIC:
+            raise ValueError(path + " is not a snapshot")
+        if version > VERSION:
+            raise ValueError(path + " has snapshot version " + str(version) + ", newer than " + str(VERSION))
+        header = json.loads(file.read(length))
+    return header, len(MAGIC) + 8 + length
+
+
+def load(path, mmap=True):
+    """
+    Rebuilds automaton from snapshot at path
+    int8 fields are memory mapped copy on write (edits never reach the file) unless mmap is False
+    Returns (automaton, generation)
+    """
+    header, offset = read_header(path)
+    rows, columns = header["shape"]
+    encoding = header["encoding"]
+    if encoding == "int8" and mmap:
+        field = np.memmap(path, dtype=np.int8, mode="c", offset=offset, shape=(rows, columns))
+    elif encoding == "int8":
+        field = np.fromfile(path, dtype=np.int8, count=rows * columns, offset=offset).reshape(rows, columns)
+    elif encoding == "bits":
+        packed = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(rows, -(-columns // 8)))
+        field = np.unpackbits(packed, axis=1, count=columns, bitorder="little").view(np.int8)
+    else:
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = zlib.decompress(file.read())
+        field = np.frombuffer(data, dtype=np.int8).reshape(rows, columns).copy()
+
+    automaton = build(header)
+    automaton.curr_array = field
+    return automaton, header["generation"]
@@ -0,0 +1,226 @@
+"""
+Sparse storage for ant automata: the plane is split into chunks that are only allocated once
+the ant touches them, so memory grows with the visited area instead of the field size
+"""
+import numpy as np
+import grid, ant
+
+
+class SparseField:
+    ##############################################################
+    # Plane of uint8 cell states stored as chunks in a dictionary #
+    ##############################################################
+
+    # State s holds curr_array value s - 1, so empty cells (-1) are 0 like in ant.py
+    def __init__(self, chunk=64, bounds=None):
+        self.chunk = chunk  # chunks are chunk x chunk cells
+        self.bounds = bounds  # (rows, columns) to stitch edges together, None for an unbounded plane
+        self.chunks = {}  # (chunk x, chunk y) -> uint8 array
+
+    def get_chunk(self, cx, cy):
+        """
+        Returns chunk at chunk coordinates (cx, cy), allocating it on first use
+        """
+        cells = self.chunks.get((cx, cy))
+        if cells is None:
+            cells = np.zeros((self.chunk, self.chunk), dtype=np.uint8)
+            self.chunks[(cx, cy)] = cells
+        return cells
+
+    def get(self, x, y):
+        cells = self.chunks.get((x // self.chunk, y // self.chunk))
+        return -1 if cells is None else int(cells[x % self.chunk, y % self.chunk]) - 1
+
+    def set(self, x, y, value):
+        self.get_chunk(x // self.chunk, y // self.chunk)[x % self.chunk, y % self.chunk] = value + 1
+
+    def viewport(self, x, y, rows, columns):
+        """
+        Returns rows x columns int16 array of cell values (-1 for empty) starting at (x, y)
+        Only chunks that exist and overlap the rectangle are visited
+        """
+        field = np.full((rows, columns), -1, dtype=np.int16)
+        c = self.chunk
+        for cx in range(x // c, (x + rows - 1) // c + 1):
+            for cy in range(y // c, (y + columns - 1) // c + 1):
+                cells = self.chunks.get((cx, cy))
+                if cells is None:
+                    continue
+                # Overlap of chunk and rectangle in plane coordinates
+                x0, x1 = max(x, cx * c), min(x + rows, (cx + 1) * c)
+                y0, y1 = max(y, cy * c), min(y + columns, (cy + 1) * c)
+                field[x0 - x:x1 - x, y0 - y:y1 - y] = cells[x0 - cx * c:x1 - cx * c, y0 - cy * c:y1 - cy * c]
+                field[x0 - x:x1 - x, y0 - y:y1 - y] -= 1
+        return field
+
+    def load(self, field, x=0, y=0):
+        """
+        Writes 2d array of cell values (-1 for empty) into the plane at (x, y), skipping empty chunks
+        """
+        c = self.chunk
+        rows, columns = field.shape
+        for cx in range(x // c, (x + rows - 1) // c + 1):
+            for cy in range(y // c, (y + columns - 1) // c + 1):
+                x0, x1 = max(x, cx * c), min(x + rows, (cx + 1) * c)
+                y0, y1 = max(y, cy * c), min(y + columns, (cy + 1) * c)
+                values = field[x0 - x:x1 - x, y0 - y:y1 - y] + 1
+                if values.any() or (cx, cy) in self.chunks:
+                    self.get_chunk(cx, cy)[x0 - cx * c:x1 - cx * c, y0 - cy * c:y1 - cy * c] = values
+
+    def population(self):
+        """
+        Number of colored (non empty) cells
+        """
+        return sum(int(np.count_nonzero(cells)) for cells in self.chunks.values())
+
+    def memory(self):
+        """
+        Bytes held by chunks
+        """
+        return sum(cells.nbytes for cells in self.chunks.values())
+
+    def run(self, x, y, direction, table, steps):
+        """
+        Steps ant like ant.run, staying inside one chunk's buffer until the ant walks off it
+        Returns ant's (x, y, direction) afterwards
+        """
+        next_state, turn = table
+        c = self.chunk
+        while steps > 0:
+            cx, cy = x // c, y // c
+            cells = memoryview(self.get_chunk(cx, cy)).cast("B", (c * c,))
+            lx, ly = x - cx * c, y - cy * c
+            # Part of the chunk inside the field when edges are stitched
+            hx, hy = c, c
+            if self.bounds is not None:
+                hx, hy = min(c, self.bounds[0] - cx * c), min(c, self.bounds[1] - cy * c)
+            while steps > 0:
+                i = lx * c + ly
+                s = next_state[cells[i]]
+                cells[i] = s
+                direction = (direction + turn[s]) & 3
+                steps -= 1
+                if direction == 0:  # N
+                    ly -= 1
+                    if ly < 0:
+                        break
+                elif direction == 1:  # E
+                    lx += 1
+                    if lx >= hx:
+                        break
+                elif direction == 2:  # S
+                    ly += 1
+                    if ly >= hy:
+                        break
+                else:  # W
+                    lx -= 1
+                    if lx < 0:
+                        break
+            x, y = cx * c + lx, cy * c + ly
+            if self.bounds is not None:
+                x, y = x % self.bounds[0], y % self.bounds[1]
+        return x, y, direction
+
+
+class SparseLangton(grid.Langton):
+    ##########################################################################
+    # Langton's ant / Turmite on sparse storage, unbounded unless wrap=True #
+    ##########################################################################
+
+    def __init__(self, width, height, scale, border, colors, rules, wrap=False, chunk=64):
+        self.scale = scale
+
+        # Size of the window onto the plane (the whole field when wrap is True)
+        self.rows = int(width / scale)
+        self.columns = int(height / scale)
+        self.size = (self.rows, self.columns)
+
+        self.field = SparseField(chunk, bounds=self.size if wrap else None)  # Field as chunks
+        self.border = border  # Lines between cells
+        self.view = (0, 0)  # plane coordinates shown at curr_array[0][0]
+
+        self.direction = "N"  # N, E, S, W
+        # Ant current position on plane, None without an ant (every cell, (-1, -1) too, is on the plane)
+        self.ant = None
+
+        # Colors [(x,y,z), ..., (xn,yn,zn)], Rules = "RL..."
+        self.rules = rules
+        self.colors = colors
+
+    @property
+    def curr_array(self):
+        """
+        Viewport window of the plane, edits to it are not written back
+        """
+        return self.field.viewport(self.view[0], self.view[1], self.rows, self.columns)
+
+    @curr_array.setter
+    def curr_array(self, field):
+        self.field.load(np.asarray(field), self.view[0], self.view[1])
+
+    def transition(self, surface=None):
+        """
+        Moves ant one step
+        """
+        self.fast_forward(1, surface)
+
+    def fast_forward(self, steps, surface=None):
+        """
+        Advances ant steps times, then draws the cells of the viewport that changed
+        """
+        if self.ant is None:  # No ant on the field
+            return
+        before = self.curr_array if surface is not None else None
+        previous = self.ant
+        table = ant.turn_table(self.rules, len(self.colors))
+        x, y, direction = self.field.run(self.ant[0], self.ant[1], ant.DIRECTIONS.index(self.direction),
+                                         table, steps)
+        self.ant, self.direction = (x, y), ant.DIRECTIONS[direction]
+        if surface is not None:
+            self.draw_changes(before, previous, surface)
+
+    def draw_changes(self, before, previous, surface):
+        """
+        Redraws viewport cells that differ from before and the cell the ant left, then the ant
+        """
+        field, scale, cell = self.curr_array, self.scale, self.scale - self.border
+        xs, ys = np.nonzero(field != before)
+        xs, ys = xs.tolist(), ys.tolist()
+        px, py = previous[0] - self.view[0], previous[1] - self.view[1]
+        if 0 <= px < self.rows and 0 <= py < self.columns:
+            xs.append(px)
+            ys.append(py)
+        for x, y in zip(xs, ys):
+            value = int(field[x, y])
+            color = (255, 255, 255) if value == -1 else self.colors[value]
+            surface.fill(color, (x * scale, y * scale, cell, cell))
+        ax, ay = self.ant[0] - self.view[0], self.ant[1] - self.view[1]
+        if 0 <= ax < self.rows and 0 <= ay < self.columns:
+            surface.fill(ant.RED, (ax * scale, ay * scale, cell, cell))
+
+    def click(self, pos, direction, surface):
+        """
+        Clicking on cell spawns ant in specified direction
+        """
+        x, y = int(pos[0] / self.scale), int(pos[1] / self.scale)
+        cell = self.scale - self.border
+        if self.ant is not None:  # There is an ant on the field currently
+            # make sure previous cell where ant was can still update later
+            # by making that cell empty (white)
+            self.field.set(self.ant[0], self.ant[1], -1)
+            px, py = self.ant[0] - self.view[0], self.ant[1] - self.view[1]
+            if 0 <= px < self.rows and 0 <= py < self.columns:
+                surface.fill((255, 255, 255), (px * self.scale, py * self.scale, cell, cell))
+
+        # Creates new ant in specified direction
+        self.ant = (self.view[0] + x, self.view[1] + y)
+        surface.fill(ant.RED, (x * self.scale, y * self.scale, cell, cell))
+        self.direction = direction
+
+    def reset(self, surface=None):
+        """
+        Clears entire plane, freeing every chunk
+        """
+        self.field.chunks.clear()
+        if surface is not None:
+            surface.blit(grid.blank_cells(self.rows, self.columns, self.scale, self.border), (0, 0))
@@ -0,0 +1,241 @@
+"""
+Parameter sweeps, runs every combination of parameters and seeds on a process pool and collects metrics
+Every finished run is appended to a journal (one JSON line per run), so an interrupted sweep picks up
+where it stopped, and at the end all runs are written into one columnar .npz file. Run from the
+project directory, e.g.
+
+    python sweep.py conway --percent-random .1 .2 .3 .4 .5 --seeds 20 --generations 2000 --output life.npz
+    python sweep.py rps --colors 3 5 --seeds 10 --generations 500 --output rps.npz
+    python sweep.py langton --rules RL RLR LLRR LRRRRRLLR --seeds 1 --generations 100000 --output ants.npz
+
+Metrics of every run: population every --sample-every generations (live cells for conway, cells of
+the most common color for rps, colored cells for ants), the generation the field becomes static or
+periodic and its period (conway / rps), the colors left (rps) and the step the ant starts a highway
+and its period (langton).
+"""
+import os, sys, time, json, signal, argparse, itertools
+import multiprocessing as mp
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import headless, cycle, ant
+
+MODES = ("conway", "rps", "langton")
+# Swept parameters by mode, names as in headless.py
+PARAMETERS = {"conway": ("rows", "columns", "percent_random", "rule"),
+              "rps": ("rows", "columns", "colors"),
+              "langton": ("rows", "columns", "rules")}
+# Metrics of runs that do not have them, e.g. stabilized for ants
+MISSING = {"stabilized": -1, "period": 0, "species": -1, "highway": -1, "highway_period": 0}
+
+
+def parameter_grid(mode, seeds, generations, **values):
+    """
+    Returns list of runs (dicts of parameters), one per combination of values and seed
+    e.g. parameter_grid("conway", range(10), 1000, percent_random=[.1, .2, .3])
+    """
+    names = sorted(values)
+    runs = []
+    for combination in itertools.product(*(values[name] for name in names)):
+        for seed in seeds:
+            runs.append(dict(zip(names, combination), mode=mode, seed=seed, generations=generations))
+    return runs
+
+
+def key(run):
+    """
+    Returns text naming run, equal for equal parameters (used to skip finished runs on resume)
+    """
+    return json.dumps(run, sort_keys=True)
+
+
+def command_line(run):
+    """
+    Returns headless.py command line building the automaton of run
+    """
+    options = [run["mode"]]
+    for name, value in sorted(run.items()):
+        if name not in ("mode", "generations", "sample_every", "cycle_history", "max_period"):
+            options += ["--" + name.replace("_", "-"), str(value)]
+    return options
+
+
+def population(automaton, mode):
+    """
+    Returns cells counted for the population series of mode
+    """
+    field = automaton.curr_array
+    if mode == "conway":
+        return int(np.count_nonzero(field == 1))
+    if mode == "rps":
+        return int(np.unique(field, return_counts=True)[1].max())
+    return int(np.count_nonzero(field != -1))
+
+
+def simulate(run):
+    """
+    Runs one simulation, returns (key of run, metrics), called in the pool's processes
+    """
+    start = time.perf_counter()
+    args = headless.parse_args(command_line(run))
+    automaton = headless.build(args)
+    mode, generations, every = run["mode"], run["generations"], run.get("sample_every", 100)
+    series = [population(automaton, mode)]
+    metrics = {}
+    if mode == "langton":
+        # Compute only loop of ant.py that also keeps every move for the highway search
+        rows, columns = automaton.rows, automaton.columns
+        cells = bytearray((automaton.curr_array + 1).astype(np.uint8).tobytes())
+        table = ant.turn_table(automaton.rules, len(automaton.colors))
+        x, y, direction = automaton.ant[0], automaton.ant[1], ant.DIRECTIONS.index(automaton.direction)
+        path = bytearray()
+        for generation in range(0, generations, every):
+            x, y, direction = ant.trace(cells, rows, columns, x, y, direction, table,
+                                        min(every, generations - generation), path)
+            series.append(len(cells) - cells.count(0))
+        metrics["highway"], metrics["highway_period"] = ant.highway(path, run.get("max_period", 500))
+    else:
+        # Stops once the field repeats, the population would only repeat too
+        detector = cycle.CycleDetector(run.get("cycle_history", 4096))
+        detector.update(automaton.curr_array, 0)
+        generation = 0
+        while generation < generations and detector.period is None:
+            chunk = min(every, generations - generation)
+            ran = headless.step(automaton, mode, chunk, detector, generation)
+            generation += ran
+            if ran == chunk:
+                series.append(population(automaton, mode))
+        metrics["stabilized"], metrics["period"] = (detector.start, detector.period) if detector.period else (-1, 0)
+        if mode == "rps":
+            metrics["species"] = len(np.unique(automaton.curr_array))
+    metrics["population"] = series
+    metrics["final_population"] = population(automaton, mode)
+    metrics["seconds"] = round(time.perf_counter() - start, 6)
+    return key(run), metrics
+
+
+def ignore_interrupt():
+    """
+    Pool initializer, Ctrl + C stops the sweep in the main process only, which then ends the pool
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def read_journal(path):
+    """
+    Returns {key: record} of runs finished in journal file, a line cut off by an interruption is dropped
+    """
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path, "rb+") as file:
+        good = 0  # end of the last complete line
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            finished[key(record["run"])] = record
+            good += len(line)
+        file.truncate(good)
+    return finished
+
+
+def sweep(runs, journal, workers=None, chunksize=None, progress=None):
+    """
+    Runs every run not yet in journal on a pool of workers processes, appending each result to journal
+    Runs are handed out chunksize at a time (default: about four chunks per worker)
+    Returns {key: record} of all finished runs
+    """
+    finished = read_journal(journal)
+    pending = [run for run in runs if key(run) not in finished]
+    if pending:
+        workers = workers or mp.cpu_count()
+        chunksize = chunksize or max(1, len(pending) // (workers * 4))
+        by_key = {key(run): run for run in pending}
+        done = len(runs) - len(pending)
+        with open(journal, "a") as file, mp.Pool(workers, ignore_interrupt) as pool:
+            for name, metrics in pool.imap_unordered(simulate, pending, chunksize):
+                record = {"run": by_key[name], "metrics": metrics}
+                finished[name] = record
+                file.write(json.dumps(record) + "\n")
+                file.flush()  # a finished run survives an interruption
+                done += 1
+                if progress is not None:
+                    progress(done, len(runs))
+    return finished
+
+
+def columns(runs, finished):
+    """
+    Returns {column: array} of finished runs in the order of runs, population is padded with -1
+    """
+    records = [finished[key(run)] for run in runs if key(run) in finished]
+    names = sorted({name for record in records for name in record["run"]})
+    table = {name: np.array([record["run"].get(name, "") for record in records]) for name in names}
+    metrics = sorted({name for record in records for name in record["metrics"]} - {"population"})
+    for name in metrics:
+        table[name] = np.array([record["metrics"].get(name, MISSING.get(name, -1)) for record in records])
+    series = [record["metrics"]["population"] for record in records]
+    population = np.full((len(series), max(map(len, series), default=0)), -1, dtype=np.int64)
+    for i, values in enumerate(series):
+        population[i, :len(values)] = values
+    table["population"] = population
+    return table
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a grid of parameters and seeds on a process pool")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--rows", type=int, nargs="+", default=[256], help="field widths in cells")
+    parser.add_argument("--columns", type=int, nargs="+", default=[256], help="field heights in cells")
+    parser.add_argument("--percent-random", type=float, nargs="+", default=[.4], help="conway: shares of live cells")
+    parser.add_argument("--rule", nargs="+", default=["B3/S23"], help="conway: life-like rules, e.g. B3/S23 B36/S23")
+    parser.add_argument("--colors", type=int, nargs="+", choices=(3, 5), default=[3], help="rps: 3 and / or 5")
+    parser.add_argument("--rules", nargs="+", default=["RL"], help="langton: rule strings, e.g. RL RLR LLRR")
+    parser.add_argument("--seeds", type=int, default=10, help="runs per combination, seeded 0 .. seeds - 1")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first run per combination")
+    parser.add_argument("--generations", type=int, default=1000, help="generations (ant steps) per run")
+    parser.add_argument("--sample-every", type=int, default=100, help="generations between population samples")
+    parser.add_argument("--cycle-history", type=int, default=4096,
+                        help="conway/rps: generations remembered when looking for repeated fields")
+    parser.add_argument("--max-period", type=int, default=500, help="langton: longest highway period searched")
+    parser.add_argument("--workers", type=int, help="processes in the pool (default one per CPU)")
+    parser.add_argument("--chunksize", type=int, help="runs handed to a worker at a time")
+    parser.add_argument("--output", required=True, help="columnar results file (.npz)")
+    parser.add_argument("--journal", help="finished runs, to resume from (default OUTPUT.jsonl)")
+    args = parser.parse_args(argv)
+    if args.sample_every < 1:
+        parser.error("--sample-every must be at least 1")
+    args.journal = args.journal or os.path.splitext(args.output)[0] + ".jsonl"
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    values = {name: getattr(args, name) for name in PARAMETERS[args.mode]}
+    runs = parameter_grid(args.mode, range(args.first_seed, args.first_seed + args.seeds), args.generations, **values)
+    for run in runs:
+        run["sample_every"] = args.sample_every
+        if args.mode == "langton":
+            run["max_period"] = args.max_period
+        else:
+            run["cycle_history"] = args.cycle_history
+        headless.parse_args(command_line(run))  # reports bad combinations before any run starts
+
+    def progress(done, total):
+        print("\r%d / %d runs" % (done, total), end="", flush=True)
+
+    start = time.perf_counter()
+    try:
+        finished = sweep(runs, args.journal, args.workers, args.chunksize, progress)
+    except KeyboardInterrupt:
+        print("\ninterrupted, finished runs are kept in " + args.journal + ", run again to resume")
+        sys.exit(1)
+    np.savez(args.output, **columns(runs, finished))
+    print("\n%d runs in %.1f s, results in %s" % (len(runs), time.perf_counter() - start, args.output))
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,6 @@
+"""
+Modules of the project are imported flat (import grid), as main.py does when run from the project directory
+"""
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
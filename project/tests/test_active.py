@@ -0,0 +1,86 @@
+"""
+The active tile engine against the numpy engine, and the work it reports
+"""
+import numpy as np
+import pytest
+import grid
+
+GLIDER = ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2))
+
+
+def conway_pair(field, rule="B3/S23"):
+    """
+    Returns numpy and active life-like fields starting from copies of field
+    """
+    pair = []
+    for engine in ("numpy", "active"):
+        lifelike = grid.LifeLike(field.shape[0], field.shape[1], 1, 0, .4, rule, engine=engine)
+        lifelike.curr_array = field.astype(float)
+        pair.append(lifelike)
+    return pair
+
+
+def gliders(size, count=6):
+    field = np.zeros(size)
+    for i in range(count):
+        x, y = (i * 37) % (size[0] - 3), (i * 53) % (size[1] - 3)
+        for dx, dy in GLIDER:
+            field[x + dx, y + dy] = 1
+    return field
+
+
+@pytest.mark.parametrize("size", [(64, 64), (100, 70), (33, 97)])  # whole and cut short tiles
+@pytest.mark.parametrize("start", ["random", "gliders"])  # every tile active, a few tiles active
+def test_active_matches_numpy(size, start):
+    field = (np.random.default_rng(0).random(size) < .4) if start == "random" else gliders(size)
+    reference, lifelike = conway_pair(field)
+    for generation in range(120):
+        reference.transition()
+        lifelike.transition()
+        assert np.array_equal(lifelike.curr_array, reference.curr_array), "generation " + str(generation + 1)
+
+
+def test_active_matches_numpy_generations_rule():
+    field = np.random.default_rng(1).integers(0, 3, (80, 50))
+    reference, lifelike = conway_pair(field, "B2/S/C3")
+    for _ in range(40):
+        reference.transition()
+        lifelike.transition()
+    assert np.array_equal(lifelike.curr_array, reference.curr_array)
+
+
+def test_active_cells_follow_activity():
+    field = np.zeros((256, 256))
+    field[100:102, 100:102] = 1  # block, a still life
+    reference, lifelike = conway_pair(field)
+    lifelike.transition()  # the first generation evaluates every tile
+    lifelike.transition()
+    assert lifelike.active_cells == 0
+    assert reference.active_cells == 256 * 256
+
+    # A glider keeps a handful of tiles busy, far fewer than the field
+    field[10:13, 10:13] = 0
+    for dx, dy in GLIDER:
+        field[10 + dx, 10 + dy] = 1
+    reference, lifelike = conway_pair(field)
+    for _ in range(20):
+        reference.transition()
+        lifelike.transition()
+    assert 0 < lifelike.active_cells <= 9 * 32 * 32
+    assert np.array_equal(lifelike.curr_array, reference.curr_array)
+
+
+def test_click_wakes_settled_tile():
+    field = np.zeros((128, 128))
+    reference, lifelike = conway_pair(field)
+    lifelike.transition()  # the first generation evaluates every tile
+    lifelike.transition()
+    assert lifelike.active_cells == 0
+    for automaton in (reference, lifelike):
+        for x, y in ((60, 60), (60, 61), (60, 62)):  # blinker
+            automaton.click((x, y))
+    for _ in range(5):
+        reference.transition()
+        lifelike.transition()
+        assert np.array_equal(lifelike.curr_array, reference.curr_array)
+    assert lifelike.active_cells > 0
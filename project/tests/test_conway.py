@@ -0,0 +1,41 @@
+"""
+The numpy and bit packed Conway engines against the cell by cell loop
+"""
+import numpy as np
+import pytest
+import grid, bitlife
+
+
+def random_conway(engine, size, seed=0):
+    """
+    Returns Conway field with the same random cells for each seed
+    """
+    field = (np.random.default_rng(seed).random(size) < .4).astype(float)
+    if engine == "packed":
+        conway = bitlife.PackedConway(size[0], size[1], 1, 0, .4)
+    else:
+        conway = grid.Conway(size[0], size[1], 1, 0, .4, engine=engine)
+    conway.curr_array = field
+    return conway
+
+
+@pytest.mark.parametrize("engine", ["numpy", "packed"])
+@pytest.mark.parametrize("size", [(24, 16), (17, 9), (70, 3)])
+def test_engine_matches_loop(engine, size):
+    loop, fast = random_conway("loop", size), random_conway(engine, size)
+    for generation in range(10):
+        loop.transition()
+        fast.transition()
+        assert np.array_equal(fast.curr_array, loop.curr_array), "generation " + str(generation + 1)
+
+
+def test_glider_wraps_around():
+    # Glider crossing the stitched edges returns to its start after 4 * size generations
+    conway = grid.Conway(8, 8, 1, 0, .4)
+    conway.reset()
+    for x, y in ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+        conway.curr_array[x][y] = 1
+    start = conway.curr_array.copy()
+    for _ in range(32):
+        conway.transition()
+    assert np.array_equal(conway.curr_array, start)
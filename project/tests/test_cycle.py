@@ -0,0 +1,51 @@
+"""
+Cycle detection on fields known to become static or periodic
+"""
+import numpy as np
+import pytest
+import grid, cycle
+
+
+def blinker(size, dtype):
+    field = np.zeros(size, dtype=dtype)
+    field[5, 4:7] = 1
+    return field
+
+
+@pytest.mark.parametrize("dtype", [float, np.int8, bool])
+def test_fingerprint_sees_every_cell(dtype):
+    field = blinker((40, 30), dtype)
+    key = cycle.fingerprint(field)
+    assert cycle.fingerprint(field.copy()) == key
+    for x, y in ((0, 0), (39, 29), (17, 3)):
+        changed = field.copy()
+        changed[x, y] = 1 - changed[x, y]
+        assert cycle.fingerprint(changed) != key
+
+
+def test_blinker_period():
+    conway = grid.Conway(20, 20, 1, 0, .4)
+    conway.curr_array = blinker((20, 20), float)
+    detector = cycle.CycleDetector()
+    generation = 0
+    while not detector.update(conway.curr_array, generation):
+        conway.transition()
+        generation += 1
+    assert (detector.start, detector.period, generation) == (0, 2, 2)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_start_and_period_match_field_history(seed):
+    conway = grid.Conway(24, 18, 1, 0, .3, seed=seed)
+    conway.random_field()
+    detector, fields = cycle.CycleDetector(), []
+    for generation in range(2000):
+        fields.append(conway.curr_array.copy())
+        if detector.update(conway.curr_array, generation):
+            break
+        conway.transition()
+    assert detector.period is not None
+    # First generation whose field comes back, and the first generation it comes back at
+    repeats = [(j, i) for j in range(len(fields)) for i in range(j) if np.array_equal(fields[i], fields[j])]
+    later, start = min(repeats)
+    assert (detector.start, detector.period) == (start, later - start)
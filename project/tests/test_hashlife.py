@@ -0,0 +1,30 @@
+"""
+HashLife jumps against stepping one generation at a time
+"""
+import numpy as np
+import hashlife
+
+GLIDER = ((0, 1), (1, 2), (2, 0), (2, 1), (2, 2))
+
+
+def test_fast_forward_matches_transitions():
+    stepped = hashlife.HashLifeConway(64, 48, 1, 0, .4, seed=7)
+    stepped.random_field()
+    jumped = hashlife.HashLifeConway(64, 48, 1, 0, .4, seed=7)
+    jumped.random_field()
+    for _ in range(100):
+        stepped.transition()
+    jumped.fast_forward(100)
+    assert jumped.generation == stepped.generation == 100
+    assert np.array_equal(jumped.curr_array, stepped.curr_array)
+
+
+def test_step_exponent_jumps():
+    life = hashlife.HashLifeConway(32, 32, 1, 0, .4, step_exponent=2)
+    field = np.zeros((32, 32))
+    for x, y in GLIDER:
+        field[x, y] = 1
+    life.load(field)
+    life.transition()  # 4 generations move a glider one cell diagonally
+    assert life.generation == 4
+    assert np.array_equal(life.curr_array, np.roll(field, (1, 1), axis=(0, 1)))
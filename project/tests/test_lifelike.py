@@ -0,0 +1,53 @@
+"""
+Rule strings and the shared life-like kernel against the cell by cell loop
+"""
+import numpy as np
+import pytest
+import grid, kernels
+
+# HighLife, Seeds, Day & Night, Brian's Brain and Star Wars (Generations rules)
+RULES = ["B3/S23", "B36/S23", "B2/S", "B3678/S34678", "B2/S/C3", "B2/S345/C4"]
+
+
+def random_lifelike(rule, engine, size=(24, 16), seed=0):
+    """
+    Returns life-like field with random states of rule, the same for each seed
+    """
+    lifelike = grid.LifeLike(size[0], size[1], 1, 0, .4, rule, engine=engine)
+    lifelike.curr_array = np.random.default_rng(seed).integers(0, lifelike.states, size).astype(float)
+    return lifelike
+
+
+@pytest.mark.parametrize("rule", RULES)
+def test_numpy_matches_loop(rule):
+    loop, vectorized = random_lifelike(rule, "loop"), random_lifelike(rule, "numpy")
+    for generation in range(10):
+        loop.transition()
+        vectorized.transition()
+        assert np.array_equal(vectorized.curr_array, loop.curr_array), "generation " + str(generation + 1)
+
+
+def test_conway_is_b3_s23():
+    conway, lifelike = grid.Conway(24, 16, 1, 0, .4), random_lifelike("B3/S23", "numpy")
+    conway.curr_array = lifelike.curr_array.copy()
+    for _ in range(10):
+        conway.transition()
+        lifelike.transition()
+    assert np.array_equal(conway.curr_array, lifelike.curr_array)
+
+
+def test_rule_table():
+    table = kernels.rule_table("b36/s23")
+    assert table[0].tolist() == [0, 0, 0, 1, 0, 0, 1, 0, 0]
+    assert table[1].tolist() == [0, 0, 1, 1, 0, 0, 0, 0, 0]
+    # Live cells that do not survive decay through the extra states of Generations rules
+    table = kernels.rule_table("B2/S/C3")
+    assert table.shape == (3, 9)
+    assert table[1].tolist() == [2] * 9
+    assert table[2].tolist() == [0] * 9
+
+
+@pytest.mark.parametrize("rule", ["B3S23", "S23/B3", "B3/S29", "B3/S23/3", "B3/S23/C1", "Bx/S23"])
+def test_bad_rules_raise(rule):
+    with pytest.raises(ValueError):
+        kernels.rule_table(rule)
@@ -0,0 +1,40 @@
+"""
+The numpy RPS engine against the cell by cell loop it replaced
+"""
+import numpy as np
+import pytest
+import grid
+
+
+def random_rps(numColors, engine, size=(24, 16), seed=0):
+    """
+    Returns RPS field with random colors and white cells, the same for each seed
+    """
+    rps = grid.RPS(size[0], size[1], 1, 0, numColors, engine=engine)
+    states = (0,) + grid.RPS.COLORS[numColors]  # white included
+    rps.curr_array = np.random.default_rng(seed).choice(states, size=size).astype(float)
+    return rps
+
+
+@pytest.mark.parametrize("numColors", [3, 5])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_numpy_matches_loop(numColors, seed):
+    loop, vectorized = random_rps(numColors, "loop", seed=seed), random_rps(numColors, "numpy", seed=seed)
+    assert np.count_nonzero(loop.curr_array == 0)  # white cells present
+    for generation in range(10):
+        loop.transition()
+        vectorized.transition()
+        assert np.array_equal(vectorized.curr_array, loop.curr_array), "generation " + str(generation + 1)
+
+
+@pytest.mark.parametrize("numColors", [3, 5])
+def test_numpy_matches_loop_mostly_white(numColors):
+    # Few colored cells, so most cells are white with ties and lone neighbors
+    loop, vectorized = random_rps(numColors, "loop"), random_rps(numColors, "numpy")
+    sparse = np.random.default_rng(7).random(loop.size) < .8
+    loop.curr_array[sparse] = 0
+    vectorized.curr_array = loop.curr_array.copy()
+    for _ in range(10):
+        loop.transition()
+        vectorized.transition()
+    assert np.array_equal(vectorized.curr_array, loop.curr_array)
@@ -0,0 +1,76 @@
+"""
+The tiled multiprocess engine against the numpy engine, and what happens when a worker dies
+"""
+import numpy as np
+import pytest
+import grid, tiled, cycle
+
+
+@pytest.mark.parametrize("rule", ["B3/S23", "B36/S23", "B2/S/C3"])
+def test_tiled_matches_numpy_lifelike(rule):
+    reference = grid.LifeLike(45, 31, 1, 0, .4, rule, seed=3)
+    reference.random_field()
+    with tiled.TiledAutomaton(45, 31, workers=3, rule=rule) as automaton:
+        automaton.curr_array = reference.curr_array
+        for generation in range(20):
+            reference.transition()
+            automaton.transition()
+            assert np.array_equal(automaton.curr_array, reference.curr_array), "generation " + str(generation + 1)
+        for _ in range(15):
+            reference.transition()
+        automaton.fast_forward(15)
+        assert np.array_equal(automaton.curr_array, reference.curr_array)
+
+
+@pytest.mark.parametrize("numColors", [3, 5])
+def test_tiled_matches_numpy_rps(numColors):
+    reference = grid.RPS(40, 27, 1, 0, numColors, seed=5)
+    reference.random_field()
+    reference.curr_array[np.random.default_rng(5).random(reference.size) < .2] = 0  # some white cells
+    with tiled.TiledAutomaton(40, 27, workers=2, numColors=numColors) as automaton:
+        automaton.curr_array = reference.curr_array
+        for generation in range(20):
+            reference.transition()
+            automaton.transition()
+            assert np.array_equal(automaton.curr_array, reference.curr_array), "generation " + str(generation + 1)
+
+
+def test_engine_takes_bool_field():
+    field = np.random.default_rng(1).random((30, 20)) < .4
+    reference = grid.Conway(30, 20, 1, 0, .4)
+    reference.curr_array = field.astype(float)
+    with tiled.TiledEngine(field, workers=2) as engine:
+        engine.step(10)
+        for _ in range(10):
+            reference.transition()
+        assert engine.field().dtype == np.int8
+        assert np.array_equal(engine.field(), reference.curr_array)
+
+
+def test_dead_worker_raises():
+    engine = tiled.TiledEngine(np.zeros((40, 40), dtype=np.int8), workers=2, timeout=.1)
+    engine.processes[0].kill()
+    engine.processes[0].join()
+    with pytest.raises(RuntimeError):
+        engine.step(5)
+    engine.close()
+
+
+def test_worker_hashes_find_cycles():
+    reference = grid.Conway(24, 18, 1, 0, .3, seed=4)
+    reference.random_field()
+    with tiled.TiledAutomaton(24, 18, workers=3) as automaton:
+        automaton.curr_array = reference.curr_array
+        tiled_detector, detector = cycle.CycleDetector(), cycle.CycleDetector()
+        tiled_detector.update(None, 0, automaton.fingerprint())
+        detector.update(reference.curr_array, 0)
+        for generation in range(1, 2000):
+            keys = automaton.fast_forward(1, hashing=True)
+            reference.transition()
+            assert keys == [automaton.fingerprint()]
+            found = tiled_detector.update(None, generation, keys[0])
+            assert found == detector.update(reference.curr_array, generation)
+            if found:
+                break
+        assert (tiled_detector.start, tiled_detector.period) == (detector.start, detector.period)
+        assert detector.period is not None
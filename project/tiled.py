@@ -0,0 +1,259 @@
+"""
+Multiprocess engine for huge Conway (or any life-like rule) / RPS fields
+The field lives in shared memory and is split into bands of rows, one per worker process.
+Each generation a worker reads its band plus a one cell halo row above and below (stitched
+toroidally, like get_neighbors) and writes the next generation into the second buffer.
+Fields are int8, one byte per cell: TiledAutomaton keeps huge fields in shared memory only, without the
+float64 curr_array of grid.py (headless.py --engine tiled).
+"""
+import queue, threading, hashlib
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import kernels, grid
+
+
+def step_block(block, numColors, table=None):
+    """
+    Returns next generation of block, rows at the edges of block are only correct if discarded
+    Life-like fields pass their rule table, RPS fields their number of colors
+    """
+    if table is not None:
+        return kernels.totalistic_step(block, table).view(np.int8)
+    return kernels.rps_step(block, numColors)
+
+
+def band_hash(field, band):
+    """
+    Returns 8 byte digest of rows [band[0], band[1]) of field, the same in every process
+    """
+    return hashlib.sha1(field[band[0]:band[1]]).digest()[:8]  # twice as fast as blake2b here
+
+
+def work(names, shape, band, numColors, table, chunk, tasks, done, barrier):
+    """
+    Worker process: steps rows [band[0], band[1]) for as many generations as each task asks for
+    and, if the task asks for it, hashes the band after every generation (for cycle detection)
+    """
+    buffers = [shared_memory.SharedMemory(name=name) for name in names]
+    fields = [np.ndarray(shape, dtype=np.int8, buffer=buffer.buf) for buffer in buffers]
+    rows = shape[0]
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            generations, parity, hashing = task
+            hashes = []
+            for _ in range(generations):
+                source, target = fields[parity], fields[1 - parity]
+                # Step the band a chunk of rows at a time to keep temporaries small
+                for start in range(band[0], band[1], chunk):
+                    end = min(start + chunk, band[1])
+                    # Chunk with halo rows above and below
+                    block = source.take(np.arange(start - 1, end + 1) % rows, axis=0)
+                    target[start:end] = step_block(block, numColors, table)[1:-1]
+                parity = 1 - parity
+                if hashing:
+                    hashes.append(band_hash(target, band))
+                # Nobody reads the next generation before every band is written
+                barrier.wait()
+            done.put((band, hashes))
+    except threading.BrokenBarrierError:  # another worker died, the parent aborted the generation
+        pass
+    finally:
+        del fields
+        for buffer in buffers:
+            buffer.close()
+
+
+class TiledEngine:
+    #####################################################################
+    # Steps a Conway or RPS field in bands spread across a process pool #
+    #####################################################################
+
+    # automaton is a grid.LifeLike / grid.RPS, or a bare int8 / bool field stepped by rule, or as RPS with
+    # numColors colors, so the field never has to exist as float64
+    def __init__(self, automaton, workers=None, chunk=256, rule="B3/S23", numColors=None, timeout=1.):
+        if isinstance(automaton, np.ndarray):
+            self.automaton, field = None, automaton
+            self.numColors = numColors
+            self.table = kernels.rule_table(rule) if numColors is None else None
+        else:
+            self.automaton, field = automaton, automaton.curr_array
+            self.numColors = getattr(automaton, "numColors", None)  # None for Conway
+            self.table = getattr(automaton, "table", None)  # rule table of life-like fields, None for RPS
+        self.workers = workers or mp.cpu_count()
+        self.shape = tuple(field.shape)
+        self.generation = 0
+        self.timeout = timeout  # seconds between checks that every worker is still alive
+
+        # Two shared buffers, generations alternate between them
+        size = self.shape[0] * self.shape[1]
+        self.buffers = [shared_memory.SharedMemory(create=True, size=max(size, 1)) for _ in range(2)]
+        self.fields = [np.ndarray(self.shape, dtype=np.int8, buffer=buffer.buf) for buffer in self.buffers]
+        self.fields[0][:] = field
+        self.parity = 0  # index of buffer holding current generation
+
+        # Split rows into one band per worker
+        self.workers = max(1, min(self.workers, self.shape[0]))
+        edges = np.linspace(0, self.shape[0], self.workers + 1).astype(int)
+        self.bands = list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+        self.barrier = mp.Barrier(self.workers)
+        self.done = mp.Queue()
+        self.tasks, self.processes = [], []
+        names = [buffer.name for buffer in self.buffers]
+        for band in self.bands:
+            tasks = mp.Queue()
+            process = mp.Process(target=work, args=(names, self.shape, band, self.numColors, self.table, chunk,
+                                                    tasks, self.done, self.barrier), daemon=True)
+            process.start()
+            self.tasks.append(tasks)
+            self.processes.append(process)
+
+    def step(self, generations=1, hashing=False):
+        """
+        Advances field by generations, workers only synchronize at the end of each generation
+        With hashing returns hash of the field after each generation, made of the workers' band hashes
+        """
+        for tasks in self.tasks:
+            tasks.put((generations, self.parity, hashing))
+        hashes = {}  # band -> its hash after each generation
+        while len(hashes) < len(self.tasks):
+            try:
+                band, band_hashes = self.done.get(timeout=self.timeout)
+                hashes[band] = band_hashes
+            except queue.Empty:
+                dead = [process for process in self.processes if not process.is_alive()]
+                if dead:
+                    # Workers waiting at the barrier for the dead one would wait forever
+                    self.barrier.abort()
+                    raise RuntimeError("Tiled worker exited with code " + str(dead[0].exitcode) +
+                                       " in the middle of a generation, close the engine") from None
+        self.parity = (self.parity + generations) % 2
+        self.generation += generations
+        if hashing:
+            return [hash(b"".join(hashes[band][i] for band in self.bands)) for i in range(generations)]
+
+    def fingerprint(self):
+        """
+        Returns hash of the current generation, the same as step returns for it
+        """
+        return hash(b"".join(band_hash(self.field(), band) for band in self.bands))
+
+    def field(self):
+        """
+        Current generation (a view into shared memory, copy it to keep it)
+        """
+        return self.fields[self.parity]
+
+    def sync(self):
+        """
+        Copies current generation back into automaton.curr_array
+        """
+        self.automaton.curr_array = self.field().astype(self.automaton.curr_array.dtype)
+
+    def load(self, field=None):
+        """
+        Copies field (default automaton.curr_array) into the current generation, e.g. after click or random_field
+        """
+        self.fields[self.parity][:] = self.automaton.curr_array if field is None else field
+
+    def close(self):
+        """
+        Stops workers and frees shared memory
+        """
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join()
+        del self.fields
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.tasks, self.processes, self.buffers = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TiledAutomaton:
+    #############################################################################
+    # Life-like or RPS field living only in the shared memory of a TiledEngine #
+    #############################################################################
+
+    # Rock = -1, White = 0, Paper = 1, Scissors = 2, Lizard = 3, Spock = 4, life-like fields unless numColors
+    def __init__(self, rows, columns, workers=None, rule="B3/S23", numColors=None, percentRandom=.4, weights=None,
+                 seed=None, chunk=256):
+        self.scale, self.border = 1, 0
+        self.rows, self.columns = rows, columns
+        self.size = (rows, columns)
+        self.engine = "tiled"
+        self.percentRandom = percentRandom
+        if numColors is None:
+            self.rule = rule
+            self.table = kernels.rule_table(rule)
+            self.states = len(self.table)
+        else:
+            self.numColors = numColors
+            self.weights = weights
+        self.rng = np.random.default_rng(seed)
+        self.tiles = TiledEngine(np.zeros(self.size, dtype=np.int8), workers, chunk, rule, numColors)
+
+    @property
+    def curr_array(self):
+        """
+        Current generation, an int8 view into shared memory
+        """
+        return self.tiles.field()
+
+    @curr_array.setter
+    def curr_array(self, field):
+        self.tiles.load(np.asarray(field))
+
+    def transition(self):
+        self.tiles.step(1)
+
+    def fast_forward(self, generations, hashing=False):
+        """
+        Advances generations at once, the workers only meet at their barrier in between
+        With hashing returns hash of the field after each generation (see TiledEngine.step)
+        """
+        return self.tiles.step(generations, hashing)
+
+    def fingerprint(self):
+        return self.tiles.fingerprint()
+
+    def random_field(self, seed=None):
+        """
+        Fills field with random cells a band of rows at a time, no full size temporary is made
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        field, band = self.curr_array, 1024
+        for start in range(0, self.rows, band):
+            shape = (min(band, self.rows - start), self.columns)
+            if getattr(self, "numColors", None) is None:
+                field[start:start + band] = self.rng.random(shape) < self.percentRandom
+            else:
+                weights = None
+                if self.weights is not None:
+                    weights = np.asarray(self.weights, dtype=float) / np.sum(self.weights)
+                colors = np.array(grid.RPS.COLORS[self.numColors], dtype=np.int8)
+                field[start:start + band] = self.rng.choice(colors, size=shape, p=weights)
+
+    def reset(self):
+        self.curr_array.fill(0)
+
+    def close(self):
+        self.tiles.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
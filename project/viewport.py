@@ -0,0 +1,235 @@
+"""
+Camera onto a field of any size, zoomed in powers of two and panned across the field's stitched edges
+The renderer only reads the cells on screen: zoomed in it scales the visible window up, zoomed out
+every pixel averages the colors of at most samples x samples cells spread over the block of cells it
+covers, so the cost of a frame depends on the window size but not on the size of the field.
+"""
+import math
+import numpy as np
+import pygame
+import render
+
+
+class Camera:
+    ################################################
+    # Zoom and position of the window onto a field #
+    ################################################
+
+    def __init__(self, field_size, screen_size, zoom=1, max_zoom=64):
+        self.rows, self.columns = field_size
+        self.screen = tuple(screen_size)
+        self.max_zoom = max_zoom
+        self.zoom = zoom  # pixels per cell, a power of two (1/4 shows 4 x 4 cells per pixel)
+        self.x, self.y = 0., 0.  # cell at the top left corner of the window, wraps around the field
+
+    @property
+    def fit_zoom(self):
+        """
+        Largest zoom at which the whole field fits into the window
+        """
+        fit = min(self.screen[0] / self.rows, self.screen[1] / self.columns)
+        return min(2. ** math.floor(math.log2(fit)), self.max_zoom)
+
+    @property
+    def min_zoom(self):
+        """
+        Zooming out stops once the whole field is in the window, or at one cell per pixel for small fields
+        """
+        return min(self.fit_zoom, 1)
+
+    def resize(self, screen_size):
+        self.screen = tuple(screen_size)
+        self.zoom = max(self.zoom, self.min_zoom)
+
+    def zoom_at(self, pos, steps=1):
+        """
+        Zooms in (out for negative steps) by a factor of 2 per step, keeping the cell under pos in place
+        """
+        zoom = min(max(self.zoom * 2. ** steps, self.min_zoom), self.max_zoom)
+        self.x = (self.x + pos[0] / self.zoom - pos[0] / zoom) % self.rows
+        self.y = (self.y + pos[1] / self.zoom - pos[1] / zoom) % self.columns
+        self.zoom = zoom
+
+    def pan(self, dx, dy):
+        """
+        Moves field by (dx, dy) pixels, e.g. the distance the mouse was dragged
+        """
+        self.x = (self.x - dx / self.zoom) % self.rows
+        self.y = (self.y - dy / self.zoom) % self.columns
+
+    def show_all(self):
+        """
+        Zooms to fit the whole field into the window
+        """
+        self.zoom = self.fit_zoom
+        self.x = self.y = 0.
+
+    def extent(self):
+        """
+        Returns (width, height) in pixels the field covers, less than the window if it is small enough
+        """
+        return min(self.screen[0], math.ceil(self.rows * self.zoom)), \
+            min(self.screen[1], math.ceil(self.columns * self.zoom))
+
+    def cell_at(self, pos):
+        """
+        Returns cell (x, y) under window position pos, None outside the field
+        """
+        width, height = self.extent()
+        if not (0 <= pos[0] < width and 0 <= pos[1] < height):
+            return None
+        return int(self.x + pos[0] / self.zoom) % self.rows, int(self.y + pos[1] / self.zoom) % self.columns
+
+    def position(self, x, y):
+        """
+        Returns window position of the corner of cell (x, y), None if it is not on screen
+        """
+        px, py = ((x - self.x) % self.rows) * self.zoom, ((y - self.y) % self.columns) * self.zoom
+        width, height = self.extent()
+        if px >= width or py >= height:
+            return None
+        return int(px), int(py)
+
+
+def take(field, x, width, y, height, step=1):
+    """
+    Returns width x height window of every step-th cell of 2d field from cell (x, y), wrapping around its edges
+    """
+    rows, columns = field.shape
+    if x + (width - 1) * step < rows and y + (height - 1) * step < columns:
+        return field[x:x + width * step:step, y:y + height * step:step]
+    return field[np.ix_((x + np.arange(width) * step) % rows, (y + np.arange(height) * step) % columns)]
+
+
+class ViewportRenderer:
+    ###################################################
+    # Draws the part of the field the camera looks at #
+    ###################################################
+
+    def __init__(self, automaton, palette, camera, samples=2, background=(0, 0, 0), ant_color=(255, 0, 0)):
+        self.automaton = automaton
+        self.states, self.colors = palette
+        self.camera = camera
+        self.samples = samples  # cells per pixel and axis averaged when zoomed out
+        self.background = background  # window outside a field smaller than it
+        self.ant_color = ant_color
+        self.rgb = np.array(self.colors, dtype=np.uint16)  # palette index -> color, summed when zoomed out
+        self.cells = None  # 8 bit surface of visible cells, its palette maps index -> RGB
+        self.scaled = None
+        self.pixels = None  # 24 bit surface of averaged colors
+        self.lut = None  # (samples, mean color of every combination of samples x samples palette indices)
+
+    def invalidate(self):
+        """
+        Nothing is kept between frames, every draw redraws the window
+        """
+
+    def draw(self, surface, field=None):
+        """
+        Draws visible cells of field (default automaton.curr_array) onto surface
+        Returns dirty rects to pass to pygame.display.update
+        """
+        camera = self.camera
+        field = self.automaton.curr_array if field is None else field
+        width, height = camera.extent()
+        if (width, height) != surface.get_size():
+            surface.fill(self.background)
+        if camera.zoom >= 1:
+            self.draw_cells(surface, field)
+        else:
+            self.draw_blocks(surface, field)
+        self.draw_ants(surface)
+        return [pygame.Rect((0, 0), surface.get_size())]
+
+    def draw_cells(self, surface, field):
+        """
+        Zoomed in: scales the window of visible cells up, zoom pixels per cell
+        """
+        camera, zoom = self.camera, int(self.camera.zoom)
+        x, y = int(camera.x), int(camera.y)
+        # One cell more than fits, the first one may be cut off
+        width = min(camera.rows, math.ceil(camera.screen[0] / zoom) + 1)
+        height = min(camera.columns, math.ceil(camera.screen[1] / zoom) + 1)
+        index = render.state_index(take(field, x, width, y, height), self.states)
+        if self.cells is None or self.cells.get_size() != index.shape:
+            self.cells = pygame.Surface(index.shape, depth=8)
+            self.cells.set_palette(self.colors)
+        pygame.surfarray.blit_array(self.cells, index)
+        offset = (-int((camera.x - x) * zoom), -int((camera.y - y) * zoom))
+        if zoom == 1:
+            surface.blit(self.cells, offset)
+            return
+        size = (width * zoom, height * zoom)
+        if self.scaled is None or self.scaled.get_size() != size:
+            self.scaled = pygame.Surface(size, depth=8)
+            self.scaled.set_palette(self.colors)
+        pygame.transform.scale(self.cells, size, self.scaled)
+        surface.blit(self.scaled, offset)
+
+    def block_colors(self, samples):
+        """
+        Returns lookup table of the mean color of every combination of samples x samples palette indices
+        None if there are too many combinations, then colors are summed sample by sample
+        """
+        states, count = len(self.colors), samples * samples
+        if states ** count > 1 << 16:
+            return None
+        if self.lut is None or self.lut[0] != samples:
+            digits = np.arange(states ** count)[:, None] // states ** np.arange(count) % states
+            self.lut = (samples, (self.rgb[digits].sum(axis=1) // count).astype(np.uint8))
+        return self.lut[1]
+
+    def draw_blocks(self, surface, field):
+        """
+        Zoomed out: every pixel shows the mean color of samples x samples cells of its block, which
+        is exact while blocks are no larger than that and a density estimate beyond
+        """
+        camera = self.camera
+        block = round(1 / camera.zoom)  # cells per pixel and axis
+        samples = min(self.samples, block)
+        width, height = camera.extent()
+        x, y = int(camera.x), int(camera.y)
+        lut = self.block_colors(samples)
+        # Sampled cells spread evenly over every block, each sample is one strided window of the field
+        offsets = [i * block // samples for i in range(samples)]
+        if lut is not None:
+            # Palette indices of the samples of a pixel form one number, looked up once
+            code = np.zeros((width, height), dtype=np.uint16)
+            for dx in offsets:
+                for dy in offsets:
+                    window = take(field, x + dx, width, y + dy, height, block)
+                    code = code * len(self.colors) + render.state_index(window, self.states)
+            pixels = lut[code]
+        else:
+            colors = np.zeros((width, height, 3), dtype=np.uint32)
+            for dx in offsets:
+                for dy in offsets:
+                    window = take(field, x + dx, width, y + dy, height, block)
+                    colors += self.rgb[render.state_index(window, self.states)]
+            pixels = (colors // (samples * samples)).astype(np.uint8)
+        if self.pixels is None or self.pixels.get_size() != (width, height):
+            self.pixels = pygame.Surface((width, height), depth=24)
+        pygame.surfarray.blit_array(self.pixels, pixels)
+        surface.blit(self.pixels, (0, 0))
+
+    def draw_ants(self, surface):
+        """
+        Draws Langton / Turmite ants on screen, at least one pixel each
+        """
+        automaton, camera = self.automaton, self.camera
+        colony = getattr(automaton, "colony", None)
+        if colony is not None and len(colony):
+            ants = zip(colony.x.tolist(), colony.y.tolist())
+        elif hasattr(automaton, "view") and automaton.ant is not None:
+            # Ants on a sparse plane are in plane coordinates, shown only inside the viewport
+            x, y = automaton.ant[0] - automaton.view[0], automaton.ant[1] - automaton.view[1]
+            ants = [(x, y)] if 0 <= x < automaton.rows and 0 <= y < automaton.columns else []
+        elif getattr(automaton, "ant", None) not in (None, (-1, -1)):  # (-1, -1) is no ant on a field of grid.py
+            ants = [automaton.ant]
+        else:
+            return
+        size = max(1, int(camera.zoom))
+        for x, y in ants:
+            position = camera.position(x, y)
+            if position is not None:
+                surface.fill(self.ant_color, (position, (size, size)))